@@ -0,0 +1,89 @@
+"""
+Smart Book Shop Management & Billing System
+Catalogue memory and load-time benchmark
+Compares plain dict books with the compact Book records used by BookShopStore
+
+Usage:  python bench_catalogue.py [number of books, default 500000]
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bookshop_store import Book, CATEGORIES
+
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'Urdu', 'Computer Science']
+
+
+def write_catalogue(path, count):
+    """Write a synthetic books.json with `count` books"""
+    rng = random.Random(42)
+    books = []
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        subject = rng.choice(SUBJECTS)
+        books.append({
+            'title': f"{subject} Class {category} Vol {i}",
+            'sku': f"{subject[:4].upper()}-{category}-{i:06d}",
+            'category': category,
+            'price': float(rng.randint(100, 2000))
+        })
+    with open(path, 'w') as f:
+        json.dump(books, f, indent=4)
+
+
+def measure(label, load):
+    """Time a loader, then report the memory its result keeps alive"""
+    gc.collect()
+    start = time.perf_counter()
+    books = load()
+    elapsed = time.perf_counter() - start
+    del books
+
+    # Memory is traced in a second pass so tracing does not skew the timing
+    gc.collect()
+    tracemalloc.start()
+    books = load()
+    current, peak = tracemalloc.get_traced_memory()
+
+    # Cart copies: one per unit, as add_to_cart does
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    cart = [books[i % len(books)].copy() for i in range(1000)]
+    per_line = (tracemalloc.get_traced_memory()[0] - before) / len(cart)
+    tracemalloc.stop()
+
+    print(f"{label:<14}{len(books):>9}{elapsed:>10.2f}s"
+          f"{current / 1e6:>11.1f} MB{peak / 1e6:>11.1f} MB{per_line:>14.0f} B")
+    del books, cart
+
+
+def main():
+    """Run the comparison"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'books.json')
+        write_catalogue(path, count)
+        print(f"books.json: {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"{'Format':<14}{'Books':>9}{'Load':>11}{'Resident':>14}{'Peak':>14}{'Per cart line':>16}")
+
+        def load_dicts():
+            with open(path) as f:
+                return json.load(f)
+
+        def load_records():
+            with open(path) as f:
+                return json.load(f, object_hook=Book.from_dict)
+
+        measure("dict", load_dicts)
+        measure("Book (slots)", load_records)
+
+
+if __name__ == "__main__":
+    main()
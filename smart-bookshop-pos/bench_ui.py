@@ -0,0 +1,203 @@
+"""
+Smart Book Shop Management & Billing System
+Screen render-time benchmark
+Builds the widget-heavy screens against synthetic catalogues of growing
+size and records time to first paint and the number of widgets created.
+Runs under a virtual display (Xvfb) when no screen is available.
+
+Usage:
+    python bench_ui.py                              compare with bench_ui_baseline.json
+    python bench_ui.py --save-baseline              record a new baseline
+    python bench_ui.py --sizes 100 1000 --screens edit_book delete_book
+
+Exits with code 1 when a screen is slower (beyond the tolerance) or
+creates more widgets than in the baseline, so it can gate a build.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from bench_catalogue import write_catalogue
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, 'bench_ui_baseline.json')
+
+DEFAULT_SIZES = [100, 1000, 5000]
+
+# Paint times this close to the baseline never count as a regression
+SLACK_SECONDS = 0.05
+
+
+# ============ VIRTUAL DISPLAY ============
+
+def start_virtual_display():
+    """Start Xvfb if there is no display; returns the process (or None)"""
+    if sys.platform in ('win32', 'darwin') or os.environ.get('DISPLAY'):
+        return None
+    if shutil.which('Xvfb') is None:
+        sys.exit("No display and Xvfb is not installed (apt install xvfb)")
+
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen(
+            ['Xvfb', f':{number}', '-screen', '0', '1280x800x24', '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        # Wait for the server to accept connections
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ['DISPLAY'] = f':{number}'
+                return process
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        process.terminate()
+    sys.exit("Could not start Xvfb")
+
+
+# ============ MEASUREMENT ============
+
+def count_widgets(widget):
+    """Number of widgets below (and including) a widget"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def first_paint(app, build):
+    """Seconds from building a screen until it has been laid out and drawn"""
+    app.clear_screen()
+    app.root.update()
+
+    start = time.perf_counter()
+    build()
+    app.root.update_idletasks()
+    app.root.update()
+    return time.perf_counter() - start
+
+
+def screens(app, size):
+    """Screens to measure: name -> function that builds it"""
+    cart = [app.books[i % len(app.books)].copy() for i in range(max(1, size // 10))]
+    total = sum(book['price'] for book in cart)
+    now = datetime.now()
+
+    return {
+        'inventory_table': app.show_view_books,
+        'new_sale': app.show_new_sale,
+        'edit_book': app.show_edit_book,
+        'delete_book': app.show_delete_book,
+        'invoice': lambda: app.show_invoice(
+            cart, len(cart), total, now.strftime("%d-%m-%Y"), now.strftime("%I:%M %p")
+        )
+    }
+
+
+def run_size(size, names, repeat):
+    """Build every chosen screen `repeat` times against a catalogue of `size` books"""
+    results = {}
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as folder:
+        # The app keeps its data next to the working directory
+        os.makedirs(os.path.join(folder, 'Inventory'))
+        write_catalogue(os.path.join(folder, 'Inventory', 'books.json'), size)
+        os.chdir(folder)
+        try:
+            from bookshop_system import BookShopSystem
+
+            app = BookShopSystem()
+            try:
+                available = screens(app, size)
+                for name in names:
+                    times = [first_paint(app, available[name]) for _ in range(repeat)]
+                    results[name] = {
+                        'seconds': round(statistics.median(times), 4),
+                        'widgets': count_widgets(app.root)
+                    }
+            finally:
+                app.cart_autosave.close()
+                app.root.destroy()
+        finally:
+            os.chdir(cwd)
+
+    return results
+
+
+# ============ BASELINE ============
+
+def compare(result, baseline, tolerance):
+    """Regression messages for one measurement against its baseline"""
+    problems = []
+    if result['seconds'] > baseline['seconds'] * (1 + tolerance) + SLACK_SECONDS:
+        problems.append(f"first paint {result['seconds']:.3f}s vs {baseline['seconds']:.3f}s")
+    if result['widgets'] > baseline['widgets']:
+        problems.append(f"{result['widgets']} widgets vs {baseline['widgets']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen render-time benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Catalogue sizes")
+    parser.add_argument('--screens', nargs='+', help="Screens to measure (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="Builds per screen (median is kept)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline file")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed slowdown before failing (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, HERE)
+    display = start_virtual_display()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    results = {}
+    failures = 0
+    print(f"{'Screen':<18}{'Books':>7}{'First paint':>14}{'Widgets':>10}{'Baseline':>22}  Status")
+    try:
+        for size in args.sizes:
+            names = args.screens or ['inventory_table', 'new_sale', 'edit_book', 'delete_book', 'invoice']
+            for name, result in run_size(size, names, args.repeat).items():
+                key = f"{name}@{size}"
+                results[key] = result
+
+                base = baseline.get(key)
+                if base is None:
+                    reference, status = "-", "new"
+                else:
+                    reference = f"{base['seconds']:.3f}s / {base['widgets']}"
+                    problems = compare(result, base, args.tolerance)
+                    status = "REGRESSED: " + "; ".join(problems) if problems else "ok"
+                    failures += bool(problems)
+
+                print(f"{name:<18}{size:>7}{result['seconds']:>13.3f}s{result['widgets']:>10}"
+                      f"{reference:>22}  {status}")
+    finally:
+        if display is not None:
+            display.terminate()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if failures:
+        print(f"{failures} screen(s) regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
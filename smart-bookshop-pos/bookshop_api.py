@@ -0,0 +1,462 @@
+"""
+Smart Book Shop Management & Billing System
+Local HTTP service for tablets and secondary counters
+Built on asyncio and the same BookShopStore the desktop app uses
+
+Endpoints (all JSON):
+    GET    /books?q=<text>&category=<9-12|All>&limit=<n>   search inventory (limit 0-500)
+    GET    /books/<sku>                                    SKU lookup
+    POST   /carts                   {"contract": ...}      start a cart (contract optional)
+    GET    /carts/<id>                                     view a cart
+    GET    /booklists                                      class/school booklists
+    POST   /carts/<id>/items        {"sku": ..., "qty": n} add books
+    POST   /carts/<id>/booklist     {"code": ...}          add a whole booklist
+    DELETE /carts/<id>/items/<index>                       remove a line
+    DELETE /carts/<id>                                     discard a cart
+    POST   /carts/<id>/checkout                            commit the sale
+
+The service only listens on this PC unless Application_Files/api_settings.json
+allows the shop network, for example:
+    {"allow_lan": true, "port": 8765, "token": "a-long-shared-secret"}
+Every request must then carry the header "Authorization: Bearer <token>".
+
+Run standalone with:  python bookshop_api.py --port 8765
+"""
+
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import threading
+import uuid
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from bookshop_store import BookShopStore, json_default
+
+STATUS_TEXT = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error'
+}
+
+# Limits on what one request may ask for
+MAX_BODY = 64 * 1024
+MAX_LIMIT = 500
+MAX_QTY = 100
+
+
+class APIError(Exception):
+    """Error returned to the client as a JSON response"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def is_loopback(host):
+    """True if a listen address is only reachable from this PC"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def load_api_settings(app_dir):
+    """Host, port and token for the tablet service from api_settings.json
+
+    Without the file (or with allow_lan off) the service stays on
+    127.0.0.1. Allowing the shop network without a token generates one
+    and saves it, so the service is never open to the network unprotected.
+    """
+    settings_file = os.path.join(app_dir, 'api_settings.json')
+    settings = {}
+    if os.path.exists(settings_file):
+        with open(settings_file, 'r') as f:
+            settings = json.load(f)
+
+    if not settings.get('allow_lan'):
+        return {'host': '127.0.0.1', 'port': settings.get('port', 8765), 'token': settings.get('token') or None}
+
+    if not settings.get('token'):
+        settings['token'] = secrets.token_urlsafe(24)
+        temp_file = settings_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(settings, f, indent=4)
+        os.replace(temp_file, settings_file)
+    return {'host': '0.0.0.0', 'port': settings.get('port', 8765), 'token': settings['token']}
+
+
+class BookShopAPI:
+    """Asyncio HTTP service exposing inventory, carts and checkout"""
+
+    def __init__(self, store, host='127.0.0.1', port=8765, token=None):
+        if not token and not is_loopback(host):
+            raise ValueError("A token is required to listen on the shop network")
+
+        self.store = store
+        self.host = host
+        self.port = port
+        self.token = token
+
+        # Carts being built on tablets, keyed by cart id
+        self.carts = {}
+        self.cart_contracts = {}
+
+        self.loop = None
+        self.server = None
+        self._thread = None
+
+    # ============ HTTP HANDLING ============
+
+    async def handle_client(self, reader, writer):
+        """Serve requests on one connection (keep-alive aware)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.send_response(writer, 400, {'error': 'Malformed request line'}, False)
+                    break
+
+                # Read headers
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    # Without a usable length the rest of the stream cannot be framed
+                    await self.send_response(writer, 400, {'error': 'Invalid Content-Length'}, False)
+                    break
+                if length > MAX_BODY:
+                    # The body is not read, so the connection cannot be reused
+                    await self.send_response(writer, 400, {'error': f'Request body over {MAX_BODY} bytes'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if version == 'HTTP/1.0':
+                    keep_alive = headers.get('connection', '').lower() == 'keep-alive'
+
+                try:
+                    if not self.authorized(headers):
+                        raise APIError(401, 'Missing or wrong token')
+                    status, payload = await self.dispatch(method, target, body)
+                except APIError as e:
+                    status, payload = e.status, {'error': e.message}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                await self.send_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def authorized(self, headers):
+        """True if the request carries the shared token (or none is set)"""
+        if not self.token:
+            return True
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), self.token)
+
+    async def send_response(self, writer, status, payload, keep_alive):
+        """Write a JSON response"""
+        data = json.dumps(payload, default=json_default).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """Route a request to its handler"""
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise APIError(400, 'Request body must be JSON')
+            if not isinstance(data, dict):
+                raise APIError(400, 'Request body must be a JSON object')
+        else:
+            data = {}
+
+        if parts[:1] == ['books']:
+            if method != 'GET':
+                raise APIError(405, 'Use GET for books')
+            if len(parts) == 1:
+                return 200, self.search_books(query)
+            if len(parts) == 2:
+                return 200, self.lookup_book(parts[1])
+
+        if parts == ['booklists']:
+            if method != 'GET':
+                raise APIError(405, 'Use GET for booklists')
+            return 200, self.list_booklists()
+
+        if parts[:1] == ['carts']:
+            if len(parts) == 1 and method == 'POST':
+                return 201, self.create_cart(data.get('contract'))
+            if len(parts) == 2 and method == 'GET':
+                return 200, self.cart_summary(parts[1])
+            if len(parts) == 2 and method == 'DELETE':
+                self.get_cart(parts[1])
+                del self.carts[parts[1]]
+                self.cart_contracts.pop(parts[1], None)
+                return 200, {'deleted': parts[1]}
+            if len(parts) == 3 and parts[2] == 'items' and method == 'POST':
+                return 200, self.add_items(parts[1], data)
+            if len(parts) == 3 and parts[2] == 'booklist' and method == 'POST':
+                return 200, self.add_booklist(parts[1], data)
+            if len(parts) == 4 and parts[2] == 'items' and method == 'DELETE':
+                return 200, self.remove_item(parts[1], parts[3])
+            if len(parts) == 3 and parts[2] == 'checkout' and method == 'POST':
+                return 200, await self.checkout(parts[1])
+
+        raise APIError(404, f"No route for {method} {url.path}")
+
+    # ============ INVENTORY ============
+
+    def search_books(self, query):
+        """Search inventory by title/SKU and class"""
+        try:
+            limit = int(query.get('limit', 50))
+        except ValueError:
+            raise APIError(400, 'limit must be a number')
+        if not 0 <= limit <= MAX_LIMIT:
+            raise APIError(400, f'limit must be between 0 and {MAX_LIMIT}')
+
+        # The desktop app edits books in place, so copy them under its lock
+        with self.store.locked():
+            books = self.store.search_books(query.get('q', ''), query.get('category', 'All'))
+            return {'count': len(books), 'books': [book.copy() for book in books[:limit]]}
+
+    def lookup_book(self, sku):
+        """Look up one book by SKU (a copy)"""
+        with self.store.locked():
+            book = self.store.get_book(sku)
+            if book is None:
+                raise APIError(404, f"SKU '{sku}' not found")
+            return book.copy()
+
+    def list_booklists(self):
+        """Every booklist with its current set price"""
+        booklists = []
+        with self.store.locked():
+            for code, booklist in self.store.booklists.items():
+                books, missing, total = self.store.bundle(code)
+                booklists.append(dict(booklist, skus=list(booklist['skus']), total_books=len(books),
+                                      total_amount=total, missing=missing))
+        return {'booklists': booklists}
+
+    # ============ CARTS ============
+
+    def create_cart(self, contract=None):
+        """Start a new empty cart, optionally at a school's contract prices"""
+        if contract is not None and contract not in self.store.pricing.contracts:
+            raise APIError(404, f"Contract '{contract}' not found")
+
+        cart_id = uuid.uuid4().hex[:12]
+        self.carts[cart_id] = []
+        self.cart_contracts[cart_id] = contract
+        return self.cart_summary(cart_id)
+
+    def get_cart(self, cart_id):
+        """Return the items of a cart"""
+        if cart_id not in self.carts:
+            raise APIError(404, f"Cart '{cart_id}' not found")
+        return self.carts[cart_id]
+
+    def cart_summary(self, cart_id):
+        """Cart contents with its running total"""
+        cart = self.get_cart(cart_id)
+        _, summary = self.store.pricing.price_cart(cart, self.cart_contracts.get(cart_id))
+        return {
+            'cart_id': cart_id,
+            'contract': self.cart_contracts.get(cart_id),
+            'items': cart,
+            'total_books': len(cart),
+            'subtotal': float(summary['subtotal']),
+            'discount': float(summary['discount']),
+            'tax': float(summary['tax']),
+            'total_amount': float(summary['total'])
+        }
+
+    def add_items(self, cart_id, data):
+        """Add one or more copies of a book to a cart"""
+        cart = self.get_cart(cart_id)
+        book = self.lookup_book(data.get('sku', ''))
+
+        qty = data.get('qty', 1)
+        if not isinstance(qty, int) or isinstance(qty, bool) or not 1 <= qty <= MAX_QTY:
+            raise APIError(400, f'qty must be a whole number from 1 to {MAX_QTY}')
+
+        for _ in range(qty):
+            cart.append(book.copy())
+        return self.cart_summary(cart_id)
+
+    def add_booklist(self, cart_id, data):
+        """Add every book of a booklist to a cart"""
+        cart = self.get_cart(cart_id)
+        with self.store.locked():
+            bundle = self.store.bundle(data.get('code', ''))
+            if bundle is None:
+                raise APIError(404, f"Booklist '{data.get('code', '')}' not found")
+
+            books, missing, _ = bundle
+            cart.extend(book.copy() for book in books)
+        summary = self.cart_summary(cart_id)
+        summary['missing'] = missing
+        return summary
+
+    def remove_item(self, cart_id, index):
+        """Remove a cart line by position"""
+        cart = self.get_cart(cart_id)
+        try:
+            cart.pop(int(index))
+        except (ValueError, IndexError):
+            raise APIError(404, f"No cart line {index}")
+        return self.cart_summary(cart_id)
+
+    async def checkout(self, cart_id):
+        """Commit the cart as a sale and return the invoice"""
+        cart = self.get_cart(cart_id)
+        if not cart:
+            raise APIError(400, 'Cart is empty')
+
+        # Take the cart out first so a second checkout cannot commit it twice
+        del self.carts[cart_id]
+        contract = self.cart_contracts.pop(cart_id, None)
+
+        # Writing the Excel file blocks, so keep it off the event loop
+        try:
+            invoice = await asyncio.get_running_loop().run_in_executor(
+                None, self.store.checkout, cart, None, contract
+            )
+        except Exception:
+            self.carts[cart_id] = cart
+            self.cart_contracts[cart_id] = contract
+            raise
+
+        return invoice
+
+    # ============ SERVER LIFECYCLE ============
+
+    async def start(self):
+        """Start listening on the configured host and port"""
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+
+        # Report the real port when bound to port 0
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start and serve until cancelled"""
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def start_in_thread(self, timeout=10):
+        """Run the service on a background thread (used by the desktop app)
+
+        Errors while starting (such as the port being in use) are raised
+        here in the caller.
+        """
+        ready = threading.Event()
+        failure = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:
+                failure.append(e)
+                self.loop = None
+                loop.close()
+                return
+            finally:
+                ready.set()
+            loop.run_forever()
+
+            # Drop connections still open on shutdown
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise OSError(f"Tablet service did not start within {timeout} seconds")
+        if failure:
+            raise failure[0]
+
+    def stop(self):
+        """Stop a service started with start_in_thread"""
+        if self.loop is None:
+            return
+
+        def shutdown():
+            self.server.close()
+            self.loop.stop()
+
+        self.loop.call_soon_threadsafe(shutdown)
+        self._thread.join()
+        self.loop = None
+
+
+# ============ MAIN ENTRY POINT ============
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Book shop tablet service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--token', help="Shared token (required unless --host is local)")
+    parser.add_argument('--data-dir', default='.')
+    args = parser.parse_args()
+
+    store = BookShopStore(args.data_dir)
+    store.load_inventory()
+
+    try:
+        api = BookShopAPI(store, args.host, args.port, args.token)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Serving on http://{api.host}:{api.port}")
+    try:
+        asyncio.run(api.serve_forever())
+    except KeyboardInterrupt:
+        pass
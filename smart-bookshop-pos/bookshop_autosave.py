@@ -0,0 +1,140 @@
+"""
+Smart Book Shop Management & Billing System
+Crash-safe autosave of the cart being built on the New Sale screen
+Snapshots are written on a background thread, a moment after the cart
+stops changing, and replace the previous file atomically
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from bookshop_store import Book, json_default
+
+# Marks a pending request to delete the snapshot instead of writing one
+CLEARED = object()
+
+
+def resolve_items(items, get_book):
+    """Match saved cart lines to the current inventory
+
+    Returns (books, missing, repriced): the current copy of every book
+    still in stock, the titles of the ones that were deleted, and the
+    titles whose price changed since the cart was saved.
+    """
+    books, missing, repriced = [], [], []
+    for item in items:
+        book = get_book(item['sku'])
+        if book is None:
+            missing.append(item['title'])
+            continue
+        if book['price'] != item['price']:
+            repriced.append(book['title'])
+        books.append(book)
+    return books, missing, repriced
+
+
+class CartAutosave:
+    """Debounced writer of the in-progress cart to a small local file
+
+    snapshot() only hands the cart over to the writer thread, so adding
+    or removing items never waits on the disk.
+    """
+
+    # Write once the cart has been quiet this long...
+    DELAY = 0.5
+    # ...but never hold back a change for longer than this
+    MAX_DELAY = 3.0
+
+    def __init__(self, app_dir):
+        self.file = os.path.join(app_dir, 'cart_autosave.json')
+        self._cond = threading.Condition()
+        self._pending = None
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._closing = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """The saved cart as {'saved_at', 'contract', 'items'}, or None"""
+        if not os.path.exists(self.file):
+            return None
+        try:
+            with open(self.file, 'r') as f:
+                data = json.load(f)
+            data['saved_at'] = datetime.fromisoformat(data['saved_at'])
+            data['items'] = [Book.from_dict(item) for item in data['items']]
+        except (ValueError, KeyError, TypeError):
+            return None  # A damaged snapshot is not worth an error dialog
+        return data if data['items'] else None
+
+    def snapshot(self, cart, contract=None):
+        """Queue the current cart to be saved (returns immediately)"""
+        state = {'contract': contract, 'items': list(cart)} if cart else CLEARED
+        self._queue(state)
+
+    def clear(self):
+        """Forget the saved cart (after checkout or when it is discarded)"""
+        self._queue(CLEARED)
+
+    def close(self):
+        """Write anything still pending and stop the writer thread"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _queue(self, state):
+        now = time.monotonic()
+        with self._cond:
+            if self._pending is None:
+                self._first_change = now
+            self._pending = state
+            self._last_change = now
+            self._cond.notify()
+
+    def _run(self):
+        """Writer thread: wait for a quiet moment, then save the latest cart"""
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+
+                # Debounce: a burst of scans becomes a single write
+                while not self._closing:
+                    now = time.monotonic()
+                    due = min(self._last_change + self.DELAY, self._first_change + self.MAX_DELAY)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+
+                state, self._pending = self._pending, None
+
+            try:
+                self._write(state)
+            except OSError:
+                pass  # Autosave is best effort; the sale itself is unaffected
+
+    def _write(self, state):
+        """Replace the snapshot file atomically (or delete it)"""
+        if state is CLEARED:
+            if os.path.exists(self.file):
+                os.remove(self.file)
+            return
+
+        temp_file = self.file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({
+                'saved_at': datetime.now().isoformat(timespec='seconds'),
+                'contract': state['contract'],
+                'items': state['items']
+            }, f, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.file)
@@ -0,0 +1,370 @@
+"""
+Smart Book Shop Management & Billing System
+Command-line tools for batch jobs (no window needed)
+Never imports customtkinter; Excel/pandas are only loaded by the
+commands that need them
+
+Usage:
+    python bookshop_cli.py inventory export books.csv
+    python bookshop_cli.py inventory import new_books.csv
+    python bookshop_cli.py report 01-02-2026 28-02-2026 [--excel Feb.xlsx]
+    python bookshop_cli.py export-csv 01-04-2025 31-03-2026 sales_2025-26.csv
+    python bookshop_cli.py history MATH-10-001 [--start 01-04-2025] [--end 31-03-2026]
+    python bookshop_cli.py price-history MATH-10-001 [--at 15-09-2025]
+    python bookshop_cli.py compact
+    python bookshop_cli.py reindex
+    python bookshop_cli.py check [--full]
+
+Add --data-dir <folder> (before the command) to work on another shop folder.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from bookshop_store import BookShopStore, json_default, validate_book
+
+INVENTORY_FIELDS = ['title', 'sku', 'category', 'price']
+
+# Longest list of orphaned SKUs printed by 'check'
+MAX_LISTED = 20
+
+
+def parse_day(text):
+    """DD-MM-YYYY argument as a date"""
+    try:
+        return datetime.strptime(text, "%d-%m-%Y").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a DD-MM-YYYY date")
+
+
+def complete_records(store):
+    """The binary sales records, once a first-time build from Excel has finished"""
+    records = store.sales_records
+    store.records_ready.wait()
+    return records
+
+
+# ============ INVENTORY ============
+
+def inventory_export(store, args):
+    """Write the inventory to a .json or .csv file"""
+    if args.file.lower().endswith('.csv'):
+        with open(args.file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=INVENTORY_FIELDS)
+            writer.writeheader()
+            writer.writerows(book.to_dict() for book in store.books)
+    else:
+        with open(args.file, 'w', encoding='utf-8') as f:
+            json.dump(store.books, f, indent=4, default=json_default)
+
+    print(f"Exported {len(store.books)} book(s) to {args.file}")
+    return 0
+
+
+def inventory_import(store, args):
+    """Add or update books from a .json or .csv file"""
+    if args.file.lower().endswith('.csv'):
+        with open(args.file, 'r', newline='', encoding='utf-8-sig') as f:
+            rows = [{key.strip().lower(): value for key, value in row.items() if key}
+                    for row in csv.DictReader(f)]
+    else:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+
+    added = updated = 0
+    errors = []
+    imported = []
+    for number, row in enumerate(rows, 1):
+        book, error = validate_book(row)
+        if error:
+            errors.append(f"  row {number}: {error}")
+            continue
+
+        if store.get_book(book['sku']) is None:
+            added += 1
+        else:
+            updated += 1
+
+        # One save and one journal write at the end instead of one per book
+        book = store.put_book(book)
+        imported.append({'sku': book['sku'], 'book': dict(book)})
+
+    if added or updated:
+        store.save_inventory()
+        store.journal.record_many('book_upsert', imported)
+
+    print(f"Added {added} book(s), updated {updated} book(s)")
+    if errors:
+        print(f"Skipped {len(errors)} row(s):")
+        print("\n".join(errors))
+    return 1 if errors else 0
+
+
+# ============ REPORTS ============
+
+def sales_report(store, args):
+    """Print totals for a date range, optionally exporting the lines to Excel"""
+    from bookshop_reports import sales_files_in_range, load_sales_range, export_sales_excel, add_list_prices
+
+    paths = sales_files_in_range(store.sales_dir, args.start, args.end)
+    if not paths:
+        print("No sales records found in that date range.")
+        return 0
+
+    lines, errors = load_sales_range(paths, workers=args.workers)
+    revenue = lines['Unit Price (Rs)'].sum()
+    sales = len(lines[['Date', 'Sale']].drop_duplicates())
+
+    print(f"Sales {args.start:%d-%m-%Y} to {args.end:%d-%m-%Y}: {len(paths)} day(s)")
+    print(f"  {sales} sale(s), {len(lines)} book(s), Rs {revenue:,.2f}")
+
+    # Compare with the list prices that were in force on the day of each sale
+    lines = add_list_prices(lines, store.price_history)
+    priced = lines['List Price (Rs)'].notna()
+    if priced.any():
+        list_value = lines.loc[priced, 'List Price (Rs)'].sum()
+        charged = lines.loc[priced, 'Unit Price (Rs)'].sum()
+        print(f"  Rs {list_value:,.2f} at the list prices of the time "
+              f"(Rs {list_value - charged:,.2f} in discounts)")
+
+    print("\nBy class:")
+    by_class = lines.groupby('Class', observed=True)['Unit Price (Rs)'].agg(['count', 'sum'])
+    for category, row in by_class.iterrows():
+        print(f"  Class {category:<4}{int(row['count']):>8} book(s)   Rs {row['sum']:>12,.2f}")
+
+    print("\nBy day:")
+    by_day = lines.groupby('Date')['Unit Price (Rs)'].agg(['count', 'sum'])
+    for day, row in by_day.iterrows():
+        print(f"  {day:%d-%m-%Y}{int(row['count']):>8} book(s)   Rs {row['sum']:>12,.2f}")
+
+    for path, message in errors:
+        print(f"Could not read {os.path.basename(path)}: {message}", file=sys.stderr)
+
+    if args.excel:
+        count = export_sales_excel(paths, args.excel)
+        print(f"\nExported {count} sale line(s) to {args.excel}")
+
+    return 1 if errors else 0
+
+
+def sales_csv(store, args):
+    """Stream every sale line of a date range into a flat CSV for accounting"""
+    from bookshop_reports import sales_files_in_range, export_sales_csv
+
+    paths = sales_files_in_range(store.sales_dir, args.start, args.end)
+    if not paths:
+        print("No sales records found in that date range.")
+        return 0
+
+    count = export_sales_csv(paths, args.file, chunk_size=args.chunk_size)
+    print(f"Exported {count} sale line(s) from {len(paths)} day(s) to {args.file}")
+    return 0
+
+
+def sales_history(store, args):
+    """Copies sold of one book (or every book matching title words), per day"""
+    complete_records(store)
+    index = store.sales_index
+    start = datetime.combine(args.start, datetime.min.time()) if args.start else None
+    end = datetime.combine(args.end + timedelta(days=1), datetime.min.time()) if args.end else None
+
+    skus = [args.query] if args.query in index.records.strings.ids else index.find(args.query)
+    if not skus:
+        print(f"No sales found for '{args.query}'")
+        return 0
+
+    for sku in skus:
+        summary = index.sell_through(sku, start, end)
+        book = store.get_book(sku)
+        title = f" ({book['title']})" if book else ""
+        print(f"{sku}{title}: {summary['copies']} copies in {summary['sales']} sale(s), "
+              f"Rs {summary['revenue']:,.2f}")
+        if len(skus) == 1:
+            for day, copies, revenue in summary['days']:
+                print(f"  {day:%d-%m-%Y}{copies:>8} copies   Rs {revenue:>12,.2f}")
+    return 0
+
+
+def price_history(store, args):
+    """Every list price a book has had, or the one in force on a day"""
+    timeline = store.price_history.timeline(args.sku)
+    if not timeline:
+        print(f"No price history for '{args.sku}'")
+        return 1
+
+    if args.at:
+        moment = datetime.combine(args.at, datetime.max.time())
+        price = store.price_history.price_at(args.sku, moment)
+        if price is None:
+            print(f"{args.sku} had no recorded price on {args.at:%d-%m-%Y}")
+        else:
+            print(f"{args.sku} on {args.at:%d-%m-%Y}: Rs {price:,.2f}")
+        return 0
+
+    print(f"{args.sku}:")
+    for when, price in timeline:
+        print(f"  from {when:%d-%m-%Y %I:%M %p}   Rs {price:>10,.2f}")
+    return 0
+
+
+# ============ MAINTENANCE ============
+
+def compact(store, args):
+    """Rewrite the binary sales records in time order and drop their leftover temp files"""
+    records = complete_records(store)
+
+    # Only the record files' own temp files: others may belong to a running app
+    removed = 0
+    for path in (records.path, records.strings.path):
+        if os.path.exists(path + '.tmp'):
+            os.remove(path + '.tmp')
+            removed += 1
+
+    before = os.path.getsize(records.path) + os.path.getsize(records.strings.path)
+    count = records.compact()
+    after = os.path.getsize(records.path) + os.path.getsize(records.strings.path)
+
+    print(f"Compacted {count} sale line(s): {before:,} -> {after:,} bytes")
+    print(f"Removed {removed} leftover temporary file(s)")
+    return 0
+
+
+def reindex(store, args):
+    """Rebuild the derived files kept on disk from the source files
+
+    The search index is not one of them: it lives in memory and every
+    program builds it afresh when it loads the inventory.
+    """
+    from bookshop_quickkeys import QuickKeys
+
+    records = store.sales_records
+    if store.records_ready.is_set():
+        count = store.build_sales_records()
+    else:
+        # Opening them started the first-time build, which does the same job
+        store.records_ready.wait()
+        count = len(records)
+    print(f"Binary sales records: {count} sale line(s)")
+
+    quick_keys = QuickKeys(store.app_dir)
+    quick_keys.rebuild(store.sales_records)
+    print(f"Quick keys: {sum(len(scores) for scores in quick_keys.scores.values())} book(s) ranked")
+
+    return 0
+
+
+def check(store, args):
+    """Look for problems in the inventory, booklists and sales files"""
+    from bookshop_integrity import IntegrityChecker
+
+    checker = IntegrityChecker(store.inventory_file, store.sales_dir, store.app_dir)
+    report = checker.scan(full=args.full, workers=args.workers)
+    problems = [f"{name}: unreadable ({message})" for name, message in report['unreadable']]
+    problems += [f"{name}: {problem}" for name, problem in report['malformed']]
+
+    # Booklists
+    for code, booklist in store.booklists.items():
+        missing = [sku for sku in booklist['skus'] if store.get_book(sku) is None]
+        if missing:
+            problems.append(f"booklist '{code}': unknown SKU(s) {', '.join(missing)}")
+
+    records = len(complete_records(store))
+    if records != report['lines']:
+        problems.append(f"binary sales records hold {records} line(s), Excel files {report['lines']} "
+                        f"(run 'reindex')")
+
+    print(f"Checked {report['files']} file(s) ({report['checked']} changed since the last check), "
+          f"{len(store.booklists)} booklist(s)")
+
+    # Books sold and later removed from the inventory are worth knowing about, not errors
+    if report['orphans']:
+        print(f"{len(report['orphans'])} sold SKU(s) no longer in books.json:")
+        orphans = sorted(report['orphans'].items())
+        for sku, files in orphans[:MAX_LISTED]:
+            more = f" (+{len(files) - 1} more)" if len(files) > 1 else ""
+            print(f"  {sku}: sold in {files[0]}{more}")
+        if len(orphans) > MAX_LISTED:
+            print(f"  ... and {len(orphans) - MAX_LISTED} more")
+
+    if problems:
+        print(f"{len(problems)} problem(s):")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+
+    print("No problems found")
+    return 0
+
+
+# ============ MAIN ENTRY POINT ============
+
+def build_parser():
+    """Argument parser for every subcommand"""
+    parser = argparse.ArgumentParser(description="Book shop batch tools")
+    parser.add_argument('--data-dir', default='.', help="Shop data folder")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    inventory = sub.add_parser('inventory', help="Import or export the inventory")
+    inventory_sub = inventory.add_subparsers(dest='action', required=True)
+    export = inventory_sub.add_parser('export', help="Write books to .json or .csv")
+    export.add_argument('file')
+    export.set_defaults(handler=inventory_export)
+    imported = inventory_sub.add_parser('import', help="Add/update books from .json or .csv")
+    imported.add_argument('file')
+    imported.set_defaults(handler=inventory_import)
+
+    report = sub.add_parser('report', help="Sales totals for a date range")
+    report.add_argument('start', type=parse_day, help="First day (DD-MM-YYYY)")
+    report.add_argument('end', type=parse_day, help="Last day (DD-MM-YYYY)")
+    report.add_argument('--excel', help="Also export every line to this Excel file")
+    report.add_argument('--workers', type=int, help="Processes for loading files")
+    report.set_defaults(handler=sales_report)
+
+    csv_export = sub.add_parser('export-csv', help="Flat CSV of every sale line for accounting")
+    csv_export.add_argument('start', type=parse_day, help="First day (DD-MM-YYYY)")
+    csv_export.add_argument('end', type=parse_day, help="Last day (DD-MM-YYYY)")
+    csv_export.add_argument('file')
+    csv_export.add_argument('--chunk-size', type=int, default=5000, help="Lines written per batch")
+    csv_export.set_defaults(handler=sales_csv)
+
+    history = sub.add_parser('history', help="When and how often a book sold")
+    history.add_argument('query', help="SKU, or words from the title")
+    history.add_argument('--start', type=parse_day, help="First day (DD-MM-YYYY)")
+    history.add_argument('--end', type=parse_day, help="Last day (DD-MM-YYYY)")
+    history.set_defaults(handler=sales_history)
+
+    prices = sub.add_parser('price-history', help="List prices a book has had")
+    prices.add_argument('sku')
+    prices.add_argument('--at', type=parse_day, help="Only the price in force on this day (DD-MM-YYYY)")
+    prices.set_defaults(handler=price_history)
+
+    sub.add_parser('compact', help="Compact the binary sales records").set_defaults(handler=compact)
+    sub.add_parser('reindex', help="Rebuild sales records and quick keys") \
+        .set_defaults(handler=reindex)
+    checked = sub.add_parser('check', help="Check inventory, booklists and sales files")
+    checked.add_argument('--full', action='store_true', help="Re-check files that look unchanged too")
+    checked.add_argument('--workers', type=int, help="Processes for checking files")
+    checked.set_defaults(handler=check)
+
+    return parser
+
+
+def main(argv=None):
+    """Run one command and return its exit code"""
+    args = build_parser().parse_args(argv)
+
+    store = BookShopStore(args.data_dir)
+    store.load_inventory()
+    for error in store.pricing.errors:
+        print(f"Warning: pricing rule skipped: {error}", file=sys.stderr)
+    for position, error, _ in store.invalid_books:
+        print(f"Warning: book {position} in books.json skipped: {error}", file=sys.stderr)
+    return args.handler(store, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
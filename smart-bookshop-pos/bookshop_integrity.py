@@ -0,0 +1,261 @@
+"""
+Smart Book Shop Management & Billing System
+Integrity scan of the inventory (books.json) and the daily sales files
+Files are checksummed and validated in parallel; the checksums are kept
+in a manifest so later scans only re-check files that have changed
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bookshop_store import SALES_COLUMNS, validate_book
+from bookshop_reports import parse_sales_date, parse_amount, parse_line_date
+
+# A badly damaged file can have thousands of bad rows; report the first few
+MAX_ROW_PROBLEMS = 20
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def new_result(digest):
+    """Empty scan result of one file"""
+    return {'digest': digest, 'lines': 0, 'skus': [], 'problems': [], 'unreadable': None}
+
+
+def scan_sales_file(path, known_digest=None):
+    """Checksum and validate one daily sales file (runs in a worker process)
+
+    Returns a scan result, or None when the checksum still matches
+    known_digest and the previous result can be kept.
+    """
+    digest = file_digest(path)
+    if digest == known_digest:
+        return None
+
+    from openpyxl import load_workbook
+
+    result = new_result(digest)
+    problems = result['problems']
+    try:
+        wb = load_workbook(path, read_only=True)
+    except Exception as e:
+        result['unreadable'] = str(e)
+        return result
+
+    file_day = parse_sales_date(path)
+    skus = set()
+    bad_rows = 0
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        missing = [column for column in SALES_COLUMNS[:7] if column not in header]
+        if missing:
+            problems.append(f"missing column(s) {', '.join(missing)}")
+            return result
+        date_at, title_at, sku_at, price_at = (header.index(column) for column in (
+            'Date', 'Book Title', 'SKU / Serial Number', 'Unit Price (Rs)'))
+
+        for number, row in enumerate(rows, 2):
+            row = list(row) + [None] * (len(header) - len(row))
+            if row[0] == '---' or all(cell in (None, '') for cell in row):
+                continue
+            result['lines'] += 1
+
+            errors = []
+            sku = str(row[sku_at] or '').strip()
+            if sku:
+                skus.add(sku)
+            else:
+                errors.append("no SKU")
+            if not str(row[title_at] or '').strip():
+                errors.append("no title")
+            price = parse_amount(row[price_at])
+            if price is None or price < 0:
+                errors.append(f"invalid price '{row[price_at]}'")
+            # Every saved line carries its date, but legacy or hand-edited rows may
+            # have none (the '---' separators were skipped above); a date that is
+            # there must be the file's day
+            if row[date_at] not in (None, '') and parse_line_date(row[date_at]) != file_day:
+                errors.append(f"date '{row[date_at]}' does not match the file name")
+
+            if errors:
+                bad_rows += 1
+                if bad_rows <= MAX_ROW_PROBLEMS:
+                    problems.append(f"row {number}: {', '.join(errors)}")
+    except Exception as e:
+        result['unreadable'] = str(e)
+    finally:
+        wb.close()
+
+    if bad_rows > MAX_ROW_PROBLEMS:
+        problems.append(f"... and {bad_rows - MAX_ROW_PROBLEMS} more malformed row(s)")
+    result['skus'] = sorted(skus)
+    return result
+
+
+def scan_inventory_file(path, known_digest=None):
+    """Checksum and validate books.json; same results as scan_sales_file"""
+    digest = file_digest(path)
+    if digest == known_digest:
+        return None
+
+    result = new_result(digest)
+    try:
+        with open(path, 'r') as f:
+            books = json.load(f)
+        if not isinstance(books, list):
+            raise ValueError("expected a list of books")
+    except (OSError, ValueError) as e:
+        result['unreadable'] = str(e)
+        return result
+
+    skus = set()
+    for number, book in enumerate(books, 1):
+        if not isinstance(book, dict):
+            result['problems'].append(f"book {number}: not a book record")
+            continue
+        _, error = validate_book(book)
+        sku = str(book.get('sku', '') or '').strip()
+        if error:
+            result['problems'].append(f"book {number} ({sku or 'no SKU'}): {error}")
+        if sku in skus:
+            result['problems'].append(f"duplicate SKU '{sku}'")
+        if sku:
+            skus.add(sku)
+
+    result['lines'] = len(books)
+    result['skus'] = sorted(skus)
+    return result
+
+
+class IntegrityChecker:
+    """Scans a shop folder and remembers what it has already verified
+
+    The manifest maps each file to its size, modification time, checksum
+    and scan result. A file whose size and time are unchanged is not read
+    at all; one whose checksum is unchanged is not parsed again.
+    """
+
+    def __init__(self, inventory_file, sales_dir, app_dir):
+        self.inventory_file = inventory_file
+        self.sales_dir = sales_dir
+        self.manifest_file = os.path.join(app_dir, 'integrity_manifest.json')
+        self.manifest = {}
+
+        if os.path.exists(self.manifest_file):
+            try:
+                with open(self.manifest_file, 'r') as f:
+                    self.manifest = json.load(f)
+            except ValueError:
+                self.manifest = {}  # A damaged manifest only means a full scan
+
+    def save_manifest(self):
+        """Save the manifest atomically"""
+        temp_file = self.manifest_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_file, self.manifest_file)
+
+    def files(self):
+        """(manifest key, path, scan function) of every file to check"""
+        found = [('books.json', self.inventory_file, scan_inventory_file)]
+        if os.path.exists(self.sales_dir):
+            for name in sorted(os.listdir(self.sales_dir)):
+                if parse_sales_date(name):
+                    found.append((name, os.path.join(self.sales_dir, name), scan_sales_file))
+        return found
+
+    def scan(self, full=False, workers=None, progress=None):
+        """Check every file that changed since the last scan (all files if full)
+
+        progress(done, total) is called as each re-checked file finishes.
+        Returns a report dict: 'files', 'checked', 'lines', 'unreadable'
+        [(name, message)], 'malformed' [(name, problem)] and 'orphans'
+        {sku: [sales files]} for sold SKUs that are not in books.json.
+        """
+        manifest = {}
+        pending = []
+        for key, path, scan_file in self.files():
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            entry = self.manifest.get(key)
+            if (not full and entry is not None and entry['size'] == stat.st_size
+                    and entry['mtime_ns'] == stat.st_mtime_ns):
+                manifest[key] = entry
+            else:
+                pending.append((key, path, scan_file, stat, entry))
+
+        def collect(item, scan):
+            key, path, _, stat, entry = item
+            try:
+                result = scan()
+            except OSError as e:
+                result = new_result(None)
+                result['unreadable'] = str(e)
+            if result is None:
+                result = entry   # Touched but identical
+            result.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            manifest[key] = result
+
+        def known(entry):
+            return None if full or entry is None else entry['digest']
+
+        if len(pending) <= 1 or workers == 1:
+            for done, item in enumerate(pending, 1):
+                collect(item, lambda: item[2](item[1], known(item[4])))
+                if progress:
+                    progress(done, len(pending))
+        else:
+            # 'spawn' is safe from a GUI with running threads (and is the Windows default)
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {pool.submit(item[2], item[1], known(item[4])): item for item in pending}
+                for done, future in enumerate(as_completed(futures), 1):
+                    collect(futures[future], future.result)
+                    if progress:
+                        progress(done, len(pending))
+
+        self.manifest = manifest
+        self.save_manifest()
+        return self.report(len(pending))
+
+    def report(self, checked=0):
+        """Summarize the manifest (see scan)"""
+        report = {
+            'files': len(self.manifest),
+            'checked': checked,
+            'lines': 0,
+            'unreadable': [],
+            'malformed': [],
+            'orphans': {}
+        }
+
+        inventory = self.manifest.get('books.json')
+        known_skus = set(inventory['skus']) if inventory and not inventory['unreadable'] else None
+
+        for key, entry in sorted(self.manifest.items()):
+            if entry['unreadable']:
+                report['unreadable'].append((key, entry['unreadable']))
+            for problem in entry['problems']:
+                report['malformed'].append((key, problem))
+            if key == 'books.json':
+                continue
+
+            report['lines'] += entry['lines']
+            if known_skus is not None:
+                for sku in entry['skus']:
+                    if sku not in known_skus:
+                        report['orphans'].setdefault(sku, []).append(key)
+
+        return report
@@ -0,0 +1,282 @@
+"""
+Smart Book Shop Management & Billing System
+Sales replay and load generator
+Drives the cart and checkout path headlessly and reports latency per operation
+
+Usage:
+    python bookshop_loadgen.py replay 13-02-2026 14-02-2026 [--speed 60]
+    python bookshop_loadgen.py replay --journal [--speed 0]
+    python bookshop_loadgen.py synthetic --rate 2 --duration 60 [--items 3]
+    python bookshop_loadgen.py --contract "Green Hills" synthetic --rate 2 --duration 60
+
+Sales are written to a scratch copy of the data folder (or --target),
+never to the shop's real Sales_Records.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from bookshop_store import BookShopStore, json_default, validate_book
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_price(value):
+    """Convert 'Rs 450.00' (or a number) to float"""
+    return float(str(value).replace('Rs', '').strip())
+
+
+# ============ TRAFFIC SOURCES ============
+
+def sales_from_excel(filepath):
+    """Read a daily sales file into a list of (datetime, items) sales"""
+    import pandas as pd
+
+    df = pd.read_excel(filepath, dtype=str).fillna('')
+    sales = []
+    items = []
+    when = None
+
+    for _, row in df.iterrows():
+        if row['Date'] == '---':
+            if items:
+                sales.append((when, items))
+            items = []
+            continue
+
+        if not items:
+            when = datetime.strptime(f"{row['Date']} {row['Time']}", "%d-%m-%Y %I:%M %p")
+
+        items.append({
+            'title': row['Book Title'],
+            'sku': row['SKU / Serial Number'],
+            'category': row['Class/Category'].replace('Class', '').strip(),
+            'price': parse_price(row['Unit Price (Rs)'])
+        })
+
+    if items:
+        sales.append((when, items))
+    return sales
+
+
+def sales_from_journal(journal_file):
+    """Read every sale recorded in a branch journal (without opening it for writing)"""
+    sales = []
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                op = json.loads(line)
+            except ValueError:
+                continue  # Torn or damaged line
+            if op['type'] == 'sale':
+                sales.append((datetime.fromisoformat(op['timestamp']), op['items']))
+    return sales
+
+
+def load_books(inventory_file):
+    """Read books.json without opening a store (which would write to the folder)"""
+    with open(inventory_file, 'r') as f:
+        rows = json.load(f)
+    books = []
+    for row in rows:
+        book, error = validate_book(row)
+        if error is None:
+            books.append(book)
+    return books
+
+
+def replay_schedule(sales, speed):
+    """Turn historical sales into (offset seconds, items) at a speed-up factor"""
+    if not sales:
+        return []
+    sales = sorted(sales, key=lambda sale: sale[0])
+    start = sales[0][0]
+    return [
+        ((when - start).total_seconds() / speed if speed else 0.0, items)
+        for when, items in sales
+    ]
+
+
+def synthetic_schedule(books, rate, duration, mean_items, seed=None):
+    """Poisson arrivals at `rate` sales/second with random carts"""
+    rng = random.Random(seed)
+    schedule = []
+    offset = rng.expovariate(rate)
+
+    while offset < duration:
+        # At least one book per sale, geometric-ish spread around the mean
+        count = 1 + int(rng.expovariate(1 / max(mean_items - 1, 0.001)))
+        schedule.append((offset, [rng.choice(books) for _ in range(count)]))
+        offset += rng.expovariate(rate)
+
+    return schedule
+
+
+# ============ LOAD RUNNER ============
+
+class LoadRunner:
+    """Plays a schedule of sales through the cart and checkout path
+
+    Latency is counted from when an operation was due to start, not from
+    when it did: a sale that starts late because the one before it was
+    slow is charged for the wait, as a customer at the counter would be.
+    Timing from the actual start would hide exactly the stalls a load
+    test is looking for (coordinated omission).
+    """
+
+    def __init__(self, store, contract=None):
+        self.store = store
+        self.contract = contract
+        self.timings = {'lookup': [], 'add_to_cart': [], 'checkout': [], 'sale': []}
+
+    def timed(self, operation, due, func, *args):
+        """Run func, record its latency from `due` and return (result, end time)"""
+        result = func(*args)
+        end = time.perf_counter()
+        self.timings[operation].append(end - due)
+        return result, end
+
+    def run_sale(self, items, due=None):
+        """Build and price a cart line by line, as the till does, and check it out
+
+        Each operation is due as soon as the one before it finishes; the
+        first is due at the sale's scheduled time.
+        """
+        if due is None:
+            due = time.perf_counter()
+        scheduled = due
+
+        cart = []
+        pricer = self.store.pricing.cart(self.contract)
+
+        def add_line(book):
+            line = book.copy()
+            cart.append(line)
+            pricer.add(line)
+
+        for item in items:
+            book, due = self.timed('lookup', due, self.store.get_book, item['sku'])
+            _, due = self.timed('add_to_cart', due, add_line, book or item)
+        _, end = self.timed('checkout', due, self.store.checkout, cart, None, self.contract)
+        self.timings['sale'].append(end - scheduled)
+
+    def run(self, schedule):
+        """Play the schedule in real time (open loop) and return elapsed seconds"""
+        start = time.perf_counter()
+        for offset, items in schedule:
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.run_sale(items, due)
+        return time.perf_counter() - start
+
+    def report(self, elapsed, sales):
+        """Format throughput and latency percentiles"""
+        lines = [
+            f"{'Operation':<14}{'Count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        ]
+        for operation, values in self.timings.items():
+            values = sorted(values)
+            lines.append(
+                f"{operation:<14}{len(values):>8}"
+                f"{percentile(values, 50) * 1000:>10.2f}"
+                f"{percentile(values, 95) * 1000:>10.2f}"
+                f"{percentile(values, 99) * 1000:>10.2f}"
+                f"{(values[-1] if values else 0) * 1000:>10.2f}"
+            )
+
+        line_count = len(self.timings['add_to_cart'])
+        elapsed = max(elapsed, 1e-9)
+        lines.append("")
+        lines.append(
+            f"{sales} sale(s), {line_count} line(s) in {elapsed:.2f}s: "
+            f"{sales / elapsed:.2f} sales/s, {line_count / elapsed:.2f} lines/s"
+        )
+        return "\n".join(lines)
+
+
+# ============ MAIN ENTRY POINT ============
+
+def main(argv=None):
+    """Parse arguments, build a schedule and run it"""
+    parser = argparse.ArgumentParser(description="Replay or generate checkout traffic")
+    parser.add_argument('--data-dir', default='.', help="Shop data folder to read from")
+    parser.add_argument('--target', help="Folder to write test sales to (default: temporary)")
+    parser.add_argument('--contract', help="Price every sale under this school contract")
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    replay = sub.add_parser('replay', help="Replay historical sales days")
+    replay.add_argument('dates', nargs='*', help="Days to replay (DD-MM-YYYY)")
+    replay.add_argument('--journal', action='store_true', help="Replay sales from the sync journal")
+    replay.add_argument('--speed', type=float, default=60.0,
+                        help="Time compression factor, 0 = as fast as possible")
+
+    synthetic = sub.add_parser('synthetic', help="Generate Poisson-arrival checkout traffic")
+    synthetic.add_argument('--rate', type=float, default=1.0, help="Mean sales per second")
+    synthetic.add_argument('--duration', type=float, default=60.0, help="Seconds of traffic")
+    synthetic.add_argument('--items', type=float, default=3.0, help="Mean books per sale")
+    synthetic.add_argument('--seed', type=int)
+
+    args = parser.parse_args(argv)
+
+    # The real data folder is only read: a store would create journal and history files in it
+    books = load_books(os.path.join(args.data_dir, 'Inventory', 'books.json'))
+
+    if args.mode == 'replay':
+        if args.journal:
+            sales = sales_from_journal(os.path.join(args.data_dir, 'Application_Files', 'journal.jsonl'))
+        else:
+            sales = []
+            for date in args.dates:
+                sales.extend(sales_from_excel(os.path.join(args.data_dir, 'Sales_Records', f"{date}.xlsx")))
+        schedule = replay_schedule(sales, args.speed)
+    else:
+        if not books:
+            parser.error("synthetic traffic needs books in the inventory")
+        schedule = synthetic_schedule(books, args.rate, args.duration, args.items, args.seed)
+
+    # Write into a scratch copy so real sales records are untouched
+    scratch = None
+    target = args.target
+    if target is None:
+        scratch = tempfile.mkdtemp(prefix='bookshop_load_')
+        target = scratch
+
+    try:
+        store = BookShopStore(target)
+        with open(store.inventory_file, 'w') as f:
+            json.dump(books, f, default=json_default)
+        store.load_inventory()
+
+        # Sales are priced by the shop's own rules, as the till prices them
+        pricing_file = os.path.join(args.data_dir, 'Inventory', 'pricing_rules.json')
+        if os.path.exists(pricing_file):
+            shutil.copyfile(pricing_file, store.pricing_file)
+            store.load_pricing()
+        if args.contract is not None and args.contract not in store.pricing.contracts:
+            parser.error(f"no contract named {args.contract!r} in the pricing rules")
+
+        runner = LoadRunner(store, args.contract)
+        elapsed = runner.run(schedule)
+        print(runner.report(elapsed, len(schedule)))
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Smart Book Shop Management & Billing System
+Price history: every list price a book has had, with the time it took effect
+Kept as an append-only log next to books.json, so last term's prices are
+never lost when a book is edited
+
+Inventory/price_history.jsonl holds one change per line, for example:
+    {"sku": "MATH-10-001", "price": 450.0, "from": "2026-02-13T10:00:00"}
+    {"sku": "MATH-10-002", "renamed_from": "MATH-10-001", "from": "2026-03-01T09:30:00"}
+Prices from before the history started are unknown, not guessed. A renamed
+book keeps its history under the old SKU too, so old invoices still match.
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+
+class PriceHistory:
+    """Effective-from list prices per SKU, searchable by time
+
+    Each SKU keeps its change times in sorted order alongside the prices,
+    so the price in force at any moment is one binary search away.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.changes = {}   # sku -> ([effective-from times], [prices])
+        self.is_new = not os.path.exists(path)
+
+        if not self.is_new:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A torn last line from a crash mid-write
+                    self._apply(entry)
+
+    def _apply(self, entry):
+        """Fold one log entry into the in-memory index"""
+        when = datetime.fromisoformat(entry['from'])
+        if 'renamed_from' in entry:
+            # Copy, not move: invoices under the old SKU still need its prices
+            old_times, old_prices = self.changes.get(entry['renamed_from'], ((), ()))
+            for changed, price in zip(old_times, old_prices):
+                self._insert(entry['sku'], changed, price)
+            return
+        self._insert(entry['sku'], when, entry['price'])
+
+    def _insert(self, sku, when, price):
+        """Add one price change in time order"""
+        times, prices = self.changes.setdefault(sku, ([], []))
+        # Changes synced from another branch can arrive out of order
+        position = bisect_right(times, when)
+        times.insert(position, when)
+        prices.insert(position, price)
+
+    def _append(self, entries):
+        """Write entries to the log, then apply them"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        for entry in entries:
+            self._apply(entry)
+
+    def seed(self, books, when=None):
+        """Start the history with the current price of every book"""
+        when = (when or datetime.now()).replace(microsecond=0).isoformat()
+        prices = {book['sku']: float(book['price']) for book in books}
+        with self._lock:
+            self._append([
+                {'sku': sku, 'price': price, 'from': when}
+                for sku, price in prices.items() if sku not in self.changes
+            ])
+            self.is_new = False
+
+    def record(self, sku, price, when=None):
+        """Log a new list price if it differs from the one in force now"""
+        when = (when or datetime.now()).replace(microsecond=0)
+        price = float(price)
+        with self._lock:
+            if self._price_at(sku, when) == price:
+                return False
+            self._append([{'sku': sku, 'price': price, 'from': when.isoformat()}])
+        return True
+
+    def rename(self, old_sku, new_sku, when=None):
+        """Copy a book's history to its new SKU (the old SKU keeps it as well)"""
+        when = (when or datetime.now()).replace(microsecond=0)
+        with self._lock:
+            if old_sku in self.changes and new_sku != old_sku:
+                self._append([{'sku': new_sku, 'renamed_from': old_sku, 'from': when.isoformat()}])
+
+    # ============ LOOKUPS ============
+
+    def _price_at(self, sku, when):
+        """price_at without the lock"""
+        times, prices = self.changes.get(sku, ((), ()))
+        position = bisect_right(times, when)
+        return prices[position - 1] if position else None
+
+    def price_at(self, sku, when):
+        """List price of a SKU at a moment, or None if it had none yet"""
+        with self._lock:
+            return self._price_at(sku, when)
+
+    def timeline(self, sku):
+        """Every (effective from, price) of a SKU, oldest first"""
+        with self._lock:
+            times, prices = self.changes.get(sku, ((), ()))
+            return list(zip(times, prices))
+
+    def prices_at(self, skus, stamps):
+        """List prices in force for many sale lines at once (NaN where unknown)
+
+        skus and stamps are equal-length sequences; lines are grouped by SKU
+        and each group is looked up with one vectorized binary search.
+        """
+        import numpy as np
+
+        skus = np.asarray(skus, dtype=object)
+        stamps = np.asarray(stamps, dtype='M8[s]')
+        result = np.full(len(skus), np.nan)
+        if not len(skus):
+            return result
+
+        keys, inverse = np.unique(skus.astype(str), return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+
+        with self._lock:
+            for k, sku in enumerate(keys.tolist()):
+                times, prices = self.changes.get(sku, ((), ()))
+                if not times:
+                    continue
+                rows = order[bounds[k]:bounds[k + 1]]
+                positions = np.searchsorted(np.array(times, dtype='M8[s]'), stamps[rows], side='right') - 1
+                known = (positions >= 0) & ~np.isnat(stamps[rows])
+                result[rows[known]] = np.array(prices)[positions[known]]
+        return result
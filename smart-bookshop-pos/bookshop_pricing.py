@@ -0,0 +1,263 @@
+"""
+Smart Book Shop Management & Billing System
+Pricing rules: class discounts, school contracts, set offers and taxes
+All money is Decimal, rounded to paisa, so the total on screen and the
+total saved with the sale are always the same number
+
+Rules live in Inventory/pricing_rules.json as a list, for example:
+    {"type": "class_discount", "category": "12", "percent": 5}
+    {"type": "contract", "name": "Green Hills School", "percent": 10,
+     "prices": {"MATH-10-001": 400}}
+    {"type": "set_offer", "name": "Class 10 Set", "percent": 7,
+     "skus": ["MATH-10-001", "PHY-10-001", "CHEM-10-001"]}
+    {"type": "tax", "category": "All", "percent": 0}
+
+Order of application: a contract price (or the class discount for walk-in
+customers) gives each line's net price, the class tax is added per line,
+then each complete set in the cart takes its offer off those lines.
+
+A rule that cannot be used is skipped and described in `errors`; the
+other rules still apply.
+"""
+
+import json
+import os
+from collections import Counter
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+MONEY = Decimal('0.01')
+ZERO = Decimal('0.00')
+HUNDRED = Decimal('100')
+
+
+def money(value):
+    """Round a price or amount to paisa"""
+    return Decimal(str(value)).quantize(MONEY, rounding=ROUND_HALF_UP)
+
+
+def rate(percent):
+    """Percent (0 to 100) as a Decimal fraction"""
+    percent = Decimal(str(percent))
+    if not 0 <= percent <= HUNDRED:
+        raise ValueError(f"percent must be between 0 and 100, not {percent}")
+    return percent / HUNDRED
+
+
+class PricingEngine:
+    """Active pricing rules compiled into lookup tables"""
+
+    RULE_TYPES = ('class_discount', 'contract', 'set_offer', 'tax')
+
+    def __init__(self, rules=(), errors=()):
+        self.rules = list(rules)
+        self.errors = list(errors)
+        self.compile()
+
+    @classmethod
+    def load(cls, path):
+        """Load rules from a JSON file (no file means no rules)"""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                rules = json.load(f)
+            if not isinstance(rules, list):
+                raise ValueError("expected a list of rules")
+        except ValueError as e:
+            return cls(errors=[f"{os.path.basename(path)}: {e}"])
+        return cls(rules)
+
+    def compile(self):
+        """Turn the rule list into per-class, per-contract and per-SKU tables"""
+        self.class_discount = {}   # category -> fraction off list price
+        self.class_tax = {}        # category -> tax fraction ('All' = default)
+        self.contracts = {}        # name -> (fraction off, {sku: fixed price})
+        self.offers = []           # (name, {sku: copies per set}, fraction off)
+        self.offers_by_sku = {}    # sku -> offer index
+
+        for number, rule in enumerate(self.rules, 1):
+            try:
+                self.compile_rule(rule)
+            except (AttributeError, KeyError, TypeError, ValueError, InvalidOperation) as e:
+                message = f"missing '{e.args[0]}'" if isinstance(e, KeyError) else str(e) or type(e).__name__
+                self.errors.append(f"Rule {number} ({rule.get('type') if isinstance(rule, dict) else rule}): {message}")
+
+    def compile_rule(self, rule):
+        """Add one rule to the tables (nothing is added if it is invalid)"""
+        kind = rule.get('type')
+        if kind == 'class_discount':
+            self.class_discount[str(rule['category'])] = rate(rule['percent'])
+        elif kind == 'tax':
+            self.class_tax[str(rule.get('category', 'All'))] = rate(rule['percent'])
+        elif kind == 'contract':
+            prices = {sku: money(price) for sku, price in rule.get('prices', {}).items()}
+            self.contracts[rule['name']] = (rate(rule.get('percent', 0)), prices)
+        elif kind == 'set_offer':
+            needed = Counter(rule['skus'])
+            fraction = rate(rule['percent'])
+            for sku in needed:
+                # A line can only belong to one offer, or it would be discounted twice
+                if sku in self.offers_by_sku:
+                    raise ValueError(f"SKU '{sku}' is in more than one set offer")
+            for sku in needed:
+                self.offers_by_sku[sku] = len(self.offers)
+            self.offers.append((rule['name'], dict(needed), fraction))
+        else:
+            raise ValueError(f"Unknown pricing rule type: {kind}")
+
+    def line_price(self, book, contract=None):
+        """(list price, net price, tax) of one copy of a book"""
+        list_price = money(book['price'])
+        category = str(book['category'])
+
+        if contract is not None and contract in self.contracts:
+            fraction, prices = self.contracts[contract]
+            net = prices.get(book['sku'])
+            if net is None:
+                net = money(list_price * (1 - fraction))
+        else:
+            net = money(list_price * (1 - self.class_discount.get(category, ZERO)))
+
+        tax_rate = self.class_tax.get(category, self.class_tax.get('All', ZERO))
+        return list_price, net, money(net * tax_rate)
+
+    def cart(self, contract=None):
+        """Start an incrementally priced cart"""
+        return PricedCart(self, contract)
+
+    def price_cart(self, cart, contract=None):
+        """Price a whole cart in one go; returns PricedCart.finalize()"""
+        priced = PricedCart(self, contract)
+        for book in cart:
+            priced.add(book)
+        return priced.finalize()
+
+
+class PricedCart:
+    """Running totals of a cart, updated line by line
+
+    Adding or removing a line touches only that line and (if the SKU is in
+    a set offer) that one offer, so totals stay instant on large orders.
+    Sets are made of each SKU's copies in cart order, priced at what each
+    copy was added for, the same lines finalize() spreads the discount over.
+    """
+
+    def __init__(self, engine, contract=None):
+        self.engine = engine
+        self.contract = contract
+        self.lines = []        # (book, list price, net price, tax)
+        self.counts = Counter()
+        self.unit = {}         # sku -> net + tax of each copy, in cart order
+        self.offer_discounts = [ZERO] * len(engine.offers)
+        self.set_discounts = [[] for _ in engine.offers]   # per offer: discount of each complete set
+
+        self.list_total = ZERO
+        self.net_total = ZERO
+        self.tax_total = ZERO
+        self.set_discount = ZERO
+
+    @property
+    def total(self):
+        """Amount payable"""
+        return self.net_total + self.tax_total - self.set_discount
+
+    @property
+    def discount(self):
+        """Everything taken off the list prices"""
+        return self.list_total - self.net_total + self.set_discount
+
+    def add(self, book):
+        """Add one cart line"""
+        list_price, net, tax = self.engine.line_price(book, self.contract)
+        self.lines.append((book, list_price, net, tax))
+        self.list_total += list_price
+        self.net_total += net
+        self.tax_total += tax
+        self.unit.setdefault(book['sku'], []).append(net + tax)
+        self.counts[book['sku']] += 1
+        self._reprice_offer(book['sku'], appended=True)
+
+    def remove(self, index):
+        """Remove the cart line at a position"""
+        sku = self.lines[index][0]['sku']
+        copy = sum(1 for line in self.lines[:index] if line[0]['sku'] == sku)
+        book, list_price, net, tax = self.lines.pop(index)
+        self.list_total -= list_price
+        self.net_total -= net
+        self.tax_total -= tax
+        del self.unit[sku][copy]
+        self.counts[sku] -= 1
+        self._reprice_offer(sku)
+
+    def _reprice_offer(self, sku, appended=False):
+        """Recount complete sets for the offer a SKU belongs to
+
+        A copy added at the end can only complete a new set, so only that
+        set is priced; a removal can move copies between sets, so every
+        set is priced again.
+        """
+        index = self.engine.offers_by_sku.get(sku)
+        if index is None:
+            return
+
+        _, needed, fraction = self.engine.offers[index]
+        sets = min(self.counts[s] // n for s, n in needed.items())
+        priced = self.set_discounts[index]
+        if not appended:
+            priced.clear()
+        del priced[sets:]
+        while len(priced) < sets:
+            k = len(priced)
+            set_amount = sum(sum(self.unit[s][k * n:(k + 1) * n]) for s, n in needed.items())
+            priced.append(money(set_amount * fraction))
+        discount = sum(priced, ZERO)
+
+        self.set_discount += discount - self.offer_discounts[index]
+        self.offer_discounts[index] = discount
+
+    def finalize(self):
+        """Charged price per line plus totals
+
+        Returns (lines, summary): lines are copies of the cart books with
+        'price' set to what the customer pays for that line (set discounts
+        spread over the set's lines), so the lines always add up to the total.
+        """
+        charged = [net + tax for _, _, net, tax in self.lines]
+
+        for index, discount in enumerate(self.offer_discounts):
+            if not discount:
+                continue
+            _, needed, _ = self.engine.offers[index]
+            sets = min(self.counts[s] // n for s, n in needed.items())
+
+            # The first `sets` complete sets' lines, in cart order
+            quota = {s: n * sets for s, n in needed.items()}
+            members = []
+            for i, (book, _, _, _) in enumerate(self.lines):
+                if quota.get(book['sku'], 0) > 0:
+                    quota[book['sku']] -= 1
+                    members.append(i)
+
+            # Share the discount in proportion to line amounts; the last line takes the remainder
+            base = sum(charged[i] for i in members)
+            if not base:
+                continue  # A free set has nothing to take a discount off
+            remaining = discount
+            for position, i in enumerate(members):
+                share = remaining if position == len(members) - 1 else money(discount * charged[i] / base)
+                charged[i] -= share
+                remaining -= share
+
+        lines = []
+        for (book, _, _, _), amount in zip(self.lines, charged):
+            line = book.copy()
+            line['price'] = float(amount)
+            lines.append(line)
+
+        summary = {
+            'subtotal': self.list_total,
+            'discount': self.discount,
+            'tax': self.tax_total,
+            'total': self.total
+        }
+        return lines, summary
@@ -0,0 +1,131 @@
+"""
+Smart Book Shop Management & Billing System
+Quick keys: the best-selling books of each class, one click away
+Kept as a time-decayed frequency count (LFU with aging), updated at
+every checkout and saved between runs
+"""
+
+import json
+import math
+import os
+import threading
+from datetime import datetime
+
+
+class QuickKeys:
+    """Bounded, decayed sales frequency per class
+
+    Scores use forward decay: a sale at time t adds 2**((t - landmark) /
+    half life), so recent sales weigh more without ever touching the
+    older scores. Each class keeps at most CAPACITY SKUs; the weakest is
+    evicted when a new one arrives.
+    """
+
+    HALF_LIFE_DAYS = 30
+    CAPACITY = 50
+
+    # Rescale once weights grow past this, to stay well inside float range
+    MAX_EXPONENT = 500
+
+    def __init__(self, app_dir):
+        self.file = os.path.join(app_dir, 'quick_keys.json')
+        self._lock = threading.Lock()
+        self.is_new = not os.path.exists(self.file)
+
+        if self.is_new:
+            self.reset()
+        else:
+            with open(self.file, 'r') as f:
+                data = json.load(f)
+            self.landmark = datetime.fromisoformat(data['landmark'])
+            self.scores = data['scores']
+
+    def reset(self):
+        """Forget every count"""
+        self.landmark = datetime.now().replace(microsecond=0)
+        self.scores = {}   # category -> {sku: decayed count}
+
+    def save(self):
+        """Save the counters atomically"""
+        temp_file = self.file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({'landmark': self.landmark.isoformat(), 'scores': self.scores}, f)
+        os.replace(temp_file, self.file)
+        self.is_new = False
+
+    def weight(self, timestamp):
+        """Weight of one copy sold at a time, relative to the landmark"""
+        exponent = (timestamp - self.landmark).total_seconds() / (self.HALF_LIFE_DAYS * 86400)
+        if exponent > self.MAX_EXPONENT:
+            # Move the landmark forward: scale every score down by the same factor
+            factor = 2.0 ** -exponent
+            for scores in self.scores.values():
+                for sku in scores:
+                    scores[sku] *= factor
+            self.landmark = timestamp
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def add(self, timestamp, category, sku, copies=1):
+        """Count copies of a book sold (no save)"""
+        scores = self.scores.setdefault(str(category), {})
+        scores[sku] = scores.get(sku, 0.0) + copies * self.weight(timestamp)
+
+        if len(scores) > self.CAPACITY:
+            weakest = min(scores, key=scores.get)
+            del scores[weakest]
+
+    def record_sale(self, timestamp, cart, total=None, invoice_no=None):
+        """Store sale listener: count every book of a checkout and save"""
+        with self._lock:
+            for book in cart:
+                self.add(timestamp, book['category'], book['sku'])
+            self.save()
+
+    def rebuild(self, records):
+        """Recount from the binary sales records (e.g. on first run)"""
+        import numpy as np
+
+        with self._lock:
+            self.reset()
+            data = records.records
+            if len(data):
+                # Weight every line against the latest sale, then sum per (class, SKU)
+                stamps = data['timestamp']
+                latest = stamps.max()
+                age_days = (latest - stamps) / np.timedelta64(1, 'D')
+                weights = np.exp2(-age_days / self.HALF_LIFE_DAYS)
+
+                keys = data['category'].astype('uint64') << np.uint64(32) | data['sku'].astype('uint64')
+                unique, inverse = np.unique(keys, return_inverse=True)
+                totals = np.bincount(inverse, weights=weights)
+
+                self.landmark = latest.astype(datetime)
+                for i in np.argsort(-totals):
+                    category = records.strings[int(unique[i] >> np.uint64(32))]
+                    scores = self.scores.setdefault(category, {})
+                    if len(scores) < self.CAPACITY:
+                        scores[records.strings[int(unique[i] & np.uint64(0xFFFFFFFF))]] = float(totals[i])
+            self.save()
+
+    def top(self, category='All', limit=12):
+        """Most popular SKUs of a class (or of every class), best first"""
+        with self._lock:
+            if category == 'All':
+                candidates = {}
+                for scores in self.scores.values():
+                    candidates.update(scores)
+            else:
+                candidates = dict(self.scores.get(category, {}))
+
+        ranked = sorted(candidates, key=candidates.get, reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    def decayed_count(self, category, sku, now=None):
+        """Approximate recent copies sold, as of now"""
+        score = self.scores.get(category, {}).get(sku, 0.0)
+        if score == 0.0:
+            return 0.0
+        now = now or datetime.now()
+        exponent = (now - self.landmark).total_seconds() / (self.HALF_LIFE_DAYS * 86400)
+        return score * math.pow(2.0, -exponent)
@@ -0,0 +1,608 @@
+"""
+Smart Book Shop Management & Billing System
+Memory-mapped binary sales records
+Every sale line is a fixed-width record, so any row can be read directly
+and whole columns are NumPy views over the mapped file (no parsing)
+
+Files (in Application_Files):
+    sales.rec       32-byte header, then one 36-byte record per sale line
+    sales.str       string table: one JSON string per line, referenced by id
+    sales.rebuild   present while the records still have to be built from Excel
+    sales.compact   present while a compact swaps in its two new files
+Files from before invoice ids were stored (32-byte records) are upgraded
+in place when first opened.
+
+Usage:
+    python bookshop_records.py build [--data-dir .]         rebuild from the Excel files
+    python bookshop_records.py show <row> [--count 20]      print rows from a position
+    python bookshop_records.py export <out dir> [--start DD-MM-YYYY] [--end DD-MM-YYYY]
+"""
+
+import argparse
+import gc
+import json
+import mmap
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bookshop_store import SALES_COLUMNS, SALES_HEADER_COLOR, SALES_COLUMN_WIDTHS
+
+MAGIC = b'BSREC\x00\x02\x00'
+HEADER_SIZE = 32
+BUILD_FLAG = 'sales.rebuild'
+
+# One sale line; strings are ids into the string table, prices are in paise
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<M8[s]'),
+    ('price', '<i8'),
+    ('sale', '<u4'),
+    ('title', '<u4'),
+    ('sku', '<u4'),
+    ('category', '<u4'),
+    ('invoice', '<u4')
+])
+
+# Invoice string id of sales that have none (recorded before invoice ids existed)
+NO_INVOICE = 0xFFFFFFFF
+
+# Version 1 layout: the same without the invoice
+MAGIC_V1 = b'BSREC\x00\x01\x00'
+RECORD_DTYPE_V1 = np.dtype([(name, RECORD_DTYPE.fields[name][0]) for name in RECORD_DTYPE.names[:-1]])
+
+
+def journal_invoices(app_dir, offset=0):
+    """(sale time, SKUs) -> invoice id of every sale in the branch journal
+
+    Used to give sales rebuilt from Excel (which has no invoice column)
+    their invoice ids back. Only the journal after a byte offset is
+    read; returns (invoices, offset the journal was read up to).
+    """
+    journal_file = os.path.join(app_dir, 'journal.jsonl')
+    invoices = {}
+    if os.path.exists(journal_file):
+        with open(journal_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn last line, still being written
+                offset += len(line)
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue  # Damaged line
+                if op.get('type') == 'sale':
+                    key = (op['timestamp'], tuple(str(item['sku']) for item in op['items']))
+                    invoices[key] = op['id']
+    return invoices, offset
+
+
+def file_stamp(path):
+    """(modification time, size) of a file, to notice it changed"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def sales_files(sales_dir):
+    """(day, path) of every daily sales file, oldest first"""
+    from bookshop_reports import parse_sales_date
+
+    return sorted(
+        (parse_sales_date(name), os.path.join(sales_dir, name))
+        for name in os.listdir(sales_dir)
+        if parse_sales_date(name) is not None
+    )
+
+
+def replace_file(source, target):
+    """os.replace, retrying while a reader still has the target mapped
+
+    Windows refuses to replace a mapped file; readers only hold views
+    briefly, so the map goes away once they are collected.
+    """
+    for attempt in range(50):
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if attempt == 49:
+                raise
+            gc.collect()
+            time.sleep(0.1)
+
+
+def request_build(app_dir):
+    """Have a folder's records rebuilt from its Excel files when next opened
+
+    For sales written to the Excel files without the records, as branch
+    sync does in the other shop's folder.
+    """
+    with open(os.path.join(app_dir, BUILD_FLAG), 'w') as f:
+        f.write('build\n')
+
+
+def invoice_key(timestamp, skus):
+    """Lookup key into journal_invoices for one sale"""
+    return (timestamp.replace(microsecond=0).isoformat(), tuple(str(sku) for sku in skus))
+
+
+class StringTable:
+    """Append-only table of distinct strings, addressed by position"""
+
+    def __init__(self, path):
+        self.path = path
+        self.strings = []
+        self.ids = {}
+        # A background rebuild interns strings while checkouts append sales
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Drop a torn last line left by a crash mid-write
+            complete = data[:data.rfind(b'\n') + 1]
+            if len(complete) != len(data):
+                with open(path, 'r+b') as f:
+                    f.truncate(len(complete))
+            for line in complete.splitlines():
+                text = json.loads(line)
+                self.ids[text] = len(self.strings)
+                self.strings.append(text)
+
+    def intern(self, text):
+        """Id of a string, adding it to the table if new"""
+        text = str(text)
+        string_id = self.ids.get(text)
+        if string_id is None:
+            with self._lock:
+                string_id = self.ids.get(text)
+                if string_id is None:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(text) + '\n')
+                    string_id = len(self.strings)
+                    self.strings.append(text)
+                    self.ids[text] = string_id
+        return string_id
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+
+class SalesRecordFile:
+    """Fixed-width sale-line records read through mmap
+
+    Records are appended in checkout order. `records` is a read-only
+    NumPy structured array backed directly by the mapped file.
+    """
+
+    def __init__(self, app_dir):
+        self.app_dir = app_dir
+        self.path = os.path.join(app_dir, 'sales.rec')
+        self.strings_path = os.path.join(app_dir, 'sales.str')
+        self.build_flag = os.path.join(app_dir, BUILD_FLAG)
+        self.compact_marker = os.path.join(app_dir, 'sales.compact')
+        self._lock = threading.Lock()
+        # Held for a whole rebuild or compact, so two never overlap
+        self._build_lock = threading.Lock()
+        self._records = None
+        self._mapped = None
+
+        # Bumped whenever existing rows are rewritten, so indexes over row numbers rebuild
+        self.generation = 0
+
+        # A crash during a compact's swaps is finished before anything is read
+        if os.path.exists(self.compact_marker):
+            self._finish_compact()
+        self.strings = StringTable(self.strings_path)
+
+        if not os.path.exists(self.path):
+            # Flagged first, so a crash before the history is copied in still rebuilds it
+            request_build(app_dir)
+            self._replace_records(lambda f: None)
+
+        with open(self.path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+        if magic == MAGIC_V1:
+            self._upgrade_v1()
+        elif magic != MAGIC:
+            raise ValueError(f"{self.path} is not a sales record file")
+
+        with open(self.path, 'r+b') as f:
+            # Drop a torn last record left by a crash mid-write
+            size = os.path.getsize(self.path)
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            if whole != size:
+                f.truncate(whole)
+
+        records = self.records
+        self.next_sale = int(records['sale'].max()) + 1 if len(records) else 1
+
+    def _upgrade_v1(self):
+        """Rewrite a version 1 file (no invoices) in the current layout
+
+        Invoice ids are recovered from the journal where a sale is found there.
+        """
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE_V1.itemsize
+        old = np.fromfile(self.path, dtype=RECORD_DTYPE_V1, count=count, offset=HEADER_SIZE)
+
+        new = np.zeros(count, dtype=RECORD_DTYPE)
+        for name in RECORD_DTYPE_V1.names:
+            new[name] = old[name]
+        new['invoice'] = NO_INVOICE
+        self._match_invoices(new, journal_invoices(self.app_dir)[0])
+
+        self._replace_records(lambda f: f.write(new.tobytes()))
+
+    def _match_invoices(self, block, invoices):
+        """Fill in the invoice of every sale in some records that the journal knows"""
+        missing = np.flatnonzero(block['invoice'] == NO_INVOICE)
+        if not invoices or not len(missing):
+            return
+
+        # Lines of each sale, in line order
+        order = missing[np.argsort(block['sale'][missing], kind='stable')]
+        _, starts = np.unique(block['sale'][order], return_index=True)
+        bounds = np.append(starts, len(order))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            rows = order[start:end]
+            skus = [self.strings[i] for i in block['sku'][rows].tolist()]
+            invoice_no = invoices.get(invoice_key(block['timestamp'][rows[0]].astype(datetime), skus))
+            if invoice_no is not None:
+                block['invoice'][rows] = self.strings.intern(invoice_no)
+
+    @property
+    def needs_build(self):
+        """True until the records have been built from the Excel files once"""
+        return os.path.exists(self.build_flag)
+
+    # ============ READING ============
+
+    @property
+    def records(self):
+        """Every record as a zero-copy view of the mapped file"""
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if self._records is None or len(self._records) != count:
+            if count == 0:
+                self._records = np.zeros(0, dtype=RECORD_DTYPE)
+            else:
+                with open(self.path, 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                # The array keeps the map alive for as long as any view uses it
+                self._records = np.frombuffer(mapped, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+                self._mapped = mapped
+        return self._records
+
+    def __len__(self):
+        return len(self.records)
+
+    def invoice(self, string_id):
+        """Invoice id from its string id, or None for sales without one"""
+        return None if string_id == NO_INVOICE else self.strings[string_id]
+
+    def row(self, record):
+        """Decode one record into a sale line dict"""
+        when = record['timestamp'].astype(datetime)
+        return {
+            'timestamp': when,
+            'sale': int(record['sale']),
+            'invoice': self.invoice(int(record['invoice'])),
+            'title': self.strings[record['title']],
+            'sku': self.strings[record['sku']],
+            'category': self.strings[record['category']],
+            'price': int(record['price']) / 100
+        }
+
+    def page(self, start, count):
+        """Decode `count` rows starting at a row number"""
+        return [self.row(record) for record in self.records[start:start + count]]
+
+    def rows_between(self, start, end):
+        """Row numbers of sale lines from start up to (not including) end"""
+        stamps = self.records['timestamp']
+        return np.flatnonzero(
+            (stamps >= np.datetime64(start, 's')) & (stamps < np.datetime64(end, 's'))
+        )
+
+    def revenue_by_category(self, rows=None):
+        """{category: revenue in Rs}, summed straight off the mapped columns"""
+        records = self.records if rows is None else self.records[rows]
+        ids, inverse = np.unique(records['category'], return_inverse=True)
+        totals = np.bincount(inverse, weights=records['price'], minlength=len(ids))
+        return {self.strings[i]: total / 100 for i, total in zip(ids, totals)}
+
+    def to_lines(self, rows=None):
+        """Sale-line table in the same layout as bookshop_reports.load_sales_file"""
+        import pandas as pd
+
+        records = self.records if rows is None else self.records[rows]
+        strings = np.array(self.strings.strings, dtype=object)
+        stamps = pd.to_datetime(records['timestamp'])
+
+        return pd.DataFrame({
+            'Date': stamps.normalize(),
+            'Time': stamps.strftime("%I:%M %p"),
+            'Sale': records['sale'].astype('int64'),
+            'Book Title': strings[records['title']],
+            'Class': pd.Categorical(strings[records['category']]),
+            'SKU': strings[records['sku']],
+            'Unit Price (Rs)': records['price'] / 100,
+            'Timestamp': stamps
+        })
+
+    # ============ WRITING ============
+
+    def encode_sale(self, timestamp, cart, sale, invoice_no=None):
+        """Records of one sale's lines (interning any new strings)"""
+        block = np.zeros(len(cart), dtype=RECORD_DTYPE)
+        block['timestamp'] = np.datetime64(timestamp.replace(microsecond=0), 's')
+        block['sale'] = sale
+        block['invoice'] = NO_INVOICE if invoice_no is None else self.strings.intern(invoice_no)
+        for field in ('title', 'sku', 'category'):
+            block[field] = [self.strings.intern(book[field]) for book in cart]
+        block['price'] = [round(float(book['price']) * 100) for book in cart]
+        return block
+
+    def append_sale(self, timestamp, cart, invoice_no=None):
+        """Append the lines of one sale"""
+        with self._lock:
+            block = self.encode_sale(timestamp, cart, self.next_sale, invoice_no)
+
+            # Strings are written before the records that refer to them
+            with open(self.path, 'ab') as f:
+                f.write(block.tobytes())
+            self.next_sale += 1
+
+    def _write_temp(self, write_records):
+        """Write a complete records file beside the live one; returns its path"""
+        records_temp = self.path + '.tmp'
+        with open(records_temp, 'wb') as f:
+            f.write(MAGIC.ljust(HEADER_SIZE, b'\x00'))
+            write_records(f)
+            f.flush()
+            os.fsync(f.fileno())
+        return records_temp
+
+    def _release_map(self):
+        """Drop our view and unmap the file so it can be replaced
+
+        The next read of `records` maps the new file.
+        """
+        self._records = None
+        if self._mapped is not None:
+            try:
+                self._mapped.close()
+            except BufferError:
+                pass  # A reader still holds a view; the map closes when it is collected
+            self._mapped = None
+
+    def _replace_records(self, write_records):
+        """Write a new records file beside the old one, then swap it in
+
+        The live file is never truncated: other views (or processes) may
+        still have it mapped, and shrinking a mapped file crashes them.
+        """
+        records_temp = self._write_temp(write_records)
+        self._release_map()
+        replace_file(records_temp, self.path)
+
+    def _encode_file(self, day, path):
+        """(records, number of sales) of one daily Excel file; sales numbered from 1, no invoices"""
+        from bookshop_reports import load_sales_file
+
+        blocks = []
+        lines = load_sales_file(path)
+        for sale, (_, items) in enumerate(lines.groupby('Sale', sort=True), 1):
+            cart = [
+                {'title': title, 'sku': sku, 'category': category, 'price': price}
+                for title, sku, category, price in items[
+                    ['Book Title', 'SKU', 'Class', 'Unit Price (Rs)']
+                ].fillna(0).itertuples(index=False, name=None)
+            ]
+            # A sale whose time cannot be read is filed at the start of its day
+            stamps = items['Timestamp'].dropna()
+            timestamp = stamps.iloc[0].to_pydatetime() if len(stamps) else datetime.combine(day, datetime.min.time())
+            blocks.append(self.encode_sale(timestamp, cart, sale))
+        if not blocks:
+            return np.zeros(0, dtype=RECORD_DTYPE), 0
+        return np.concatenate(blocks), len(blocks)
+
+    def rebuild_from_excel(self, sales_dir, pause=None):
+        """Replace every record with the contents of the daily Excel files
+
+        The files are read while sales carry on. pause, if given, is a
+        function returning a context manager that holds off new sales
+        (the store's checkout locks); it is held only to re-read the
+        files that changed meanwhile and swap the new records in.
+        """
+        with self._build_lock:
+            encoded = {}   # path -> (file stamp, records, number of sales)
+            for day, path in sales_files(sales_dir):
+                encoded[path] = (file_stamp(path), *self._encode_file(day, path))
+            invoices, journal_end = journal_invoices(self.app_dir)
+            for _, block, _ in encoded.values():
+                self._match_invoices(block, invoices)
+
+            with pause() if pause else nullcontext(), self._lock:
+                files = sales_files(sales_dir)
+                for day, path in files:
+                    if path not in encoded or encoded[path][0] != file_stamp(path):
+                        encoded[path] = (file_stamp(path), *self._encode_file(day, path))
+                        self._match_invoices(encoded[path][1], invoices)
+
+                # Sales journaled while the files were read (only their days can match)
+                invoices, _ = journal_invoices(self.app_dir, journal_end)
+                days = {key[0][:10] for key in invoices}
+                for day, path in files:
+                    if day.isoformat() in days:
+                        self._match_invoices(encoded[path][1], invoices)
+
+                def write_records(f):
+                    sale = 0
+                    for _, path in files:
+                        _, block, count = encoded[path]
+                        block['sale'] += sale
+                        f.write(block.tobytes())
+                        sale += count
+                    self.next_sale = sale + 1
+
+                # Checkouts wait until the new file is in place
+                self._replace_records(write_records)
+                self.generation += 1
+                if os.path.exists(self.build_flag):
+                    os.remove(self.build_flag)
+        return len(self.records)
+
+    def compact(self):
+        """Rewrite the records in time order, keeping only strings still in use
+
+        Synced sales from other branches arrive out of order; sorting them
+        back keeps time slices contiguous. Run with the app closed.
+
+        Both new files are written completely before either is swapped
+        in; the marker file lets the next open finish the swaps after a
+        crash, so records never point into the wrong string table.
+        """
+        with self._build_lock, self._lock:
+            records = self.records[np.argsort(self.records['timestamp'], kind='stable')]
+            fields = ('title', 'sku', 'category')
+
+            # Renumber the strings that are referenced, in first-use order
+            invoices = records['invoice'][records['invoice'] != NO_INVOICE]
+            used = np.unique(np.concatenate([records[field] for field in fields] + [invoices]))
+            remap = np.zeros(len(self.strings.strings), dtype='<u4')
+            remap[used] = np.arange(len(used), dtype='<u4')
+            for field in fields:
+                records[field] = remap[records[field]]
+            has_invoice = records['invoice'] != NO_INVOICE
+            records['invoice'][has_invoice] = remap[records['invoice'][has_invoice]]
+
+            self._write_temp(lambda f: f.write(records.tobytes()))
+            with open(self.strings_path + '.tmp', 'w', encoding='utf-8') as f:
+                for i in used:
+                    f.write(json.dumps(self.strings[i]) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self.compact_marker, 'w') as f:
+                f.write('compact\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._release_map()
+            self._finish_compact()
+            self.strings = StringTable(self.strings_path)
+            self.generation += 1
+
+        return len(records)
+
+    def _finish_compact(self):
+        """Swap in whichever new files of a marked compact are still waiting"""
+        for temp, path in ((self.path + '.tmp', self.path), (self.strings_path + '.tmp', self.strings_path)):
+            if os.path.exists(temp):
+                replace_file(temp, path)
+        os.remove(self.compact_marker)
+
+    # ============ EXCEL EXPORT ============
+
+    def export_excel(self, output_dir, rows=None):
+        """Write records back out as daily files in the Sales_Records layout
+
+        Returns the list of files written.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill
+
+        os.makedirs(output_dir, exist_ok=True)
+        lines = self.to_lines(rows)
+        written = []
+
+        header_fill = PatternFill(start_color=SALES_HEADER_COLOR, end_color=SALES_HEADER_COLOR, fill_type="solid")
+        header_font = Font(color="FFFFFF", bold=True, size=12)
+
+        for day, day_lines in lines.groupby('Date', sort=True):
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Sheet1")
+            for column, width in SALES_COLUMN_WIDTHS.items():
+                ws.column_dimensions[column].width = width
+
+            header = []
+            for column in SALES_COLUMNS:
+                cell = WriteOnlyCell(ws, value=column)
+                cell.fill = header_fill
+                cell.font = header_font
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+                header.append(cell)
+            ws.append(header)
+
+            for i, (_, items) in enumerate(day_lines.groupby('Sale', sort=True)):
+                if i:
+                    ws.append(['---'] * len(SALES_COLUMNS))
+                total = items['Unit Price (Rs)'].sum()
+                columns = ['Time', 'Book Title', 'Class', 'SKU', 'Unit Price (Rs)', 'Timestamp']
+                for j, (time_str, title, category, sku, price, stamp) in enumerate(
+                    items[columns].itertuples(index=False, name=None)
+                ):
+                    ws.append([
+                        day.strftime("%d-%m-%Y"),
+                        time_str,
+                        title,
+                        f"Class {category}",
+                        sku,
+                        f"Rs {price:.2f}",
+                        f"Rs {total:.2f}" if j == 0 else None,
+                        stamp.to_pydatetime()
+                    ])
+
+            filepath = os.path.join(output_dir, f"{day.strftime('%d-%m-%Y')}.xlsx")
+            wb.save(filepath)
+            written.append(filepath)
+
+        return written
+
+
+# ============ MAIN ENTRY POINT ============
+
+def main(argv=None):
+    """Build, inspect or export the binary sales records"""
+    parser = argparse.ArgumentParser(description="Binary sales records")
+    parser.add_argument('--data-dir', default='.', help="Shop data folder")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('build', help="Rebuild the records from Sales_Records")
+
+    show = sub.add_parser('show', help="Print rows starting at a row number")
+    show.add_argument('row', type=int)
+    show.add_argument('--count', type=int, default=20)
+
+    export = sub.add_parser('export', help="Write daily Excel files")
+    export.add_argument('output_dir')
+    export.add_argument('--start', help="First day (DD-MM-YYYY)")
+    export.add_argument('--end', help="Last day (DD-MM-YYYY)")
+
+    args = parser.parse_args(argv)
+    records = SalesRecordFile(os.path.join(args.data_dir, 'Application_Files'))
+
+    if args.command == 'build':
+        count = records.rebuild_from_excel(os.path.join(args.data_dir, 'Sales_Records'))
+        print(f"Stored {count} sale line(s)")
+
+    elif args.command == 'show':
+        for offset, line in enumerate(records.page(args.row, args.count)):
+            print(f"{args.row + offset:>9}  {line['timestamp']:%d-%m-%Y %I:%M %p}  "
+                  f"#{line['sale']:<6} {line['sku']:<16} Class {line['category']:<3} "
+                  f"Rs {line['price']:>9.2f}  {line['title']}")
+
+    else:
+        start = datetime.strptime(args.start, "%d-%m-%Y") if args.start else datetime(1970, 1, 1)
+        end = datetime.strptime(args.end, "%d-%m-%Y") + timedelta(days=1) if args.end else datetime(9999, 1, 1)
+        files = records.export_excel(args.output_dir, records.rows_between(start, end))
+        print(f"Wrote {len(files)} file(s) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""
+Smart Book Shop Management & Billing System
+Multi-day sales report loading
+Parses daily sales files in parallel into one typed table of sale lines
+(no GUI imports here, so worker processes start quickly)
+"""
+
+import csv
+import multiprocessing
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, date, time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from bookshop_store import SALES_COLUMNS, SALES_HEADER_COLOR, SALES_COLUMN_WIDTHS
+
+# Columns of the typed sale-line table
+LINE_COLUMNS = ['Date', 'Time', 'Sale', 'Book Title', 'Class', 'SKU', 'Unit Price (Rs)', 'Timestamp']
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def parse_sales_date(filename):
+    """Date of a daily sales file named DD-MM-YYYY.xlsx, or None"""
+    name, ext = os.path.splitext(os.path.basename(filename))
+    if ext != '.xlsx':
+        return None
+    try:
+        return datetime.strptime(name, "%d-%m-%Y").date()
+    except ValueError:
+        return None
+
+
+def sales_files_in_range(sales_dir, start, end):
+    """Daily sales files between two dates (inclusive), oldest first"""
+    files = []
+    if os.path.exists(sales_dir):
+        for filename in os.listdir(sales_dir):
+            day = parse_sales_date(filename)
+            if day is not None and start <= day <= end:
+                files.append((day, os.path.join(sales_dir, filename)))
+    return [path for _, path in sorted(files)]
+
+
+def empty_lines():
+    """An empty sale-line table with the right columns"""
+    lines = pd.DataFrame({column: [] for column in LINE_COLUMNS})
+    lines['Timestamp'] = pd.to_datetime(lines['Timestamp'])
+    return lines
+
+
+def load_sales_file(filepath):
+    """Parse one daily sales file into typed sale lines
+
+    Separator rows ('---') between sales are dropped; the 'Sale' column
+    numbers the sales within the day instead.
+    """
+    df = pd.read_excel(filepath, dtype=str).fillna('')
+    if df.empty:
+        return empty_lines()
+
+    separator = df['Date'] == '---'
+    sale_number = separator.cumsum() + 1
+    lines = df[~separator]
+
+    # Sale time to the minute: the saved Timestamp, or Date + Time in older files
+    stamps = pd.to_datetime(
+        lines['Date'] + ' ' + lines['Time'], format="%d-%m-%Y %I:%M %p", errors='coerce'
+    )
+    if 'Timestamp' in lines:
+        saved = pd.to_datetime(lines['Timestamp'], format='ISO8601', errors='coerce')
+        stamps = saved.fillna(stamps)
+
+    return pd.DataFrame({
+        'Date': pd.to_datetime(lines['Date'], format="%d-%m-%Y", errors='coerce'),
+        'Time': lines['Time'],
+        'Sale': sale_number[~separator].astype('int64'),
+        'Book Title': lines['Book Title'],
+        'Class': lines['Class/Category'].str.replace('Class', '').str.strip(),
+        'SKU': lines['SKU / Serial Number'],
+        'Unit Price (Rs)': pd.to_numeric(
+            lines['Unit Price (Rs)'].str.replace('Rs', '').str.replace(',', '').str.strip(),
+            errors='coerce'
+        ),
+        'Timestamp': stamps
+    }).reset_index(drop=True)
+
+
+def load_sales_range(paths, workers=None, progress=None):
+    """Load many daily files in parallel and merge them
+
+    progress(done, total) is called as each file finishes.
+    Returns (lines, errors) where errors lists (path, message) for
+    files that could not be read.
+    """
+    frames = [None] * len(paths)
+    errors = []
+
+    def collect(index, load):
+        try:
+            frames[index] = load()
+        except Exception as e:
+            errors.append((paths[index], str(e)))
+
+    if len(paths) <= 1 or workers == 1:
+        # Not worth starting worker processes
+        for i, path in enumerate(paths):
+            collect(i, lambda: load_sales_file(path))
+            if progress:
+                progress(i + 1, len(paths))
+    else:
+        # 'spawn' is safe from a GUI with running threads (and is the Windows default)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {pool.submit(load_sales_file, path): i for i, path in enumerate(paths)}
+            for done, future in enumerate(as_completed(futures), 1):
+                collect(futures[future], future.result)
+                if progress:
+                    progress(done, len(paths))
+
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return empty_lines(), errors
+
+    lines = pd.concat(frames, ignore_index=True)
+    lines['Class'] = lines['Class'].astype('category')
+    return lines, errors
+
+
+def add_list_prices(lines, history):
+    """Join each sale line to the list price in force when it was sold
+
+    Adds a 'List Price (Rs)' column (NaN where the price history has no
+    price for that book at that time).
+    """
+    lines['List Price (Rs)'] = history.prices_at(
+        lines['SKU'].to_numpy(), lines['Timestamp'].to_numpy()
+    )
+    return lines
+
+
+# ============ EXCEL EXPORT ============
+
+def parse_amount(value):
+    """Convert 'Rs 450.00' (or a number) to float; None if blank"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace('Rs', '').replace(',', '').strip())
+    except ValueError:
+        return None
+
+
+def iter_sales_lines(filepath):
+    """Stream the sale lines of one daily file without loading it whole
+
+    Yields (sale number within the day, values in SALES_COLUMNS order);
+    separator rows only advance the sale number.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filepath, read_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = [list(header).index(column) if column in header else None
+                     for column in SALES_COLUMNS]
+
+        sale = 1
+        for row in rows:
+            values = [row[i] if i is not None and i < len(row) else None for i in positions]
+            if values[0] == '---':
+                sale += 1
+                continue
+            if all(value in (None, '') for value in values):
+                continue
+            yield sale, values
+    finally:
+        wb.close()
+
+
+def iter_sales_rows(filepath):
+    """Stream the sale lines of one daily file, values only"""
+    for _, values in iter_sales_lines(filepath):
+        yield values
+
+
+def export_sales_excel(paths, output, progress=None):
+    """Stream sale lines from many daily files into one formatted workbook
+
+    Uses openpyxl's write-only mode, so memory stays flat however many
+    rows are written. Prices are stored as numbers with an 'Rs' format.
+    Returns the number of sale lines written.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sales")
+
+    # Formatting must be set before the first row is written
+    for column, width in SALES_COLUMN_WIDTHS.items():
+        ws.column_dimensions[column].width = width
+    ws.column_dimensions['G'].width = 18
+    ws.freeze_panes = 'A2'
+
+    header_fill = PatternFill(start_color=SALES_HEADER_COLOR, end_color=SALES_HEADER_COLOR, fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True, size=12)
+    header = []
+    for column in SALES_COLUMNS:
+        cell = WriteOnlyCell(ws, value=column)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        header.append(cell)
+    ws.append(header)
+
+    money_format = '"Rs "#,##0.00'
+    count = 0
+
+    for done, path in enumerate(paths, 1):
+        for values in iter_sales_rows(path):
+            row = values[:5]
+            for amount in (parse_amount(values[5]), parse_amount(values[6])):
+                cell = WriteOnlyCell(ws, value=amount)
+                cell.number_format = money_format
+                row.append(cell)
+            timestamp = WriteOnlyCell(ws, value=values[7])
+            timestamp.number_format = 'DD-MM-YYYY HH:MM'
+            row.append(timestamp)
+            ws.append(row)
+            count += 1
+
+        if progress:
+            progress(done, len(paths))
+
+    wb.save(output)
+    return count
+
+
+# ============ CSV EXPORT ============
+
+# Flat, numeric columns for accounting software
+CSV_COLUMNS = ['date', 'time', 'sale_id', 'title', 'class', 'sku', 'unit_price', 'timestamp']
+
+
+def parse_line_date(value):
+    """Date cell (a date, or 'DD-MM-YYYY' text) as a date, or None"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%d-%m-%Y").date()
+    except ValueError:
+        return None
+
+
+def parse_line_time(value):
+    """Time cell (a time, or 'HH:MM AM' text) as a time, or None"""
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%I:%M %p").time()
+    except ValueError:
+        return None
+
+
+def normalized_lines(paths):
+    """Stage 1+2: read each day in turn and clean every line for CSV
+
+    Legacy quirks are fixed on the fly: 'Rs 1,200.00' becomes 1200.0,
+    'Class 10' becomes '10', 12-hour times become 24-hour, and the day's
+    date comes from the file name when a cell is unreadable.
+    """
+    for path in paths:
+        file_day = parse_sales_date(path)
+        for sale, values in iter_sales_lines(path):
+            day = parse_line_date(values[0]) or file_day
+            clock = parse_line_time(values[1])
+            price = parse_amount(values[5])
+            stamp = values[7] if isinstance(values[7], datetime) else None
+            if stamp is None and day is not None and clock is not None:
+                stamp = datetime.combine(day, clock)
+
+            yield [
+                day.isoformat() if day else '',
+                clock.strftime("%H:%M") if clock else '',
+                f"{day.isoformat() if day else file_day}-{sale}",
+                str(values[2] or '').strip(),
+                str(values[3] or '').replace('Class', '').strip(),
+                str(values[4] or '').strip(),
+                f"{price:.2f}" if price is not None else '',
+                stamp.isoformat(sep=' ') if stamp else ''
+            ]
+
+
+def chunked(iterable, size):
+    """Stage 3: group a stream into lists of at most `size` items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_sales_csv(paths, output, chunk_size=5000, progress=None):
+    """Stream every sale line of many daily files into one flat CSV
+
+    Only one chunk of lines is held in memory at a time, whatever the
+    date range. progress(lines written) is called after each chunk.
+    Returns the number of lines written.
+    """
+    count = 0
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for chunk in chunked(normalized_lines(paths), chunk_size):
+            writer.writerows(chunk)
+            count += len(chunk)
+            if progress:
+                progress(count)
+    return count
+
+
+# ============ HEATMAPS ============
+
+def sales_heatmap(lines, measure='books', by_class=False):
+    """Bin sale lines by weekday x hour of day
+
+    measure is 'books' (copies sold), 'revenue' or 'sales' (invoices).
+    Returns a 7x24 DataFrame (weekdays down, hours across), or with
+    by_class a dict of them keyed by class.
+    """
+    lines = lines[lines['Timestamp'].notna()]
+    stamps = lines['Timestamp'].dt
+
+    # One bin per (weekday, hour): 0..167
+    cells = stamps.weekday.to_numpy(dtype='int64') * 24 + stamps.hour.to_numpy(dtype='int64')
+
+    if measure == 'revenue':
+        weights = lines['Unit Price (Rs)'].fillna(0).to_numpy(dtype='float64')
+    elif measure == 'sales':
+        # Count each invoice once, on its first line
+        weights = (~lines.duplicated(['Date', 'Sale'])).to_numpy(dtype='float64')
+    elif measure == 'books':
+        weights = None
+    else:
+        raise ValueError(f"Unknown heatmap measure: {measure}")
+
+    def grid(counts):
+        return pd.DataFrame(counts.reshape(7, 24), index=WEEKDAYS, columns=range(24))
+
+    if not by_class:
+        return grid(np.bincount(cells, weights, minlength=168))
+
+    codes, classes = pd.factorize(lines['Class'], sort=True)
+    counts = np.bincount(codes * 168 + cells, weights, minlength=len(classes) * 168)
+    return {
+        str(category): grid(counts[i * 168:(i + 1) * 168])
+        for i, category in enumerate(classes)
+    }
+
+
+# ============ LIVE DASHBOARD ============
+
+class SalesDashboard:
+    """Running totals for today's sales, kept in memory
+
+    Rebuilt from today's sales file once at startup, then updated
+    incrementally by each checkout (from the counter or a tablet).
+    """
+
+    RECENT_SALES = 8
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset(datetime.now().date())
+
+    def reset(self, day):
+        """Start a fresh day"""
+        self.day = day
+        self.revenue = 0.0
+        self.invoices = 0
+        self.units_by_class = Counter()
+        self.recent = deque(maxlen=self.RECENT_SALES)
+
+        # Bumped on every change so screens redraw only when needed
+        self.version = getattr(self, 'version', 0) + 1
+
+    def rebuild(self, sales_dir):
+        """Load today's counters from the daily sales file"""
+        filepath = os.path.join(sales_dir, f"{self.day.strftime('%d-%m-%Y')}.xlsx")
+        if not os.path.exists(filepath):
+            return
+
+        lines = load_sales_file(filepath)
+        with self._lock:
+            self.reset(self.day)
+            self.revenue = float(lines['Unit Price (Rs)'].sum())
+            self.invoices = int(lines['Sale'].nunique())
+            self.units_by_class.update(lines['Class'].value_counts().to_dict())
+
+            for sale, items in lines.groupby('Sale', sort=True):
+                self.recent.append({
+                    'time': items['Time'].iloc[0],
+                    'label': f"Sale #{sale}",
+                    'books': len(items),
+                    'total': float(items['Unit Price (Rs)'].sum())
+                })
+
+    def record_sale(self, timestamp, cart, total, invoice_no=None):
+        """Add one completed sale to the counters"""
+        with self._lock:
+            # A synced sale from another day is not part of today's counters
+            if timestamp.date() < self.day:
+                return
+            if timestamp.date() != self.day:
+                self.reset(timestamp.date())
+
+            self.revenue += total
+            self.invoices += 1
+            self.units_by_class.update(book['category'] for book in cart)
+            self.recent.append({
+                'time': timestamp.strftime("%I:%M %p"),
+                'label': invoice_no or f"Sale #{self.invoices}",
+                'books': len(cart),
+                'total': total
+            })
+            self.version += 1
+
+    def snapshot(self):
+        """Consistent copy of the counters for display"""
+        with self._lock:
+            if datetime.now().date() != self.day:
+                self.reset(datetime.now().date())
+            return {
+                'version': self.version,
+                'day': self.day,
+                'revenue': self.revenue,
+                'invoices': self.invoices,
+                'units_by_class': dict(self.units_by_class),
+                'recent': list(reversed(self.recent))
+            }
@@ -0,0 +1,163 @@
+"""
+Smart Book Shop Management & Billing System
+Inverted index over the sales history: SKU or title word -> sale lines
+Built from the memory-mapped sales records in one vectorized pass and
+extended at every checkout, so a book's sales history never opens the
+daily Excel files
+"""
+
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from bookshop_search import tokenize
+
+
+class SalesIndex:
+    """Postings of every SKU and title word in the binary sales records
+
+    Most postings live in one array of row numbers grouped by SKU (a
+    stable argsort, so each SKU's rows stay in record order) plus the
+    span of each SKU in it. Lines appended since then go to short per-SKU
+    lists until the records are next rewritten.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self._lock = threading.Lock()
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Index every record from scratch (caller holds the lock)"""
+        data = self.records.records
+        self.generation = self.records.generation
+
+        self.order = np.argsort(data['sku'], kind='stable')
+        ids, starts = np.unique(data['sku'][self.order], return_index=True)
+        ends = np.append(starts[1:], len(data))
+        self.spans = {int(i): (int(s), int(e)) for i, s, e in zip(ids, starts, ends)}
+
+        self.recent = defaultdict(list)   # SKU id -> rows appended since the rebuild
+        self.words = defaultdict(set)     # title or SKU word -> SKU ids
+        self._index_words(data)
+        self.indexed = len(data)
+
+    def _index_words(self, data):
+        """Add the title and SKU words of some records to the word postings"""
+        strings = self.records.strings
+        pairs = np.unique(data['title'].astype('uint64') << np.uint64(32) | data['sku'].astype('uint64'))
+        for pair in pairs.tolist():
+            title_id, sku_id = pair >> 32, pair & 0xFFFFFFFF
+            for word in tokenize(strings[title_id]) + tokenize(strings[sku_id]):
+                self.words[word].add(sku_id)
+
+    def refresh(self):
+        """Index lines appended since the last call (everything again after a reindex)"""
+        with self._lock:
+            data = self.records.records
+            if self.records.generation != self.generation or len(data) < self.indexed:
+                self._rebuild()
+                return
+            if len(data) == self.indexed:
+                return
+
+            new = data[self.indexed:]
+            for row, sku_id in enumerate(new['sku'].tolist(), self.indexed):
+                self.recent[sku_id].append(row)
+            self._index_words(new)
+            self.indexed = len(data)
+
+    def record_sale(self, timestamp, cart, total=None, invoice_no=None):
+        """Store sale listener: index the lines just written"""
+        self.refresh()
+
+    # ============ QUERIES ============
+
+    def rows_for(self, sku):
+        """Row numbers of every sale line of a SKU"""
+        self.refresh()
+        sku_id = self.records.strings.ids.get(sku)
+        if sku_id is None:
+            return np.zeros(0, dtype=np.intp)
+
+        with self._lock:
+            start, end = self.spans.get(sku_id, (0, 0))
+            return np.concatenate([
+                self.order[start:end],
+                np.array(self.recent.get(sku_id, []), dtype=np.intp)
+            ])
+
+    def find(self, query):
+        """SKUs whose title or SKU contains every word of the query"""
+        self.refresh()
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            matches = set.intersection(*(self.words.get(word, set()) for word in words))
+        return sorted(self.records.strings[sku_id] for sku_id in matches)
+
+    def lines(self, sku, start=None, end=None):
+        """A SKU's sale-line records in time order, optionally start <= time < end"""
+        data = self.records.records[self.rows_for(sku)]
+        if start is not None:
+            data = data[data['timestamp'] >= np.datetime64(start, 's')]
+        if end is not None:
+            data = data[data['timestamp'] < np.datetime64(end, 's')]
+        return data[np.argsort(data['timestamp'], kind='stable')]
+
+    def postings(self, sku, start=None, end=None):
+        """One posting per sale of a SKU, oldest first
+
+        Each is {'timestamp', 'invoice', 'sale', 'qty', 'price', 'amount'};
+        'invoice' is the invoice id (None for sales from before invoice
+        ids), 'sale' the sale number in the binary records and 'price'
+        the average unit price charged.
+        """
+        data = self.lines(sku, start, end)
+        sales, first, inverse, counts = np.unique(
+            data['sale'], return_index=True, return_inverse=True, return_counts=True
+        )
+        amounts = np.bincount(inverse, weights=data['price'], minlength=len(sales)) / 100
+
+        postings = [
+            {
+                'timestamp': data['timestamp'][i].astype(datetime),
+                'invoice': self.records.invoice(int(data['invoice'][i])),
+                'sale': sale,
+                'qty': qty,
+                'price': round(amount / qty, 2),
+                'amount': round(amount, 2)
+            }
+            for sale, i, qty, amount in zip(sales.tolist(), first.tolist(), counts.tolist(), amounts.tolist())
+        ]
+        postings.sort(key=lambda posting: posting['timestamp'])
+        return postings
+
+    def sell_through(self, sku, start=None, end=None):
+        """Copies sold and revenue of a SKU over a period, in total and per day
+
+        Returns {'sku', 'copies', 'sales', 'revenue', 'days'} where days is
+        a list of (date, copies, revenue) for the days it sold.
+        """
+        data = self.lines(sku, start, end)
+        days, inverse, copies = np.unique(
+            data['timestamp'].astype('M8[D]'), return_inverse=True, return_counts=True
+        )
+        revenue = np.bincount(inverse, weights=data['price'], minlength=len(days)) / 100
+
+        return {
+            'sku': sku,
+            'copies': len(data),
+            'sales': len(np.unique(data['sale'])),
+            'revenue': float(revenue.sum()),
+            'days': [
+                (day.astype(datetime), int(count), float(amount))
+                for day, count, amount in zip(days, copies, revenue)
+            ]
+        }
+
@@ -0,0 +1,292 @@
+"""
+Smart Book Shop Management & Billing System
+Typo-tolerant search over book titles and SKUs, and cached table sorting
+
+Titles and SKUs are split into words. Each query word is matched
+against the (much smaller) word vocabulary by exact, prefix or trigram
+similarity, so "mathamatics 10" still finds "Mathematics Class 10".
+"""
+
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+DATE_RE = re.compile(r"^\d{2}-\d{2}-\d{4}$")
+TIME_RE = re.compile(r"^\d{1,2}:\d{2} [AP]M$")
+NUMBER_RE = re.compile(r"^(Rs\s*)?-?[\d,]*\.?\d+$")
+
+
+def tokenize(text):
+    """Split text into lowercase words"""
+    return WORD_RE.findall(text.lower())
+
+
+def trigrams(word):
+    """Padded character trigrams of a word"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyIndex:
+    """Word-level trigram index over the catalogue, keyed by SKU"""
+
+    # Minimum Dice similarity for a misspelt word to count as a match
+    MIN_SIMILARITY = 0.5
+
+    # Scores for the cheaper match kinds
+    EXACT_SCORE = 1.0
+    PREFIX_SCORE = 0.9
+
+    # Cap on vocabulary words a short prefix may expand to
+    MAX_PREFIX_WORDS = 200
+
+    def __init__(self):
+        self.word_books = defaultdict(set)   # word -> SKUs containing it
+        self.book_words = {}                 # SKU -> its words
+        self.gram_words = defaultdict(set)   # trigram -> words containing it
+        self.word_gram_count = {}            # word -> number of trigrams
+        self._sorted_words = None            # vocabulary for prefix lookup
+
+    def words_for(self, book):
+        """Searchable words of a book: title words and SKU parts"""
+        words = set(tokenize(book['title']))
+        words.update(tokenize(book['sku']))
+        return words
+
+    def add(self, book):
+        """Index a book"""
+        words = self.words_for(book)
+        self.book_words[book['sku']] = words
+
+        for word in words:
+            if word not in self.word_books:
+                # Numbers are only ever matched exactly or by prefix
+                if not word.isdigit():
+                    grams = trigrams(word)
+                    self.word_gram_count[word] = len(grams)
+                    for gram in grams:
+                        self.gram_words[gram].add(word)
+                self._sorted_words = None
+            self.word_books[word].add(book['sku'])
+
+    def remove(self, sku):
+        """Drop a book from the index"""
+        for word in self.book_words.pop(sku, ()):
+            skus = self.word_books[word]
+            skus.discard(sku)
+            if not skus:
+                del self.word_books[word]
+                if not word.isdigit():
+                    for gram in trigrams(word):
+                        self.gram_words[gram].discard(word)
+                    del self.word_gram_count[word]
+                self._sorted_words = None
+
+    def rebuild(self, books):
+        """Index a whole catalogue from scratch"""
+        self.__init__()
+        for book in books:
+            self.add(book)
+
+    def match_word(self, token):
+        """Vocabulary words matching one query word, with similarity scores"""
+        matches = {}
+
+        # Prefix matches (also covers the word being typed)
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.word_books)
+        words = self._sorted_words
+        i = bisect_left(words, token)
+        while i < len(words) and words[i].startswith(token) and len(matches) < self.MAX_PREFIX_WORDS:
+            matches[words[i]] = self.EXACT_SCORE if words[i] == token else self.PREFIX_SCORE
+            i += 1
+
+        # Class numbers and SKU digits must not fuzzy-match ("10" is not "11")
+        if token.isdigit():
+            return matches
+
+        # Misspellings by trigram overlap
+        grams = trigrams(token)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.gram_words.get(gram, ()))
+
+        for word, shared in counts.items():
+            similarity = 2 * shared / (len(grams) + self.word_gram_count[word])
+            if similarity >= self.MIN_SIMILARITY and similarity > matches.get(word, 0):
+                matches[word] = similarity
+
+        return matches
+
+    def search(self, query):
+        """Return {sku: score} for books matching every query word"""
+        tokens = set(tokenize(query))
+        if not tokens:
+            return {}
+
+        matched = []
+        for token in tokens:
+            words = self.match_word(token)
+            if not words:
+                return {}
+            postings = sum(len(self.word_books[word]) for word in words)
+            matched.append((postings, sorted(words.items(), key=lambda ws: -ws[1])))
+
+        # Start from the most selective query word
+        matched.sort(key=lambda m: m[0])
+        result = self.scores_for(matched[0][1])
+
+        for postings, words in matched[1:]:
+            if postings <= len(result) * len(words):
+                # Cheaper to expand this word and intersect
+                scores = self.scores_for(words)
+                result = {
+                    sku: result[sku] + scores[sku]
+                    for sku in result.keys() & scores.keys()
+                }
+            else:
+                # Cheaper to probe the few remaining candidates
+                narrowed = {}
+                for sku, score in result.items():
+                    for word, similarity in words:
+                        if sku in self.word_books[word]:
+                            narrowed[sku] = score + similarity
+                            break
+                result = narrowed
+
+            if not result:
+                break
+
+        return result
+
+    def scores_for(self, words):
+        """Best similarity per SKU over a list of matched (word, similarity)"""
+        scores = {}
+        # Lowest similarity first so better matches overwrite
+        for word, similarity in sorted(words, key=lambda ws: ws[1]):
+            scores.update(dict.fromkeys(self.word_books[word], similarity))
+        return scores
+
+
+# ============ TABLE SORTING ============
+
+def sort_key(value):
+    """Sort key for a table cell: amounts, dates and times sort by value"""
+    text = str(value).strip()
+    if text in ('', '---', 'nan'):
+        return (2, 0, '')
+
+    # Dates (DD-MM-YYYY) and times (HH:MM AM/PM) as written in the sales files
+    if DATE_RE.match(text):
+        day, month, year = text.split('-')
+        return (0, int(year) * 10000 + int(month) * 100 + int(day), '')
+
+    if TIME_RE.match(text):
+        clock, half = text.split()
+        hour, minute = clock.split(':')
+        hour = int(hour) % 12 + (12 if half == 'PM' else 0)
+        return (0, hour * 60 + int(minute), '')
+
+    # Numbers and 'Rs' amounts
+    if NUMBER_RE.match(text):
+        return (0, float(text.replace('Rs', '').replace(',', '')), '')
+
+    return (1, 0, text.lower())
+
+
+class ColumnSorter:
+    """Per-column sort orders, computed once and reused until the data changes
+
+    key_funcs maps a column name to a function of a row id. Sorting a
+    filtered subset reuses the cached full ordering, and descending order
+    is just the ascending order reversed.
+    """
+
+    def __init__(self, key_funcs):
+        self.key_funcs = key_funcs
+        self._orders = {}   # column -> (version, ids in ascending order, {id: rank})
+
+    def invalidate(self):
+        """Forget every cached ordering"""
+        self._orders.clear()
+
+    def ordering(self, column, all_ids, version=0):
+        """Cached ascending order and rank map for a column"""
+        cached = self._orders.get(column)
+        if cached is None or cached[0] != version:
+            key = self.key_funcs[column]
+            ids = sorted(all_ids, key=key)
+            cached = (version, ids, {row_id: rank for rank, row_id in enumerate(ids)})
+            self._orders[column] = cached
+        return cached[1], cached[2]
+
+    def sort(self, ids, column, all_ids, version=0, descending=False):
+        """Return ids ordered by a column"""
+        ordered, rank = self.ordering(column, all_ids, version)
+
+        if len(ids) * 16 < len(ordered):
+            # Few rows: sort them by their cached rank (cheap integer keys)
+            result = sorted(ids, key=rank.__getitem__)
+        else:
+            # Many rows: walk the cached full order once
+            wanted = set(ids)
+            result = [row_id for row_id in ordered if row_id in wanted]
+
+        if descending:
+            result.reverse()
+        return result
+
+
+
+def unmoved_rows(old_order, new_order):
+    """Rows that can stay where they are when a table goes from one order to another
+
+    The longest run of rows shown in both orders whose relative order is
+    unchanged (a longest increasing subsequence of their old positions);
+    every other row of new_order has to be moved or inserted.
+    """
+    old_position = {row_id: i for i, row_id in enumerate(old_order)}
+    kept = [row_id for row_id in new_order if row_id in old_position]
+
+    # Best run of each length so far: old position and index in kept of its last row
+    tail_positions = []
+    tails = []
+    previous = [-1] * len(kept)
+    for i, row_id in enumerate(kept):
+        position = old_position[row_id]
+        k = bisect_left(tail_positions, position)
+        if k:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tail_positions.append(position)
+            tails.append(i)
+        else:
+            tail_positions[k] = position
+            tails[k] = i
+
+    unmoved = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        unmoved.add(kept[i])
+        i = previous[i]
+    return unmoved
+
+
+def reorder_rows(tree, old_order, new_order, insert_row):
+    """Bring a Treeview's top-level rows from old_order to new_order in few calls
+
+    Rows that keep their relative order are not touched; rows that leave
+    or move are detached in one call, then each moved row is put back at
+    its index. insert_row(row_id, index) creates rows the tree lacks.
+    """
+    unmoved = unmoved_rows(old_order, new_order)
+    if len(unmoved) != len(old_order):
+        tree.detach(*(row_id for row_id in old_order if row_id not in unmoved))
+    for index, row_id in enumerate(new_order):
+        if row_id in unmoved:
+            continue
+        if tree.exists(row_id):
+            tree.move(row_id, '', index)
+        else:
+            insert_row(row_id, index)
@@ -0,0 +1,824 @@
+"""
+Smart Book Shop Management & Billing System
+Shared data store for inventory and sales records
+Used by the desktop app and the headless services (no GUI imports here)
+"""
+
+import json
+import os
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from bookshop_pricehistory import PriceHistory
+from bookshop_pricing import PricingEngine
+from bookshop_search import FuzzyIndex
+
+# Valid book categories (school classes)
+CATEGORIES = ['9', '10', '11', '12']
+
+# Layout and styling of the sales Excel files
+SALES_COLUMNS = [
+    'Date',
+    'Time',
+    'Book Title',
+    'Class/Category',
+    'SKU / Serial Number',
+    'Unit Price (Rs)',
+    'Total Bill (Rs)',
+    'Timestamp'
+]
+SALES_HEADER_COLOR = "366092"
+SALES_COLUMN_WIDTHS = {'A': 15, 'B': 12, 'C': 35, 'D': 18, 'E': 22, 'F': 18, 'H': 20}
+
+
+class Book:
+    """Compact inventory record
+
+    Uses __slots__ instead of a per-book dict and shares one interned
+    string per category. Keeps the dict-style access the rest of the app
+    relies on: book['title'], dict(book), book.copy().
+    """
+
+    __slots__ = ('title', 'sku', 'category', 'price')
+    FIELDS = ('title', 'sku', 'category', 'price')
+
+    def __init__(self, title, sku, category, price):
+        self.title = title
+        self.sku = sku
+        self.category = sys.intern(str(category))
+        self.price = float(price)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a JSON/dict book"""
+        return cls(data['title'], data['sku'], data['category'], data['price'])
+
+    def to_dict(self):
+        """Plain dict for JSON output"""
+        return {
+            'title': self.title,
+            'sku': self.sku,
+            'category': self.category,
+            'price': self.price
+        }
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        if key == 'category':
+            value = sys.intern(str(value))
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def __repr__(self):
+        return f"Book({self.title!r}, {self.sku!r}, {self.category!r}, {self.price!r})"
+
+    def keys(self):
+        """Field names (lets dict(book) work)"""
+        return self.FIELDS
+
+    def get(self, key, default=None):
+        """Dict-style get"""
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def copy(self):
+        """Independent copy (e.g. one per unit in a cart)"""
+        return Book(self.title, self.sku, self.category, self.price)
+
+    def update(self, other):
+        """Copy every field from another book or dict"""
+        for key in self.FIELDS:
+            self[key] = other[key]
+
+
+def json_default(obj):
+    """json.dump hook that writes Book records as plain objects"""
+    if isinstance(obj, Book):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def validate_book(row):
+    """Clean one imported or stored book; returns (book, error message)"""
+    book = {field: str(row.get(field, '') or '').strip() for field in Book.FIELDS}
+
+    if not all(book.values()):
+        return None, "missing title, sku, category or price"
+    if book['category'] not in CATEGORIES:
+        return None, f"category must be {', '.join(CATEGORIES)}"
+    try:
+        book['price'] = float(book['price'].replace('Rs', '').replace(',', ''))
+        if book['price'] <= 0:
+            raise ValueError()
+    except ValueError:
+        return None, f"invalid price '{book['price']}'"
+    return book, None
+
+
+def write_sale_excel(filename, timestamp, cart, total):
+    """Append one sale to a daily Excel file, creating and formatting a new one"""
+    # Excel libraries are slow to import, so load them on first sale
+    import pandas as pd
+    from openpyxl import load_workbook
+    from openpyxl.styles import Font, Alignment, PatternFill
+
+    # Prepare sale data
+    sale_data = {
+        'Date': timestamp.strftime("%d-%m-%Y"),
+        'Time': timestamp.strftime("%I:%M %p"),
+        'Book Title': [],
+        'Class/Category': [],
+        'SKU / Serial Number': [],
+        'Unit Price (Rs)': [],
+        'Total Bill (Rs)': [],
+        # Full sale time as a real Excel date/time (for hourly reports)
+        'Timestamp': timestamp.replace(microsecond=0)
+    }
+
+    # Add each book
+    for i, book in enumerate(cart):
+        sale_data['Book Title'].append(book['title'])
+        sale_data['Class/Category'].append(f"Class {book['category']}")
+        sale_data['SKU / Serial Number'].append(book['sku'])
+        sale_data['Unit Price (Rs)'].append(f"Rs {book['price']:.2f}")
+
+        # Only show total on first row
+        if i == 0:
+            sale_data['Total Bill (Rs)'].append(f"Rs {total:.2f}")
+        else:
+            sale_data['Total Bill (Rs)'].append('')
+
+    # Check if file exists
+    if os.path.exists(filename):
+        # Append to existing file
+        existing_df = pd.read_excel(filename)
+        new_df = pd.DataFrame(sale_data)
+
+        # Add separator row (older files have no Timestamp column yet)
+        separator = pd.DataFrame(
+            [['---'] * len(existing_df.columns)],
+            columns=existing_df.columns
+        )
+
+        combined_df = pd.concat([existing_df, separator, new_df], ignore_index=True)
+        combined_df.to_excel(filename, index=False)
+    else:
+        # Create new file
+        df = pd.DataFrame(sale_data)
+        df.to_excel(filename, index=False)
+
+        # Format the Excel file
+        wb = load_workbook(filename)
+        ws = wb.active
+
+        # Header formatting
+        header_fill = PatternFill(
+            start_color=SALES_HEADER_COLOR,
+            end_color=SALES_HEADER_COLOR,
+            fill_type="solid"
+        )
+        header_font = Font(color="FFFFFF", bold=True, size=12)
+
+        for cell in ws[1]:
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+
+        # Column widths
+        for column, width in SALES_COLUMN_WIDTHS.items():
+            ws.column_dimensions[column].width = width
+
+        wb.save(filename)
+
+
+class JournalFile:
+    """Reading and appending journal.jsonl, without any node state
+
+    Enough to sync with another branch's folder without taking over
+    its node id or sequence counter.
+    """
+
+    def __init__(self, app_dir):
+        self.journal_file = os.path.join(app_dir, 'journal.jsonl')
+        self._lock = threading.RLock()
+        self.is_new = not os.path.exists(self.journal_file)
+
+    def append_remote(self, op):
+        """Append an operation received from another branch"""
+        with self._lock:
+            self._write([op])
+
+    def _write(self, ops):
+        """Write operations as JSON lines"""
+        with open(self.journal_file, 'a+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b'\n':
+                    self._drop_torn_tail(f, end)
+            f.write(''.join(json.dumps(op) + '\n' for op in ops).encode('utf-8'))
+        self.is_new = False
+
+    def _drop_torn_tail(self, f, end):
+        """Cut a partly written last line (crash mid-write) back to the last full line"""
+        position = end
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+    def read_from(self, offset):
+        """Yield (op, end_offset) for every operation after a byte offset"""
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                # A torn last line (crash mid-write) is left for the next pass
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue  # Written over a torn line by an older version
+                yield op, offset
+
+    def size(self):
+        """Current end offset of the journal"""
+        if not os.path.exists(self.journal_file):
+            return 0
+        return os.path.getsize(self.journal_file)
+
+
+class OpJournal(JournalFile):
+    """Append-only log of inventory and sales operations for branch sync
+
+    Every operation carries its origin node id and a per-node sequence
+    number, so peers can exchange only what they have not seen yet.
+    """
+
+    def __init__(self, app_dir):
+        super().__init__(app_dir)
+        self.node_file = os.path.join(app_dir, 'node.json')
+
+        if os.path.exists(self.node_file):
+            with open(self.node_file, 'r') as f:
+                node = json.load(f)
+        else:
+            node = {'node_id': uuid.uuid4().hex[:8], 'seq': 0}
+
+        self.node_id = node['node_id']
+        self.seq = node['seq']
+
+        # A crash after journaling an op but before saving node.json must not
+        # reuse its sequence number (and invoice id): take the highest in the journal
+        for op, _ in self.read_from(min(node.get('journal_size', 0), self.size())):
+            if op['node'] == self.node_id:
+                self.seq = max(self.seq, op['seq'])
+
+        if self.seq != node['seq'] or not os.path.exists(self.node_file):
+            self.save_node()
+
+    def save_node(self):
+        """Save this node's id and sequence counter atomically"""
+        temp_file = self.node_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({'node_id': self.node_id, 'seq': self.seq, 'journal_size': self.size()}, f, indent=4)
+        os.replace(temp_file, self.node_file)
+
+    @contextmanager
+    def reserved(self):
+        """Take the next sequence number for an operation recorded inside the block
+
+        Lets a sale carry its invoice id before it is journaled. The
+        counter is saved at once, so a crash cannot hand the number out
+        twice, and other operations wait so the journal stays in sequence
+        order (peers skip numbers below the highest they have seen).
+        """
+        with self._lock:
+            self.seq += 1
+            self.save_node()
+            yield self.seq
+
+    def op_id(self, seq):
+        """Operation (and invoice) id of one of this node's sequence numbers"""
+        return f"{self.node_id}-{seq}"
+
+    def record(self, op_type, seq=None, **fields):
+        """Append a locally originated operation and return it
+
+        seq is a number from reserved(); by default the next one is used.
+        """
+        with self._lock:
+            if seq is None:
+                self.seq += 1
+                seq = self.seq
+            op = self._new_op(op_type, seq, fields)
+            self._write([op])
+            self.save_node()
+        return op
+
+    def record_many(self, op_type, entries):
+        """Append one operation per dict of fields in a single write; returns them
+
+        For bulk changes (seeding, imports): the journal is opened and
+        node.json saved once, not once per operation.
+        """
+        with self._lock:
+            ops = []
+            for fields in entries:
+                self.seq += 1
+                ops.append(self._new_op(op_type, self.seq, fields))
+            if ops:
+                self._write(ops)
+                self.save_node()
+        return ops
+
+    def _new_op(self, op_type, seq, fields):
+        op = {
+            'id': self.op_id(seq),
+            'node': self.node_id,
+            'seq': seq,
+            'ts': datetime.now().isoformat(timespec='microseconds'),
+            'type': op_type
+        }
+        op.update(fields)
+        return op
+
+class BookShopStore:
+    """Inventory and sales storage rooted at a data directory"""
+
+    def __init__(self, base_dir='.'):
+        self.base_dir = base_dir
+        self.inventory_file = os.path.join(base_dir, 'Inventory', 'books.json')
+        self.booklists_file = os.path.join(base_dir, 'Inventory', 'booklists.json')
+        self.pricing_file = os.path.join(base_dir, 'Inventory', 'pricing_rules.json')
+        self.sales_dir = os.path.join(base_dir, 'Sales_Records')
+        self.app_dir = os.path.join(base_dir, 'Application_Files')
+
+        self.books = []
+        self._by_sku = {}
+        # Rows of books.json that failed validation: (position, error, row as stored)
+        self.invalid_books = []
+        self.class_buckets = {}    # category -> {sku: book}, in inventory order
+        self.search_index = FuzzyIndex()
+
+        # Bumped on every inventory change so cached views know to refresh
+        self.version = 0
+        # SKU -> version at which that book last changed, so views redraw only those rows
+        self.book_versions = {}
+
+        # The tablet service reads the inventory and booklists while the GUI edits them
+        self._lock = threading.RLock()
+
+        # Sales may be committed from the GUI and the tablet service at once
+        self._sales_lock = threading.Lock()
+        self._records_lock = threading.Lock()
+
+        # Called as listener(timestamp, cart, total, invoice_no) after each checkout
+        self.sale_listeners = []
+
+        # Called as listener(event, skus, renamed) after each inventory change:
+        # event is 'add', 'update' or 'delete', renamed maps old SKUs to new ones
+        self.inventory_listeners = []
+
+        self.setup_directories()
+        self.journal = OpJournal(self.app_dir)
+        self._sales_records = None
+        self._sales_index = None
+        # Set once the binary records hold the whole sales history
+        self.records_ready = threading.Event()
+        self.load_booklists()
+        self.load_pricing()
+
+        # Every list price each book has had, kept up to date from inventory changes
+        self.price_history = PriceHistory(os.path.join(base_dir, 'Inventory', 'price_history.jsonl'))
+
+    def setup_directories(self):
+        """Create necessary folders for the data directory"""
+        for folder in ['Inventory', 'Sales_Records', 'Application_Files']:
+            os.makedirs(os.path.join(self.base_dir, folder), exist_ok=True)
+
+    # ============ INVENTORY ============
+
+    def load_inventory(self):
+        """Load book inventory from file"""
+        self.invalid_books = []
+        if os.path.exists(self.inventory_file):
+            # Build records while parsing so the intermediate dicts are freed at once;
+            # a row that fails validation stays a plain dict and is set aside below
+            with open(self.inventory_file, 'r') as f:
+                rows = json.load(f, object_hook=self._load_book)
+
+            books = []
+            for position, row in enumerate(rows, 1):
+                if isinstance(row, Book):
+                    books.append(row)
+                else:
+                    _, error = validate_book(row) if isinstance(row, dict) else (None, "not a book record")
+                    self.invalid_books.append((position, error, row))
+        else:
+            books = []
+
+        with self._lock:
+            self.books = books
+            self._by_sku = {}
+            self.book_versions = {}
+            self.class_buckets = {}
+            self.search_index = FuzzyIndex()
+            for book in self.books:
+                self._index_book(book)
+            if not os.path.exists(self.inventory_file):
+                self.save_inventory()
+
+        # Start the price history with today's prices
+        if self.price_history.is_new:
+            self.price_history.seed(self.books)
+
+        # Seed a fresh journal with the existing catalogue so peers receive it
+        if self.journal.is_new:
+            self.journal.record_many('book_upsert', ({'sku': book['sku'], 'book': dict(book)} for book in self.books))
+
+        return self.books
+
+    @staticmethod
+    def _load_book(row):
+        """json object_hook: a Book for a valid row, the row itself otherwise"""
+        book, error = validate_book(row)
+        return row if error else Book.from_dict(book)
+
+    def save_inventory(self):
+        """Save book inventory to file
+
+        Rows that could not be loaded are written back unchanged, so
+        fixing them by hand never loses a book.
+        """
+        rows = self.books
+        if self.invalid_books:
+            rows = rows + [row for _, _, row in self.invalid_books]
+        with open(self.inventory_file, 'w') as f:
+            json.dump(rows, f, indent=4, default=json_default)
+
+    def _index_book(self, book):
+        """Add a book to the SKU map, its class bucket and the search index"""
+        self._by_sku[book['sku']] = book
+        self.class_buckets.setdefault(book['category'], {})[book['sku']] = book
+        self.search_index.add(book)
+        self.version += 1
+        self.book_versions[book['sku']] = self.version
+
+    def _unindex_book(self, book):
+        """Remove a book from the SKU map, its class bucket and the search index"""
+        del self._by_sku[book['sku']]
+        self.class_buckets[book['category']].pop(book['sku'], None)
+        self.search_index.remove(book['sku'])
+        self.version += 1
+        self.book_versions.pop(book['sku'], None)
+
+    def _reindex_book(self, book, old_sku, old_category):
+        """Refresh the indexes after a book was edited in place
+
+        A book that stays in its class keeps its place in the bucket, so
+        the bucket order still matches the inventory.
+        """
+        del self._by_sku[old_sku]
+        self._by_sku[book['sku']] = book
+        if book['category'] == old_category:
+            bucket = self.class_buckets[old_category]
+            if book['sku'] == old_sku:
+                bucket[old_sku] = book
+            else:
+                self.class_buckets[old_category] = {
+                    book['sku'] if sku == old_sku else sku: entry for sku, entry in bucket.items()
+                }
+        else:
+            self.class_buckets[old_category].pop(old_sku, None)
+            self.class_buckets.setdefault(book['category'], {})[book['sku']] = book
+        self.search_index.remove(old_sku)
+        self.search_index.add(book)
+        self.version += 1
+        self.book_versions.pop(old_sku, None)
+        self.book_versions[book['sku']] = self.version
+
+    def notify_inventory(self, event, skus, renamed=None, when=None):
+        """Log price changes, then tell every inventory listener which books changed
+
+        when is the time the change took effect (a synced operation's
+        time); None means now.
+        """
+        self._track_prices(event, skus, renamed or {}, when)
+        for listener in self.inventory_listeners:
+            listener(event, list(skus), renamed or {})
+
+    def _track_prices(self, event, skus, renamed, when=None):
+        """Log new books, renames and price edits in the price history"""
+        for old_sku, new_sku in renamed.items():
+            self.price_history.rename(old_sku, new_sku, when)
+        if event == 'delete':
+            return  # Old invoices still need a deleted book's prices
+        for sku in skus:
+            self.price_history.record(sku, self._by_sku[sku]['price'], when)
+
+    def locked(self):
+        """The inventory lock: hold it to read several books consistently from another thread
+
+        Books are edited in place, so a caller on another thread copies
+        them while holding it.
+        """
+        return self._lock
+
+    def get_book(self, sku):
+        """Return the book with the given SKU, or None"""
+        # A single dict lookup needs no lock
+        return self._by_sku.get(sku)
+
+    def skus(self):
+        """Live set-like view of every SKU in the inventory"""
+        return self._by_sku.keys()
+
+    def add_book(self, book):
+        """Add a new (already validated) book and save"""
+        with self._lock:
+            book = self.put_book(book)
+            self.save_inventory()
+            self.journal.record('book_upsert', sku=book['sku'], book=dict(book))
+        return book
+
+    def update_book(self, original_sku, title, sku, category, price):
+        """Update an existing book in place and save"""
+        with self._lock:
+            book = self._by_sku[original_sku]
+            old_category = book['category']
+            book['title'] = title
+            book['sku'] = sku
+            book['category'] = category
+            book['price'] = price
+            self._reindex_book(book, original_sku, old_category)
+            self.save_inventory()
+            self.journal.record('book_update', old_sku=original_sku, sku=sku, book=dict(book))
+            self.notify_inventory('update', [sku], {original_sku: sku} if sku != original_sku else None)
+
+            # Keep booklists pointing at the renamed SKU
+            if sku != original_sku:
+                renamed = False
+                for booklist in self.booklists.values():
+                    if original_sku in booklist['skus']:
+                        booklist['skus'] = [sku if s == original_sku else s for s in booklist['skus']]
+                        renamed = True
+                if renamed:
+                    self.save_booklists()
+        return book
+
+    def delete_book(self, sku):
+        """Delete a book by SKU and save"""
+        with self._lock:
+            book = self.remove_book(sku)
+            if book is not None:
+                self.save_inventory()
+                self.journal.record('book_delete', sku=sku)
+        return book
+
+    def put_book(self, book, when=None):
+        """Insert or replace a book in memory (no save, no journal)
+
+        when is the time the change took effect, for synced changes.
+        """
+        if not isinstance(book, Book):
+            book = Book.from_dict(book)
+        with self._lock:
+            existing = self._by_sku.get(book['sku'])
+            if existing is not None:
+                old_category = existing['category']
+                existing.update(book)
+                book = existing
+                self._reindex_book(book, book['sku'], old_category)
+            else:
+                self.books.append(book)
+                self._index_book(book)
+            self.notify_inventory('add' if existing is None else 'update', [book['sku']], when=when)
+        return book
+
+    def remove_book(self, sku):
+        """Remove a book from memory (no save, no journal)"""
+        with self._lock:
+            book = self._by_sku.get(sku)
+            if book is not None:
+                self._unindex_book(book)
+                self.books.remove(book)
+                self.notify_inventory('delete', [sku])
+        return book
+
+    def search_books(self, search_term='', category='All'):
+        """Return books matching a class filter and a (typo-tolerant) title/SKU search
+
+        With a search term, results are ranked best match first.
+        """
+        with self._lock:
+            bucket = None
+            if category != "All":
+                bucket = self.class_buckets.get(category, {})
+
+            if not search_term.strip():
+                return list(self.books) if bucket is None else list(bucket.values())
+
+            scores = self.search_index.search(search_term)
+            skus = scores
+
+            # Intersect the class bucket with the search hits, scanning the smaller side
+            if bucket is not None:
+                small, large = (scores, bucket) if len(scores) <= len(bucket) else (bucket, scores)
+                skus = [sku for sku in small if sku in large]
+
+            return sorted(
+                (self._by_sku[sku] for sku in skus),
+                key=lambda b: (-scores[b['sku']], b['title'])
+            )
+
+    # ============ PRICING ============
+
+    def load_pricing(self):
+        """Load and compile the discount/contract/tax rules"""
+        self.pricing = PricingEngine.load(self.pricing_file)
+        return self.pricing
+
+    # ============ BOOKLISTS ============
+
+    def load_booklists(self):
+        """Load the class/school booklists, keyed by their scan code"""
+        self.booklists = {}
+        if os.path.exists(self.booklists_file):
+            with open(self.booklists_file, 'r') as f:
+                self.booklists = {booklist['code']: booklist for booklist in json.load(f)}
+
+        # code -> (inventory version, books, missing SKUs, total)
+        self._bundle_cache = {}
+        return self.booklists
+
+    def save_booklists(self):
+        """Save booklists to file"""
+        with open(self.booklists_file, 'w') as f:
+            json.dump(list(self.booklists.values()), f, indent=4)
+        self._bundle_cache.clear()
+
+    def save_booklist(self, code, name, category, skus):
+        """Create or replace a booklist (a SKU listed twice sells two copies)"""
+        with self._lock:
+            self.booklists[code] = {'code': code, 'name': name, 'category': category, 'skus': list(skus)}
+            self.save_booklists()
+            return self.booklists[code]
+
+    def delete_booklist(self, code):
+        """Delete a booklist by code"""
+        with self._lock:
+            booklist = self.booklists.pop(code, None)
+            if booklist is not None:
+                self.save_booklists()
+        return booklist
+
+    def bundle(self, code):
+        """(books, missing SKUs, total) of a booklist, or None
+
+        Cached until the inventory changes, so adding a set to a cart is a
+        single lookup.
+        """
+        with self._lock:
+            booklist = self.booklists.get(code)
+            if booklist is None:
+                return None
+
+            cached = self._bundle_cache.get(code)
+            if cached is None or cached[0] != self.version:
+                books = []
+                missing = []
+                for sku in booklist['skus']:
+                    book = self._by_sku.get(sku)
+                    if book is None:
+                        missing.append(sku)
+                    else:
+                        books.append(book)
+                cached = (self.version, books, missing, sum(book['price'] for book in books))
+                self._bundle_cache[code] = cached
+            return cached[1:]
+
+    # ============ SALES ============
+
+    def sales_file(self, timestamp):
+        """Path of the daily sales file for a timestamp"""
+        return os.path.join(self.sales_dir, f"{timestamp.strftime('%d-%m-%Y')}.xlsx")
+
+    @property
+    def sales_records(self):
+        """Memory-mapped binary copy of every sale line (opened on first use)"""
+        # Checkouts from the GUI and the tablet service may get here at the same time
+        with self._records_lock:
+            if self._sales_records is None:
+                from bookshop_records import SalesRecordFile
+                records = SalesRecordFile(self.app_dir)
+                self._sales_records = records
+
+                # First run after upgrading: the Excel history is copied in on a
+                # background thread, so no checkout or screen waits for it
+                if not records.needs_build:
+                    self.records_ready.set()
+                elif any(name.endswith('.xlsx') for name in os.listdir(self.sales_dir)):
+                    threading.Thread(target=self.build_sales_records, daemon=True).start()
+                else:
+                    records.rebuild_from_excel(self.sales_dir)   # No history: nothing to read
+                    self.records_ready.set()
+        return self._sales_records
+
+    def build_sales_records(self):
+        """Rebuild the binary records from the Excel files; returns the line count
+
+        Sales go on while the files are read; they are held off only
+        while files that changed meanwhile are re-read and the new
+        records swapped in.
+        """
+        try:
+            return self.sales_records.rebuild_from_excel(self.sales_dir, pause=self._paused_sales)
+        finally:
+            self.records_ready.set()
+
+    @contextmanager
+    def _paused_sales(self):
+        """Hold off checkouts and synced sales (same lock order as checkout)"""
+        with self.journal._lock, self._sales_lock:
+            yield
+
+    @property
+    def sales_index(self):
+        """SKU / title word -> sale lines index over the binary records (built on first use)"""
+        records = self.sales_records
+        with self._records_lock:
+            if self._sales_index is None:
+                from bookshop_salesindex import SalesIndex
+                self._sales_index = SalesIndex(records)
+                self.sale_listeners.append(self._sales_index.record_sale)
+        return self._sales_index
+
+    def checkout(self, cart, timestamp=None, contract=None):
+        """Price and record a completed sale and return its invoice details
+
+        Lines are saved at the price actually charged, so the saved lines
+        add up to the saved total.
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+
+        # Calculate totals
+        lines, summary = self.pricing.price_cart(cart, contract)
+        total_amount = float(summary['total'])
+
+        # The invoice id is known up front so the binary records can store it
+        with self.journal.reserved() as seq:
+            self.save_sale_to_excel(timestamp, lines, summary['total'], self.journal.op_id(seq))
+            op = self.journal.record(
+                'sale',
+                seq=seq,
+                timestamp=timestamp.isoformat(timespec='seconds'),
+                items=[dict(book) for book in lines],
+                total=total_amount
+            )
+        self.notify_sale(timestamp, lines, total_amount, op['id'])
+
+        return {
+            'invoice_no': op['id'],
+            'date': timestamp.strftime("%d-%m-%Y"),
+            'time': timestamp.strftime("%I:%M %p"),
+            'items': lines,
+            'total_books': len(lines),
+            'subtotal': float(summary['subtotal']),
+            'discount': float(summary['discount']),
+            'tax': float(summary['tax']),
+            'total_amount': total_amount
+        }
+
+    def notify_sale(self, timestamp, cart, total, invoice_no):
+        """Tell every sale listener about a saved sale (local or synced)"""
+        for listener in self.sale_listeners:
+            listener(timestamp, cart, total, invoice_no)
+
+    def save_sale_to_excel(self, timestamp, cart, total, invoice_no=None):
+        """Save sale to daily Excel file (and the binary records, with its invoice id)"""
+        with self._sales_lock:
+            # Opened before this sale is written so a first-time build cannot count it twice
+            records = self.sales_records
+            write_sale_excel(self.sales_file(timestamp), timestamp, cart, total)
+            records.append_sale(timestamp, cart, invoice_no)
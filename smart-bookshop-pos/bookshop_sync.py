@@ -0,0 +1,267 @@
+"""
+Smart Book Shop Management & Billing System
+Offline branch-to-branch sync of sales and inventory
+Exchanges only journal entries the other branch has not seen yet
+
+Conflicts on the same SKU are resolved last-writer-wins on the
+(timestamp, node id, sequence) stamp of each operation, so both
+branches always settle on the same book. Sales are keyed by invoice
+id (node id + sequence) and are never applied twice.
+
+Usage:  python bookshop_sync.py <this shop's folder> <other shop's folder>
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+
+from bookshop_pricehistory import PriceHistory
+from bookshop_store import Book, BookShopStore, JournalFile, write_sale_excel
+
+# Operations that change a SKU, with the SKUs each one touches
+INVENTORY_OPS = {
+    'book_upsert': lambda op: [op['sku']],
+    'book_update': lambda op: [op['old_sku'], op['sku']],
+    'book_delete': lambda op: [op['sku']]
+}
+
+
+class PeerJournal(JournalFile):
+    """Another branch's journal: read and appended to, its node.json only read"""
+
+    def __init__(self, app_dir):
+        super().__init__(app_dir)
+        with open(os.path.join(app_dir, 'node.json'), 'r') as f:
+            self.node_id = json.load(f)['node_id']
+
+
+class PeerFolder:
+    """Another branch's data folder, synced without opening a store on it
+
+    A store would seed the folder's journal and price history and take
+    over its node.json. This only reads what sync needs and writes what
+    the applied operations change: their sales, their price history
+    entries and their books. Every other row of books.json is written
+    back exactly as it was read.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.inventory_file = os.path.join(base_dir, 'Inventory', 'books.json')
+        self.sales_dir = os.path.join(base_dir, 'Sales_Records')
+        self.app_dir = os.path.join(base_dir, 'Application_Files')
+        self.journal = PeerJournal(self.app_dir)
+        self.price_history = PriceHistory(os.path.join(base_dir, 'Inventory', 'price_history.jsonl'))
+        self.rows = None   # books.json as stored, read on the first inventory change
+
+    def sales_file(self, timestamp):
+        """Path of the daily sales file for a timestamp"""
+        return os.path.join(self.sales_dir, f"{timestamp.strftime('%d-%m-%Y')}.xlsx")
+
+    def save_sale_to_excel(self, timestamp, cart, total, invoice_no=None):
+        """Add a sale to the daily Excel file; the binary records catch up when next opened"""
+        from bookshop_records import request_build
+
+        os.makedirs(self.sales_dir, exist_ok=True)
+        write_sale_excel(self.sales_file(timestamp), timestamp, cart, total)
+        request_build(self.app_dir)
+
+    def notify_sale(self, timestamp, cart, total, invoice_no):
+        """Nothing is listening on a folder"""
+
+    def load_rows(self):
+        """books.json rows, as stored"""
+        if self.rows is None:
+            with open(self.inventory_file, 'r') as f:
+                self.rows = json.load(f)
+        return self.rows
+
+    def find_row(self, sku):
+        """Position of a SKU's row in books.json, or None"""
+        for position, row in enumerate(self.load_rows()):
+            if isinstance(row, dict) and row.get('sku') == sku:
+                return position
+        return None
+
+    def put_book(self, book, when=None):
+        """Insert or replace a book's row"""
+        book = Book.from_dict(book).to_dict()
+        position = self.find_row(book['sku'])
+        if position is None:
+            self.rows.append(book)
+        else:
+            self.rows[position] = book
+        self.price_history.record(book['sku'], book['price'], when)
+        return book
+
+    def remove_book(self, sku):
+        """Remove a book's row; returns it, or None if there was none"""
+        position = self.find_row(sku)
+        return None if position is None else self.rows.pop(position)
+
+    def save_inventory(self):
+        """Write books.json atomically, if put_book or remove_book read it"""
+        if self.rows is None:
+            return
+        temp_file = self.inventory_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.rows, f, indent=4)
+        os.replace(temp_file, self.inventory_file)
+
+
+class BranchSync:
+    """Delta replication state for one data directory"""
+
+    def __init__(self, store):
+        self.store = store
+        self.node_id = store.journal.node_id
+        self.state_file = os.path.join(store.app_dir, 'sync_state.json')
+        self.load_state()
+
+    def load_state(self):
+        """Load what this branch has already seen"""
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                self.state = json.load(f)
+        else:
+            self.state = {
+                'seen': {},          # node id -> highest sequence applied
+                'peer_offsets': {},  # node id -> bytes of its journal already read
+                'own_offset': 0,     # bytes of our own journal folded into 'stamps'
+                'stamps': {}         # sku -> winning [timestamp, node, seq]
+            }
+
+    def save_state(self):
+        """Save sync state atomically"""
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(temp_file, self.state_file)
+
+    def note(self, op):
+        """Record an operation as seen and update SKU stamps"""
+        seen = self.state['seen']
+        seen[op['node']] = max(seen.get(op['node'], 0), op['seq'])
+
+        if op['type'] in INVENTORY_OPS:
+            stamp = [op['ts'], op['node'], op['seq']]
+            for sku in INVENTORY_OPS[op['type']](op):
+                if self.is_newer(stamp, sku):
+                    self.state['stamps'][sku] = stamp
+
+    def is_newer(self, stamp, sku):
+        """True if an operation stamp beats the current winner for a SKU"""
+        current = self.state['stamps'].get(sku)
+        return current is None or stamp > current
+
+    def catch_up(self):
+        """Fold journal entries written since the last sync into the state"""
+        for op, offset in self.store.journal.read_from(self.state['own_offset']):
+            self.note(op)
+            self.state['own_offset'] = offset
+
+    def apply(self, op):
+        """Apply one remote operation; returns True if inventory changed"""
+        if op['type'] == 'sale':
+            timestamp = datetime.fromisoformat(op['timestamp'])
+            items = [Book.from_dict(item) for item in op['items']]
+            self.store.save_sale_to_excel(timestamp, items, op['total'], op['id'])
+            # Dashboard, quick keys and sales index see it like a local checkout
+            self.store.notify_sale(timestamp, items, op['total'], op['id'])
+            return False
+
+        stamp = [op['ts'], op['node'], op['seq']]
+        when = datetime.fromisoformat(op['ts'])
+        changed = False
+
+        if op['type'] == 'book_update' and op['old_sku'] != op['sku']:
+            self.store.price_history.rename(op['old_sku'], op['sku'], when)
+            if self.is_newer(stamp, op['old_sku']):
+                changed = self.store.remove_book(op['old_sku']) is not None
+
+        if op['type'] in ('book_upsert', 'book_update'):
+            if self.is_newer(stamp, op['sku']):
+                # Price changes take effect when they were made, not when synced
+                self.store.put_book(dict(op['book']), when)
+                changed = True
+
+        if op['type'] == 'book_delete':
+            if self.is_newer(stamp, op['sku']):
+                changed = self.store.remove_book(op['sku']) is not None
+
+        return changed
+
+    def pull(self, peer):
+        """Apply every operation from a peer that this branch has not seen"""
+        self.catch_up()
+
+        offset = self.state['peer_offsets'].get(peer.node_id, 0)
+
+        # The peer folder may have been restored from an older copy
+        if offset > peer.store.journal.size():
+            offset = 0
+
+        result = {'sales': 0, 'inventory': 0}
+        inventory_changed = False
+
+        for op, end in peer.store.journal.read_from(offset):
+            offset = end
+
+            if op['node'] == self.node_id or op['seq'] <= self.state['seen'].get(op['node'], 0):
+                continue
+
+            if self.apply(op):
+                inventory_changed = True
+            self.store.journal.append_remote(op)
+            self.note(op)
+
+            if op['type'] == 'sale':
+                result['sales'] += 1
+            else:
+                result['inventory'] += 1
+
+        if inventory_changed:
+            self.store.save_inventory()
+
+        self.state['peer_offsets'][peer.node_id] = offset
+        self.catch_up()
+        self.save_state()
+        return result
+
+    def sync_with(self, peer_dir):
+        """Two-way sync with another branch's data directory"""
+        required_files = (
+            os.path.join('Inventory', 'books.json'),
+            os.path.join('Application_Files', 'journal.jsonl'),
+            os.path.join('Application_Files', 'node.json')
+        )
+        for required in required_files:
+            if not os.path.exists(os.path.join(peer_dir, required)):
+                raise ValueError(f"{peer_dir} is not a book shop data folder (no {required}).")
+
+        peer = BranchSync(PeerFolder(peer_dir))
+
+        if peer.node_id == self.node_id:
+            raise ValueError("Cannot sync a folder with itself.")
+
+        received = self.pull(peer)
+        sent = peer.pull(self)
+        return {'received': received, 'sent': sent}
+
+
+# ============ MAIN ENTRY POINT ============
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    store = BookShopStore(sys.argv[1])
+    store.load_inventory()
+
+    result = BranchSync(store).sync_with(sys.argv[2])
+    print(f"Received {result['received']['sales']} sale(s), "
+          f"{result['received']['inventory']} inventory change(s)")
+    print(f"Sent {result['sent']['sales']} sale(s), "
+          f"{result['sent']['inventory']} inventory change(s)")
@@ -5,14 +5,26 @@ Using customtkinter for modern, clean UI
 """
 
 import customtkinter as ctk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, ttk, filedialog
 import json
 import os
+import queue
+import threading
 from datetime import datetime
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill
 import pandas as pd
 
+from bookshop_store import BookShopStore, CATEGORIES
+from bookshop_api import BookShopAPI, load_api_settings
+from bookshop_sync import BranchSync
+from bookshop_search import ColumnSorter, reorder_rows, sort_key
+from bookshop_quickkeys import QuickKeys
+from bookshop_autosave import CartAutosave, resolve_items
+from bookshop_integrity import IntegrityChecker
+from bookshop_reports import (
+    sales_files_in_range, load_sales_range, export_sales_excel, export_sales_csv,
+    sales_heatmap, WEEKDAYS, SalesDashboard
+)
+
 # Set appearance and color theme
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
@@ -21,28 +33,86 @@ ctk.set_default_color_theme("blue")
 class BookShopSystem:
     """Main application class for Book Shop Management System"""
     
+    # Sale lines shown per page of the sales browser
+    BROWSER_PAGE = 200
+    
+    # Books built per page of the Edit/Delete pickers
+    PICKER_PAGE = 50
+    
+    # Quick keys on the New Sale screen (the first 12 also get F1-F12)
+    QUICK_KEY_COUNT = 12
+    
     def __init__(self):
         self.root = ctk.CTk()
         self.root.title("Smart Book Shop Management & Billing System")
         self.root.geometry("1200x700")
         
         # Initialize data storage
-        self.setup_directories()
+        self.store = BookShopStore()
         self.load_credentials()
         self.load_inventory()
         
+        # Today's running sales counters (updated at every checkout)
+        self.dashboard = SalesDashboard()
+        try:
+            self.dashboard.rebuild(self.store.sales_dir)
+        except Exception:
+            pass  # An unreadable day file should not stop the app from starting
+        self.store.sale_listeners.append(self.dashboard.record_sale)
+        
+        # Best sellers per class for the New Sale quick keys
+        self.quick_keys = QuickKeys(self.store.app_dir)
+        self.store.sale_listeners.append(self.quick_keys.record_sale)
+        
+        # Open (on first run, build) the binary sales records without holding up the window
+        threading.Thread(target=self.prepare_sales_records, args=(self.quick_keys.is_new,), daemon=True).start()
+        
+        # Open screens that patch their rows when the inventory changes
+        self.inventory_views = []
+        self.store.inventory_listeners.append(self.on_inventory_change)
+        
         # Current user state
         self.logged_in = False
         self.current_cart = []
         
+        # The cart in progress survives crashes and accidental exits
+        self.cart_autosave = CartAutosave(self.store.app_dir)
+        
+        # Optional tablet service (started from the main menu)
+        self.api = None
+        
+        # Closing the window shuts down like Exit, so the autosaved cart is written out
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
+        
+        # Pending dashboard poll (cancelled whenever the screen changes)
+        self.dashboard_job = None
+        
+        # Cached column orders for the inventory table (reused across visits)
+        self.book_sorter = ColumnSorter({
+            'SKU': lambda sku: sku.lower(),
+            'Title': lambda sku: self.store.get_book(sku)['title'].lower(),
+            'Category': lambda sku: sort_key(self.store.get_book(sku)['category']),
+            'Price': lambda sku: self.store.get_book(sku)['price']
+        })
+        self.books_sort = None
+        
         # Show login screen
         self.show_login_screen()
         
-    def setup_directories(self):
-        """Create necessary folders for the system"""
-        folders = ['Inventory', 'Sales_Records', 'Application_Files']
-        for folder in folders:
-            os.makedirs(folder, exist_ok=True)
+    @property
+    def books(self):
+        """Book inventory held by the shared store"""
+        return self.store.books
+    
+    def prepare_sales_records(self, count_quick_keys):
+        """Background thread: open the binary sales records, then fill new quick keys from them"""
+        try:
+            records = self.store.sales_records
+            self.store.records_ready.wait()
+            if count_quick_keys:
+                self.quick_keys.rebuild(records)
+        except Exception:
+            pass  # Counts simply start from the next sale
     
     def load_credentials(self):
         """Load or create staff credentials"""
@@ -62,23 +132,76 @@ class BookShopSystem:
     
     def load_inventory(self):
         """Load book inventory from file"""
-        self.inventory_file = 'Inventory/books.json'
-        if os.path.exists(self.inventory_file):
-            with open(self.inventory_file, 'r') as f:
-                self.books = json.load(f)
-        else:
-            self.books = []
-            self.save_inventory()
+        self.inventory_file = self.store.inventory_file
+        self.store.load_inventory()
+        
+        # Bad pricing rules are skipped; the rest still apply
+        if self.store.pricing.errors:
+            messagebox.showwarning(
+                "Pricing Rules",
+                "Some pricing rules were skipped:\n\n" + "\n".join(self.store.pricing.errors[:10])
+            )
+        
+        # Bad rows are kept in books.json but left out of the shop until fixed
+        if self.store.invalid_books:
+            listed = "\n".join(
+                f"Book {position}: {error}" for position, error, _ in self.store.invalid_books[:10]
+            )
+            more = len(self.store.invalid_books) - 10
+            messagebox.showwarning(
+                "Inventory",
+                f"{len(self.store.invalid_books)} book(s) in books.json could not be loaded:\n\n{listed}"
+                + (f"\n... and {more} more" if more > 0 else "")
+            )
     
     def save_inventory(self):
         """Save book inventory to file"""
-        with open(self.inventory_file, 'w') as f:
-            json.dump(self.books, f, indent=4)
+        self.store.save_inventory()
     
     def clear_screen(self):
         """Clear all widgets from the window"""
         for widget in self.root.winfo_children():
             widget.destroy()
+        
+        # Quick-key hotkeys only apply on the New Sale screen
+        for i in range(1, self.QUICK_KEY_COUNT + 1):
+            self.root.unbind(f'<F{i}>')
+        
+        # The old screen's rows are gone, so it no longer follows the inventory
+        self.inventory_views = []
+        
+        # Only one dashboard polling loop at a time, and none off the main menu
+        if self.dashboard_job is not None:
+            self.root.after_cancel(self.dashboard_job)
+            self.dashboard_job = None
+    
+    def on_inventory_change(self, event, skus, renamed):
+        """Pass an inventory change on to the screens that are open"""
+        for view in list(self.inventory_views):
+            view(event, skus, renamed)
+    
+    def patch_book_rows(self, rows, parent, make_row, event, skus, renamed, category="All"):
+        """Apply an inventory change to a list of one-frame-per-book rows
+        
+        Changed books are redrawn in place, new books go to the end and
+        deleted books disappear; every other row is left alone.
+        """
+        for old_sku, new_sku in renamed.items():
+            if old_sku in rows:
+                rows[new_sku] = rows.pop(old_sku)
+        
+        for sku in skus:
+            old_row = rows.pop(sku, None)
+            book = self.store.get_book(sku)
+            if event != 'delete' and book is not None and category in ("All", book['category']):
+                row = make_row(parent, book)
+                if old_row is not None:
+                    row.pack(fill="x", pady=5, after=old_row)
+                else:
+                    row.pack(fill="x", pady=5)
+                rows[sku] = row
+            if old_row is not None:
+                old_row.destroy()
     
     # ============ LOGIN SYSTEM ============
     
@@ -178,15 +301,19 @@ class BookShopSystem:
             command=self.logout
         ).pack(side="right", padx=20)
         
-        # Menu buttons container
-        menu_frame = ctk.CTkFrame(self.root)
-        menu_frame.pack(expand=True, fill="both", padx=100, pady=50)
+        # Body: menu buttons on the left, today's dashboard on the right
+        body = ctk.CTkFrame(self.root, fg_color="transparent")
+        body.pack(expand=True, fill="both", padx=40, pady=(0, 20))
+        
+        menu_frame = ctk.CTkFrame(body)
+        menu_frame.pack(side="left", fill="y", padx=(0, 20))
         
         buttons = [
             ("🛒 New Sale", self.show_new_sale, "#28a745"),
             ("📦 Inventory Management", self.show_inventory_menu, "#007bff"),
             ("📊 Sales Reports", self.show_sales_reports, "#17a2b8"),
             ("🔐 Change Password", self.show_change_password, "#ffc107"),
+            (self.api_button_text(), self.toggle_api, "#6f42c1"),
             ("❌ Exit System", self.exit_system, "#6c757d")
         ]
         
@@ -195,12 +322,115 @@ class BookShopSystem:
                 menu_frame,
                 text=text,
                 width=400,
-                height=70,
+                height=60,
                 font=("Arial", 18, "bold"),
                 fg_color=color,
                 command=command
             )
-            btn.pack(pady=15)
+            btn.pack(pady=10, padx=20)
+        
+        self.show_dashboard(body)
+    
+    def show_dashboard(self, parent):
+        """Build the live 'Today' panel on the main menu"""
+        panel = ctk.CTkFrame(parent)
+        panel.pack(side="left", fill="both", expand=True)
+        
+        ctk.CTkLabel(
+            panel,
+            text="📈 Today",
+            font=("Arial", 22, "bold")
+        ).pack(pady=(15, 5))
+        
+        self.dash_labels = {}
+        for key, font in [
+            ('revenue', ("Arial", 26, "bold")),
+            ('invoices', ("Arial", 16)),
+            ('classes', ("Arial", 14))
+        ]:
+            label = ctk.CTkLabel(panel, text="", font=font)
+            label.pack(pady=5)
+            self.dash_labels[key] = label
+        
+        ctk.CTkLabel(
+            panel,
+            text="Recent Sales",
+            font=("Arial", 16, "bold")
+        ).pack(pady=(15, 5))
+        
+        self.dash_recent_label = ctk.CTkLabel(
+            panel,
+            text="",
+            font=("Courier New", 13),
+            justify="left"
+        )
+        self.dash_recent_label.pack(pady=5, padx=15)
+        
+        self.dash_version = None
+        self.refresh_dashboard()
+    
+    def refresh_dashboard(self):
+        """Redraw the dashboard if a sale happened since the last redraw"""
+        self.dashboard_job = None
+        
+        # Stop polling once the main menu is gone
+        if not self.dash_recent_label.winfo_exists():
+            return
+        
+        stats = self.dashboard.snapshot()
+        if stats['version'] != self.dash_version:
+            self.dash_version = stats['version']
+            
+            self.dash_labels['revenue'].configure(text=f"Rs {stats['revenue']:.2f}")
+            self.dash_labels['invoices'].configure(
+                text=f"{stats['invoices']} invoice(s) on {stats['day'].strftime('%d-%m-%Y')}"
+            )
+            self.dash_labels['classes'].configure(
+                text="   ".join(
+                    f"Class {c}: {stats['units_by_class'].get(c, 0)}" for c in CATEGORIES
+                )
+            )
+            
+            recent = [
+                f"{sale['time']:>8}  {sale['label']:<14} {sale['books']:>3} book(s)  Rs {sale['total']:>9.2f}"
+                for sale in stats['recent']
+            ]
+            self.dash_recent_label.configure(text="\n".join(recent) or "No sales yet today")
+        
+        # Tablet sales arrive on another thread, so poll (cheap when nothing changed)
+        self.dashboard_job = self.root.after(1000, self.refresh_dashboard)
+    
+    def api_button_text(self):
+        """Label for the tablet service menu button"""
+        if self.api is None:
+            return "📱 Start Tablet Service"
+        return f"📱 Stop Tablet Service (port {self.api.port})"
+    
+    def toggle_api(self):
+        """Start or stop the local HTTP service for tablets"""
+        if self.api is None:
+            try:
+                # This PC only, unless api_settings.json allows the shop network
+                settings = load_api_settings(self.store.app_dir)
+                api = BookShopAPI(self.store, settings['host'], settings['port'], settings['token'])
+                api.start_in_thread()
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Failed to start tablet service: {str(e)}")
+                return
+            self.api = api
+            if api.token:
+                reach = "Tablets must send the token from Application_Files/api_settings.json."
+            else:
+                reach = "Only this PC can connect (see README to allow the shop network)."
+            messagebox.showinfo(
+                "Tablet Service",
+                f"Tablet service running on port {api.port}.\n{reach}"
+            )
+        else:
+            self.api.stop()
+            self.api = None
+            messagebox.showinfo("Tablet Service", "Tablet service stopped.")
+        self.show_main_menu()
     
     def logout(self):
         """Logout with password confirmation"""
@@ -212,8 +442,20 @@ class BookShopSystem:
     def exit_system(self):
         """Exit the application"""
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
+            self.shutdown()
             self.root.quit()
     
+    def close_window(self):
+        """Window close button: shut down without asking (the cart is kept for next time)"""
+        self.shutdown()
+        self.root.destroy()
+    
+    def shutdown(self):
+        """Stop the tablet service and flush the autosaved cart"""
+        if self.api is not None:
+            self.api.stop()
+        self.cart_autosave.close()
+    
     # ============ INVENTORY MANAGEMENT ============
     
     def show_inventory_menu(self):
@@ -247,7 +489,9 @@ class BookShopSystem:
             ("➕ Add New Book", self.show_add_book),
             ("📝 Edit Book", self.show_edit_book),
             ("🗑️ Delete Book", self.show_delete_book),
-            ("📚 View All Books", self.show_view_books)
+            ("📚 View All Books", self.show_view_books),
+            ("📋 Class Booklists", self.show_booklists),
+            ("🔄 Sync With Branch", self.sync_with_branch)
         ]
         
         for text, command in buttons:
@@ -260,6 +504,25 @@ class BookShopSystem:
                 command=command
             ).pack(pady=12)
     
+    def sync_with_branch(self):
+        """Exchange new sales and inventory changes with another branch"""
+        folder = filedialog.askdirectory(title="Select the other shop's data folder")
+        if not folder:
+            return
+        
+        try:
+            result = BranchSync(self.store).sync_with(folder)
+        except Exception as e:
+            messagebox.showerror("Error", f"Sync failed: {str(e)}")
+            return
+        
+        received, sent = result['received'], result['sent']
+        messagebox.showinfo(
+            "Branch Sync",
+            f"Received {received['sales']} sale(s) and {received['inventory']} inventory change(s).\n"
+            f"Sent {sent['sales']} sale(s) and {sent['inventory']} inventory change(s)."
+        )
+    
     def show_add_book(self):
         """Display form to add a new book"""
         self.clear_screen()
@@ -344,12 +607,12 @@ class BookShopSystem:
                 return
             
             # Check if SKU already exists
-            if any(book['sku'] == sku for book in self.books):
+            if self.store.get_book(sku) is not None:
                 messagebox.showerror("Error", f"SKU '{sku}' already exists!")
                 return
             
             # Validate category
-            if category not in ['9', '10', '11', '12']:
+            if category not in CATEGORIES:
                 messagebox.showerror("Error", "Category must be 9, 10, 11, or 12.")
                 return
             
@@ -370,8 +633,7 @@ class BookShopSystem:
                 'price': price_value
             }
             
-            self.books.append(book)
-            self.save_inventory()
+            self.store.add_book(book)
             
             messagebox.showinfo("Success", f"Book '{title}' added successfully!")
             
@@ -384,6 +646,173 @@ class BookShopSystem:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add book: {str(e)}")
     
+    def show_booklists(self):
+        """Manage class/school booklists sold as one set"""
+        self.clear_screen()
+        
+        # Header
+        header = ctk.CTkFrame(self.root, height=70)
+        header.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            header,
+            text="📋 Class Booklists",
+            font=("Arial", 24, "bold")
+        ).pack(side="left", padx=20)
+        
+        ctk.CTkButton(
+            header,
+            text="← Back",
+            width=120,
+            height=40,
+            font=("Arial", 14),
+            command=self.show_inventory_menu
+        ).pack(side="right", padx=20)
+        
+        main_container = ctk.CTkFrame(self.root)
+        main_container.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        # Left side - existing booklists
+        list_frame = ctk.CTkScrollableFrame(main_container)
+        list_frame.pack(side="left", fill="both", expand=True, padx=(0, 10))
+        
+        if not self.store.booklists:
+            ctk.CTkLabel(
+                list_frame,
+                text="No booklists yet.",
+                font=("Arial", 14),
+                text_color="gray"
+            ).pack(pady=20)
+        
+        for code, booklist in self.store.booklists.items():
+            books, missing, total = self.store.bundle(code)
+            
+            row = ctk.CTkFrame(list_frame)
+            row.pack(fill="x", pady=5)
+            
+            text = f"{booklist['name']}  [{code}]\nClass {booklist['category']} | {len(books)} books | Rs {total:.2f}"
+            if missing:
+                text += f"\n⚠ Not in inventory: {', '.join(missing)}"
+            
+            ctk.CTkLabel(
+                row,
+                text=text,
+                font=("Arial", 13),
+                anchor="w",
+                justify="left"
+            ).pack(side="left", fill="x", expand=True, padx=10, pady=5)
+            
+            ctk.CTkButton(
+                row,
+                text="Delete",
+                width=80,
+                fg_color="#dc3545",
+                command=lambda c=code: self.delete_booklist(c)
+            ).pack(side="right", padx=5)
+            
+            ctk.CTkButton(
+                row,
+                text="Edit",
+                width=80,
+                command=lambda c=code: self.fill_booklist_form(c)
+            ).pack(side="right", padx=5)
+        
+        # Right side - create / edit form
+        form_frame = ctk.CTkFrame(main_container, width=420)
+        form_frame.pack(side="right", fill="y", padx=(10, 0))
+        
+        self.booklist_entries = {}
+        for label, key in [
+            ("Set Code (for scanning):", "code"),
+            ("Name (e.g. Class 10 Full Set):", "name"),
+            ("Class (9, 10, 11, 12):", "category")
+        ]:
+            ctk.CTkLabel(form_frame, text=label, font=("Arial", 14), anchor="w").pack(fill="x", padx=20, pady=(10, 0))
+            entry = ctk.CTkEntry(form_frame, width=380, height=35)
+            entry.pack(padx=20, pady=5)
+            self.booklist_entries[key] = entry
+        
+        ctk.CTkLabel(
+            form_frame,
+            text="SKUs (one per line, repeat for extra copies):",
+            font=("Arial", 14),
+            anchor="w"
+        ).pack(fill="x", padx=20, pady=(10, 0))
+        
+        self.booklist_skus_text = ctk.CTkTextbox(form_frame, width=380, height=220)
+        self.booklist_skus_text.pack(padx=20, pady=5)
+        
+        ctk.CTkButton(
+            form_frame,
+            text="Fill With All Books of Class",
+            height=35,
+            command=self.fill_booklist_with_class
+        ).pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkButton(
+            form_frame,
+            text="Save Booklist",
+            height=45,
+            font=("Arial", 16, "bold"),
+            fg_color="#28a745",
+            command=self.save_booklist
+        ).pack(fill="x", padx=20, pady=10)
+    
+    def fill_booklist_form(self, code):
+        """Load a booklist into the form for editing"""
+        booklist = self.store.booklists[code]
+        for key, entry in self.booklist_entries.items():
+            entry.delete(0, 'end')
+            entry.insert(0, booklist[key])
+        self.booklist_skus_text.delete("1.0", "end")
+        self.booklist_skus_text.insert("1.0", "\n".join(booklist['skus']))
+    
+    def fill_booklist_with_class(self):
+        """Put the SKU of every book in the chosen class into the form"""
+        category = self.booklist_entries['category'].get().strip()
+        if category not in CATEGORIES:
+            messagebox.showerror("Error", "Category must be 9, 10, 11, or 12.")
+            return
+        
+        skus = [book['sku'] for book in self.store.search_books('', category)]
+        self.booklist_skus_text.delete("1.0", "end")
+        self.booklist_skus_text.insert("1.0", "\n".join(skus))
+    
+    def save_booklist(self):
+        """Validate and save the booklist form"""
+        code = self.booklist_entries['code'].get().strip()
+        name = self.booklist_entries['name'].get().strip()
+        category = self.booklist_entries['category'].get().strip()
+        skus = [line.strip() for line in self.booklist_skus_text.get("1.0", "end").splitlines() if line.strip()]
+        
+        if not all([code, name, category]) or not skus:
+            messagebox.showerror("Error", "Please fill in all fields and at least one SKU.")
+            return
+        
+        if category not in CATEGORIES:
+            messagebox.showerror("Error", "Category must be 9, 10, 11, or 12.")
+            return
+        
+        unknown = [sku for sku in skus if self.store.get_book(sku) is None]
+        if unknown:
+            messagebox.showerror("Error", f"Unknown SKU(s): {', '.join(unknown)}")
+            return
+        
+        try:
+            self.store.save_booklist(code, name, category, skus)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save booklist: {str(e)}")
+            return
+        
+        messagebox.showinfo("Success", f"Booklist '{name}' saved!")
+        self.show_booklists()
+    
+    def delete_booklist(self, code):
+        """Delete a booklist after confirmation"""
+        if messagebox.askyesno("Confirm Delete", f"Delete booklist '{self.store.booklists[code]['name']}'?"):
+            self.store.delete_booklist(code)
+            self.show_booklists()
+    
     def show_view_books(self):
         """Display all books in a table"""
         self.clear_screen()
@@ -432,7 +861,11 @@ class BookShopSystem:
             font=("Arial", 14)
         ).pack(side="left", padx=(30, 10))
         
-        self.search_entry = ctk.CTkEntry(filter_frame, width=300)
+        self.search_entry = ctk.CTkEntry(
+            filter_frame,
+            width=300,
+            placeholder_text="Title or SKU (spelling mistakes are OK)"
+        )
         self.search_entry.pack(side="left", padx=10)
         self.search_entry.bind('<KeyRelease>', lambda e: self.update_book_table())
         
@@ -449,11 +882,8 @@ class BookShopSystem:
             height=20
         )
         
-        # Column headings
-        self.books_tree.heading('SKU', text='SKU / Serial')
-        self.books_tree.heading('Title', text='Book Title')
-        self.books_tree.heading('Category', text='Class')
-        self.books_tree.heading('Price', text='Unit Price (Rs)')
+        # Column headings (click to sort)
+        self.set_book_headings()
         
         # Column widths
         self.books_tree.column('SKU', width=150)
@@ -468,54 +898,216 @@ class BookShopSystem:
         self.books_tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
+        # Double-click a book to see when it sold
+        self.books_tree.bind(
+            '<Double-1>',
+            lambda e: self.show_book_history(self.books_tree.identify_row(e.y))
+        )
+        
+        # Rows are keyed by SKU; remember the book version each row shows and the visible order
+        self.books_tree_rows = {}
+        self.books_tree_order = []
+        self.books_tree_version = None
+        self.inventory_views.append(self.patch_book_table)
+        
         # Info label
         self.book_count_label = ctk.CTkLabel(
             self.root,
             text="",
             font=("Arial", 14)
         )
-        self.book_count_label.pack(pady=10)
+        self.book_count_label.pack(pady=(10, 0))
+        
+        ctk.CTkLabel(
+            self.root,
+            text="Double-click a book to see its sales history",
+            font=("Arial", 12),
+            text_color="gray"
+        ).pack(pady=(0, 10))
+        
+        self.update_book_table()
+    
+    def set_book_headings(self):
+        """Show inventory column headings with the current sort arrow"""
+        labels = {
+            'SKU': 'SKU / Serial',
+            'Title': 'Book Title',
+            'Category': 'Class',
+            'Price': 'Unit Price (Rs)'
+        }
+        for column, label in labels.items():
+            if self.books_sort and self.books_sort[0] == column:
+                label += " ▼" if self.books_sort[1] else " ▲"
+            self.books_tree.heading(
+                column,
+                text=label,
+                command=lambda c=column: self.sort_book_table(c)
+            )
+    
+    def sort_book_table(self, column):
+        """Sort the inventory table by a column (click again to reverse)"""
+        if self.books_sort and self.books_sort[0] == column:
+            self.books_sort = (column, not self.books_sort[1])
+        else:
+            self.books_sort = (column, False)
         
+        self.set_book_headings()
         self.update_book_table()
     
     def update_book_table(self):
-        """Update the book table with filters"""
-        # Clear existing items
-        for item in self.books_tree.get_children():
-            self.books_tree.delete(item)
+        """Update the book table with filters (only changed rows are touched)"""
+        # Filter books
+        filtered_books = self.store.search_books(
+            self.search_entry.get(),
+            self.filter_var.get()
+        )
         
-        # Get filter values
-        category_filter = self.filter_var.get()
-        search_term = self.search_entry.get().lower()
+        tree = self.books_tree
+        rows = self.books_tree_rows
+        versions = self.store.book_versions
         
-        # Filter books
-        filtered_books = self.books
+        # Apply the chosen column sort using the cached orderings
+        order = [book['sku'] for book in filtered_books]
+        if self.books_sort:
+            column, descending = self.books_sort
+            order = self.book_sorter.sort(
+                order, column, self.store.skus(), self.store.version, descending
+            )
         
-        if category_filter != "All":
-            filtered_books = [b for b in filtered_books if b['category'] == category_filter]
+        # Book data only changes with the inventory version, not between keystrokes
+        if self.books_tree_version != self.store.version:
+            # Drop rows for books that were deleted or renamed
+            for sku in rows.keys() - versions.keys():
+                tree.delete(sku)
+                del rows[sku]
+            self.books_tree_order = [sku for sku in self.books_tree_order if sku in rows]
+            
+            # Redraw rows (shown or detached) whose book changed since they were drawn
+            for sku, shown in rows.items():
+                if shown != versions[sku]:
+                    tree.item(sku, values=self.book_table_values(self.store.get_book(sku)))
+                    rows[sku] = versions[sku]
+            self.books_tree_version = self.store.version
         
-        if search_term:
-            filtered_books = [
-                b for b in filtered_books
-                if search_term in b['title'].lower() or search_term in b['sku'].lower()
-            ]
+        def insert_row(sku, index):
+            tree.insert('', index, iid=sku, values=self.book_table_values(self.store.get_book(sku)))
+            rows[sku] = versions[sku]
         
-        # Populate table
-        for book in filtered_books:
-            self.books_tree.insert('', 'end', values=(
-                book['sku'],
-                book['title'],
-                f"Class {book['category']}",
-                f"Rs {book['price']:.2f}"
-            ))
+        # Only rows that fell out, moved or are new are touched
+        reorder_rows(tree, self.books_tree_order, order, insert_row)
+        self.books_tree_order = order
         
         # Update count
         self.book_count_label.configure(
             text=f"Showing {len(filtered_books)} of {len(self.books)} books"
         )
     
-    def show_edit_book(self):
-        """Display interface to select and edit a book"""
+    def book_table_values(self, book):
+        """Cell values of a book's inventory table row"""
+        return (
+            book['sku'],
+            book['title'],
+            f"Class {book['category']}",
+            f"Rs {book['price']:.2f}"
+        )
+    
+    def sorted_book_position(self, order, sku):
+        """Index at which a SKU belongs in the sorted table order (binary search)"""
+        column, descending = self.books_sort
+        key = self.book_sorter.key_funcs[column]
+        target = key(sku)
+        
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            value = key(order[middle])
+            if (value >= target) if descending else (value <= target):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def patch_book_table(self, event, skus, renamed):
+        """Apply an inventory change to the open table, touching only those rows"""
+        if self.search_entry.get().strip():
+            # Matches and their ranking depend on the search; the diffing refresh handles it
+            self.update_book_table()
+            return
+        
+        tree = self.books_tree
+        rows = self.books_tree_rows
+        order = self.books_tree_order
+        
+        # A renamed book keeps its place in inventory order
+        places = {}
+        for old_sku, new_sku in renamed.items():
+            if old_sku in order:
+                places[new_sku] = order.index(old_sku)
+        
+        for sku in list(renamed) + (skus if event == 'delete' else []):
+            if sku in rows:
+                tree.delete(sku)
+                del rows[sku]
+            if sku in order:
+                order.remove(sku)
+        
+        if event != 'delete':
+            category = self.filter_var.get()
+            for sku in skus:
+                book = self.store.get_book(sku)
+                if book is None:
+                    continue
+                values = self.book_table_values(book)
+                version = self.store.book_versions[sku]
+                
+                if category not in ("All", book['category']):
+                    # Moved out of the filtered class: hide the row
+                    if sku in order:
+                        tree.detach(sku)
+                        order.remove(sku)
+                    if sku in rows and rows[sku] != version:
+                        tree.item(sku, values=values)
+                        rows[sku] = version
+                    continue
+                
+                if sku not in rows:
+                    tree.insert('', 'end', iid=sku, values=values)
+                    rows[sku] = version
+                elif rows[sku] != version:
+                    tree.item(sku, values=values)
+                    rows[sku] = version
+                
+                if sku in order:
+                    if not self.books_sort:
+                        continue
+                    order.remove(sku)
+                
+                if self.books_sort:
+                    index = self.sorted_book_position(order, sku)
+                else:
+                    index = places.get(sku, len(order))
+                tree.move(sku, '', index)
+                order.insert(index, sku)
+        self.books_tree_version = self.store.version
+        
+        self.book_count_label.configure(
+            text=f"Showing {len(order)} of {len(self.books)} books"
+        )
+    
+    def show_book_history(self, sku):
+        """Every sale of one book, from the sales index (no Excel files opened)"""
+        book = self.store.get_book(sku)
+        if book is None:
+            return
+        
+        try:
+            index = self.store.sales_index
+            summary = index.sell_through(sku)
+            postings = index.postings(sku)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not read the sales history: {str(e)}")
+            return
+        
         self.clear_screen()
         
         # Header
@@ -524,8 +1116,8 @@ class BookShopSystem:
         
         ctk.CTkLabel(
             header,
-            text="📝 Edit Book",
-            font=("Arial", 24, "bold")
+            text=f"📈 Sales History: {book['title']}",
+            font=("Arial", 22, "bold")
         ).pack(side="left", padx=20)
         
         ctk.CTkButton(
@@ -534,45 +1126,48 @@ class BookShopSystem:
             width=120,
             height=40,
             font=("Arial", 14),
-            command=self.show_inventory_menu
+            command=self.show_view_books
         ).pack(side="right", padx=20)
         
-        if not self.books:
+        if not postings:
             ctk.CTkLabel(
                 self.root,
-                text="No books in inventory. Please add books first.",
+                text=f"{sku} has not been sold yet.",
                 font=("Arial", 18)
             ).pack(expand=True)
             return
         
-        # Selection frame
-        select_frame = ctk.CTkFrame(self.root)
-        select_frame.pack(fill="both", expand=True, padx=50, pady=20)
-        
+        days = summary['days']
         ctk.CTkLabel(
-            select_frame,
-            text="Select a book to edit:",
-            font=("Arial", 16, "bold")
-        ).pack(pady=20)
+            self.root,
+            text=f"{summary['copies']} copies in {summary['sales']} sale(s), Rs {summary['revenue']:,.2f} | "
+                 f"First sold {days[0][0]:%d-%m-%Y}, last sold {days[-1][0]:%d-%m-%Y} "
+                 f"({len(days)} day(s) with sales)",
+            font=("Arial", 16)
+        ).pack(pady=10)
         
-        # Book list
-        list_frame = ctk.CTkScrollableFrame(select_frame, height=400)
-        list_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        # Set each sale beside the list price in force at the time
+        list_prices = self.store.price_history.prices_at(
+            [sku] * len(postings), [posting['timestamp'] for posting in postings]
+        )
         
-        for book in self.books:
-            btn_text = f"{book['title']} | SKU: {book['sku']} | Class {book['category']} | Rs {book['price']:.2f}"
-            ctk.CTkButton(
-                list_frame,
-                text=btn_text,
-                width=700,
-                height=50,
-                font=("Arial", 14),
-                anchor="w",
-                command=lambda b=book: self.edit_book_form(b)
-            ).pack(pady=5)
+        columns = ['Date', 'Time', 'Invoice', 'Copies', 'Unit Price (Rs)', 'List Price Then (Rs)', 'Amount (Rs)']
+        rows = [
+            [
+                posting['timestamp'].strftime("%d-%m-%Y"),
+                posting['timestamp'].strftime("%I:%M %p"),
+                posting['invoice'] or f"Sale #{posting['sale']}",
+                str(posting['qty']),
+                f"{posting['price']:.2f}",
+                f"{list_price:.2f}" if pd.notna(list_price) else "",
+                f"{posting['amount']:.2f}"
+            ]
+            for posting, list_price in reversed(list(zip(postings, list_prices.tolist())))
+        ]
+        self.build_report_table(columns, rows)
     
-    def edit_book_form(self, book):
-        """Display edit form for selected book"""
+    def show_edit_book(self):
+        """Display interface to select and edit a book"""
         self.clear_screen()
         
         # Header
@@ -581,8 +1176,8 @@ class BookShopSystem:
         
         ctk.CTkLabel(
             header,
-            text=f"📝 Editing: {book['title']}",
-            font=("Arial", 20, "bold")
+            text="📝 Edit Book",
+            font=("Arial", 24, "bold")
         ).pack(side="left", padx=20)
         
         ctk.CTkButton(
@@ -591,25 +1186,194 @@ class BookShopSystem:
             width=120,
             height=40,
             font=("Arial", 14),
-            command=self.show_edit_book
+            command=self.show_inventory_menu
         ).pack(side="right", padx=20)
         
-        # Form
-        form_frame = ctk.CTkFrame(self.root)
-        form_frame.pack(expand=True, padx=100, pady=20)
-        
-        fields = [
-            ("Book Title:", "title", book['title']),
-            ("SKU / Serial Number:", "sku", book['sku']),
-            ("Category/Class:", "category", book['category']),
-            ("Unit Price (Rs):", "price", str(book['price']))
-        ]
+        if not self.books:
+            ctk.CTkLabel(
+                self.root,
+                text="No books in inventory. Please add books first.",
+                font=("Arial", 18)
+            ).pack(expand=True)
+            return
         
-        self.edit_entries = {}
+        # Selection frame
+        select_frame = ctk.CTkFrame(self.root)
+        select_frame.pack(fill="both", expand=True, padx=50, pady=20)
         
-        for label, key, value in fields:
-            row = ctk.CTkFrame(form_frame)
-            row.pack(pady=15, fill="x", padx=50)
+        ctk.CTkLabel(
+            select_frame,
+            text="Select a book to edit:",
+            font=("Arial", 16, "bold")
+        ).pack(pady=20)
+        
+        self.show_book_picker(select_frame, self.make_edit_picker_row, height=400)
+    
+    def show_book_picker(self, parent, make_row, height):
+        """Build a searchable Edit/Delete picker and keep it in step with the inventory
+        
+        Only one page of matching books is built at a time; "Load more"
+        adds the next page below it.
+        """
+        self.picker_make_row = make_row
+        
+        self.picker_search_entry = ctk.CTkEntry(
+            parent,
+            width=400,
+            placeholder_text="Search by title or SKU"
+        )
+        self.picker_search_entry.pack(padx=20, pady=5)
+        self.picker_search_entry.bind('<KeyRelease>', lambda e: self.update_book_picker())
+        self.picker_search_entry.focus()
+        
+        # Book list
+        self.picker_frame = ctk.CTkScrollableFrame(parent, height=height)
+        self.picker_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        footer = ctk.CTkFrame(parent, fg_color="transparent")
+        footer.pack(fill="x", padx=20, pady=(0, 10))
+        
+        self.picker_status = ctk.CTkLabel(footer, text="", font=("Arial", 12))
+        self.picker_status.pack(side="left")
+        
+        self.picker_more_button = ctk.CTkButton(
+            footer,
+            text="Load more",
+            width=160,
+            command=self.load_picker_page
+        )
+        self.picker_more_button.pack(side="right")
+        
+        self.update_book_picker()
+        self.inventory_views.append(self.patch_book_picker)
+    
+    def update_book_picker(self):
+        """Show the first page of books matching the picker search"""
+        for widget in self.picker_frame.winfo_children():
+            widget.destroy()
+        
+        self.picker_matches = list(self.store.search_books(self.picker_search_entry.get()))
+        self.picker_rows = {}
+        self.load_picker_page()
+    
+    def load_picker_page(self):
+        """Add the next page of matching books to the picker"""
+        start = len(self.picker_rows)
+        for book in self.picker_matches[start:start + self.PICKER_PAGE]:
+            row = self.picker_make_row(self.picker_frame, book)
+            row.pack(fill="x", pady=5)
+            self.picker_rows[book['sku']] = row
+        self.update_picker_status()
+    
+    def update_picker_status(self):
+        """Refresh the picker's count and its "Load more" button"""
+        shown, total = len(self.picker_rows), len(self.picker_matches)
+        self.picker_status.configure(text=f"Showing {shown} of {total} books")
+        
+        remaining = min(self.PICKER_PAGE, total - shown)
+        if remaining > 0:
+            self.picker_more_button.configure(text=f"Load {remaining} more", state="normal")
+        else:
+            self.picker_more_button.configure(text="All loaded", state="disabled")
+    
+    def patch_book_picker(self, event, skus, renamed):
+        """Apply an inventory change to the open Edit/Delete picker
+        
+        Rows that are built are patched in place and the unbuilt part of
+        the list is updated to match, so a delete only removes its row.
+        """
+        if event != 'delete' and self.picker_search_entry.get().strip():
+            self.update_book_picker()   # The change may alter which books match
+            return
+        
+        all_loaded = len(self.picker_rows) == len(self.picker_matches)
+        original = {new_sku: old_sku for old_sku, new_sku in renamed.items()}
+        
+        # sku (before any rename) -> book as it is now, None once deleted
+        changed = {
+            original.get(sku, sku): None if event == 'delete' else self.store.get_book(sku)
+            for sku in skus
+        }
+        matches = []
+        for book in self.picker_matches:
+            # Books are edited in place, so a renamed one may already show its new SKU
+            sku = original.get(book['sku'], book['sku'])
+            if sku in changed:
+                book = changed.pop(sku)
+                if book is None:
+                    continue
+            matches.append(book)
+        # New books go to the end of the list
+        matches.extend(book for book in changed.values() if book is not None)
+        self.picker_matches = matches
+        
+        # A new book gets a row only if the list was loaded to the end
+        visible = [
+            sku for sku in skus
+            if original.get(sku, sku) in self.picker_rows or (event == 'add' and all_loaded)
+        ]
+        self.patch_book_rows(
+            self.picker_rows, self.picker_frame, self.picker_make_row, event, visible, renamed
+        )
+        self.update_picker_status()
+    
+    def book_picker_text(self, book):
+        """One-line description of a book in the Edit/Delete pickers"""
+        return f"{book['title']} | SKU: {book['sku']} | Class {book['category']} | Rs {book['price']:.2f}"
+    
+    def make_edit_picker_row(self, parent, book):
+        """One book in the Edit Book picker"""
+        row = ctk.CTkFrame(parent, fg_color="transparent")
+        ctk.CTkButton(
+            row,
+            text=self.book_picker_text(book),
+            width=700,
+            height=50,
+            font=("Arial", 14),
+            anchor="w",
+            command=lambda b=book: self.edit_book_form(b)
+        ).pack()
+        return row
+    
+    def edit_book_form(self, book):
+        """Display edit form for selected book"""
+        self.clear_screen()
+        
+        # Header
+        header = ctk.CTkFrame(self.root, height=70)
+        header.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            header,
+            text=f"📝 Editing: {book['title']}",
+            font=("Arial", 20, "bold")
+        ).pack(side="left", padx=20)
+        
+        ctk.CTkButton(
+            header,
+            text="← Back",
+            width=120,
+            height=40,
+            font=("Arial", 14),
+            command=self.show_edit_book
+        ).pack(side="right", padx=20)
+        
+        # Form
+        form_frame = ctk.CTkFrame(self.root)
+        form_frame.pack(expand=True, padx=100, pady=20)
+        
+        fields = [
+            ("Book Title:", "title", book['title']),
+            ("SKU / Serial Number:", "sku", book['sku']),
+            ("Category/Class:", "category", book['category']),
+            ("Unit Price (Rs):", "price", str(book['price']))
+        ]
+        
+        self.edit_entries = {}
+        
+        for label, key, value in fields:
+            row = ctk.CTkFrame(form_frame)
+            row.pack(pady=15, fill="x", padx=50)
             
             ctk.CTkLabel(
                 row,
@@ -656,11 +1420,11 @@ class BookShopSystem:
             
             # Check SKU conflict
             if new_sku != original_sku:
-                if any(book['sku'] == new_sku for book in self.books):
+                if self.store.get_book(new_sku) is not None:
                     messagebox.showerror("Error", f"SKU '{new_sku}' already exists!")
                     return
             
-            if category not in ['9', '10', '11', '12']:
+            if category not in CATEGORIES:
                 messagebox.showerror("Error", "Category must be 9, 10, 11, or 12.")
                 return
             
@@ -673,15 +1437,7 @@ class BookShopSystem:
                 return
             
             # Update book
-            for book in self.books:
-                if book['sku'] == original_sku:
-                    book['title'] = title
-                    book['sku'] = new_sku
-                    book['category'] = category
-                    book['price'] = price_value
-                    break
-            
-            self.save_inventory()
+            self.store.update_book(original_sku, title, new_sku, category, price_value)
             messagebox.showinfo("Success", "Book updated successfully!")
             self.show_inventory_menu()
             
@@ -729,42 +1485,37 @@ class BookShopSystem:
             font=("Arial", 16, "bold")
         ).pack(pady=20)
         
-        # Book list
-        list_frame = ctk.CTkScrollableFrame(select_frame, height=500)
-        list_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        self.show_book_picker(select_frame, self.make_delete_picker_row, height=500)
+    
+    def make_delete_picker_row(self, parent, book):
+        """One book in the Delete Book picker"""
+        btn_frame = ctk.CTkFrame(parent)
         
-        for book in self.books:
-            btn_text = f"{book['title']} | SKU: {book['sku']} | Class {book['category']} | Rs {book['price']:.2f}"
-            
-            btn_frame = ctk.CTkFrame(list_frame)
-            btn_frame.pack(fill="x", pady=5)
-            
-            ctk.CTkLabel(
-                btn_frame,
-                text=btn_text,
-                font=("Arial", 14),
-                anchor="w"
-            ).pack(side="left", fill="x", expand=True, padx=10)
-            
-            ctk.CTkButton(
-                btn_frame,
-                text="Delete",
-                width=100,
-                height=35,
-                fg_color="#dc3545",
-                command=lambda b=book: self.delete_book(b)
-            ).pack(side="right", padx=10)
+        ctk.CTkLabel(
+            btn_frame,
+            text=self.book_picker_text(book),
+            font=("Arial", 14),
+            anchor="w"
+        ).pack(side="left", fill="x", expand=True, padx=10)
+        
+        ctk.CTkButton(
+            btn_frame,
+            text="Delete",
+            width=100,
+            height=35,
+            fg_color="#dc3545",
+            command=lambda b=book: self.delete_book(b)
+        ).pack(side="right", padx=10)
+        return btn_frame
     
     def delete_book(self, book):
-        """Delete a book after confirmation"""
+        """Delete a book after confirmation (the picker drops just its row)"""
         if messagebox.askyesno(
             "Confirm Delete",
             f"Are you sure you want to delete:\n\n{book['title']} (SKU: {book['sku']})?"):
             
-            self.books = [b for b in self.books if b['sku'] != book['sku']]
-            self.save_inventory()
+            self.store.delete_book(book['sku'])
             messagebox.showinfo("Success", "Book deleted successfully!")
-            self.show_delete_book()
     
     # ============ SALES / BILLING SYSTEM ============
     
@@ -772,6 +1523,8 @@ class BookShopSystem:
         """Display new sale / billing interface"""
         self.clear_screen()
         self.current_cart = []
+        self.sale_contract = None
+        self.cart_pricer = self.store.pricing.cart()
         
         # Header
         header = ctk.CTkFrame(self.root, height=70)
@@ -829,12 +1582,72 @@ class BookShopSystem:
             filter_frame,
             values=["All", "9", "10", "11", "12"],
             variable=self.sale_filter_var,
-            command=lambda x: self.update_sale_books()
+            command=lambda x: (self.update_sale_books(), self.update_quick_keys())
         ).pack(side="left", padx=5)
         
-        # Book list
+        self.sale_search_entry = ctk.CTkEntry(
+            filter_frame,
+            width=200,
+            placeholder_text="Search, or scan SKU / set code"
+        )
+        self.sale_search_entry.pack(side="left", padx=(15, 5))
+        self.sale_search_entry.bind('<KeyRelease>', lambda e: self.update_sale_books())
+        self.sale_search_entry.bind('<Return>', lambda e: self.scan_sale_entry())
+        self.sale_search_entry.focus()
+        
+        # Booklists: a whole class set in one action
+        if self.store.booklists:
+            bundle_frame = ctk.CTkFrame(left_frame)
+            bundle_frame.pack(fill="x", padx=10, pady=5)
+            
+            ctk.CTkLabel(
+                bundle_frame,
+                text="Booklist:",
+                font=("Arial", 14)
+            ).pack(side="left", padx=5)
+            
+            self.bundle_choices = {self.bundle_label(code): code for code in self.store.booklists}
+            self.sale_bundle_var = ctk.StringVar(value=next(iter(self.bundle_choices)))
+            ctk.CTkOptionMenu(
+                bundle_frame,
+                values=list(self.bundle_choices),
+                variable=self.sale_bundle_var,
+                width=360
+            ).pack(side="left", padx=5)
+            
+            ctk.CTkButton(
+                bundle_frame,
+                text="Add Set",
+                width=100,
+                fg_color="#28a745",
+                command=lambda: self.add_bundle_to_cart(self.bundle_choices[self.sale_bundle_var.get()])
+            ).pack(side="left", padx=5)
+        
+        # Quick keys: this class's best sellers, one click (or F-key) away
+        self.quick_keys_frame = ctk.CTkFrame(left_frame)
+        self.quick_keys_frame.pack(fill="x", padx=10, pady=5)
+        for i in range(1, self.QUICK_KEY_COUNT + 1):
+            self.root.bind(f'<F{i}>', lambda e, n=i - 1: self.press_quick_key(n))
+        
+        # Book list: a page at a time, drawn on a pool of reused rows
         self.sale_books_frame = ctk.CTkScrollableFrame(left_frame, height=450)
         self.sale_books_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.sale_row_pool = []
+        self.sale_shown = 0
+        
+        footer = ctk.CTkFrame(left_frame, fg_color="transparent")
+        footer.pack(fill="x", padx=10, pady=(0, 10))
+        
+        self.sale_status = ctk.CTkLabel(footer, text="", font=("Arial", 12))
+        self.sale_status.pack(side="left")
+        
+        self.sale_more_button = ctk.CTkButton(
+            footer,
+            text="Load more",
+            width=160,
+            command=self.load_sale_page
+        )
+        self.sale_more_button.pack(side="right")
         
         # Right side - Cart
         right_frame = ctk.CTkFrame(main_container, width=400)
@@ -846,10 +1659,37 @@ class BookShopSystem:
             font=("Arial", 18, "bold")
         ).pack(pady=10)
         
+        # School contract pricing
+        if self.store.pricing.contracts:
+            contract_frame = ctk.CTkFrame(right_frame)
+            contract_frame.pack(fill="x", padx=10)
+            
+            ctk.CTkLabel(
+                contract_frame,
+                text="Customer:",
+                font=("Arial", 14)
+            ).pack(side="left", padx=5)
+            
+            self.contract_menu = ctk.CTkOptionMenu(
+                contract_frame,
+                values=["Walk-in"] + list(self.store.pricing.contracts),
+                command=self.set_sale_contract
+            )
+            self.contract_menu.pack(side="left", fill="x", expand=True, padx=5)
+        
         # Cart display
         self.cart_frame = ctk.CTkScrollableFrame(right_frame, height=350)
         self.cart_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
+        # Discount / tax breakdown (shown when pricing rules apply)
+        self.price_breakdown_label = ctk.CTkLabel(
+            right_frame,
+            text="",
+            font=("Arial", 13),
+            text_color="gray"
+        )
+        self.price_breakdown_label.pack()
+        
         # Total
         self.total_label = ctk.CTkLabel(
             right_frame,
@@ -880,42 +1720,222 @@ class BookShopSystem:
         ).pack(fill="x", pady=5)
         
         self.update_sale_books()
+        self.update_quick_keys()
         self.update_cart_display()
+        self.inventory_views.append(self.patch_sale_books)
+        self.offer_cart_restore()
     
-    def update_sale_books(self):
-        """Update the available books list for sale"""
-        # Clear existing
-        for widget in self.sale_books_frame.winfo_children():
+    def offer_cart_restore(self):
+        """Offer to bring back a cart left unfinished by a crash or exit"""
+        saved = self.cart_autosave.load()
+        if saved is None:
+            return
+        
+        if messagebox.askyesno(
+            "Restore Cart",
+            f"An unfinished cart with {len(saved['items'])} book(s) was saved at "
+            f"{saved['saved_at'].strftime('%I:%M %p on %d-%m-%Y')}.\n\nRestore it?"
+        ):
+            if saved['contract'] in self.store.pricing.contracts:
+                self.contract_menu.set(saved['contract'])
+                self.sale_contract = saved['contract']
+                self.cart_pricer = self.store.pricing.cart(self.sale_contract)
+            
+            # The inventory may have changed since the cart was saved
+            books, missing, repriced = resolve_items(saved['items'], self.store.get_book)
+            self.add_cart_lines(books)
+            
+            notes = []
+            if missing:
+                notes.append("No longer in the inventory (left out):\n" + "\n".join(missing[:10]))
+            if repriced:
+                notes.append("Now sold at the current price:\n" + "\n".join(sorted(set(repriced))[:10]))
+            if notes:
+                messagebox.showwarning("Restore Cart", "\n\n".join(notes))
+        else:
+            self.cart_autosave.clear()
+    
+    def update_quick_keys(self):
+        """Show the most sold books of the selected class as quick keys"""
+        for widget in self.quick_keys_frame.winfo_children():
             widget.destroy()
         
-        # Filter books
-        category_filter = self.sale_filter_var.get()
-        filtered_books = self.books
+        # Books deleted since they were sold are skipped
+        self.quick_key_books = []
+        for sku in self.quick_keys.top(self.sale_filter_var.get(), limit=None):
+            book = self.store.get_book(sku)
+            if book is not None:
+                self.quick_key_books.append(book)
+                if len(self.quick_key_books) == self.QUICK_KEY_COUNT:
+                    break
         
-        if category_filter != "All":
-            filtered_books = [b for b in self.books if b['category'] == category_filter]
+        if not self.quick_key_books:
+            self.quick_keys_frame.pack_forget()
+            return
+        self.quick_keys_frame.pack(fill="x", padx=10, pady=5, before=self.sale_books_frame)
         
-        # Display books
-        for book in filtered_books:
-            btn_frame = ctk.CTkFrame(self.sale_books_frame)
-            btn_frame.pack(fill="x", pady=5)
-            
-            text = f"{book['title']}\nClass {book['category']} | SKU: {book['sku']}\nRs {book['price']:.2f}"
-            
+        columns = 4
+        for i, book in enumerate(self.quick_key_books):
             ctk.CTkButton(
-                btn_frame,
-                text=text,
-                height=70,
-                anchor="w",
-                command=lambda b=book: self.add_to_cart(b)
-            ).pack(fill="x", padx=5)
+                self.quick_keys_frame,
+                text=f"F{i + 1}  {book['title'][:22]}\nRs {book['price']:.2f}",
+                height=45,
+                fg_color="#6f42c1",
+                command=lambda n=i: self.press_quick_key(n)
+            ).grid(row=i // columns, column=i % columns, padx=3, pady=3, sticky="ew")
+        
+        for c in range(columns):
+            self.quick_keys_frame.grid_columnconfigure(c, weight=1)
+    
+    def press_quick_key(self, index):
+        """Add the book on a quick key straight to the cart"""
+        if index < len(self.quick_key_books):
+            self.add_cart_lines([self.quick_key_books[index]])
+    
+    def update_sale_books(self, keep_shown=False):
+        """Show the first page of books matching the sale search"""
+        self.sale_matches = list(self.store.search_books(
+            self.sale_search_entry.get(),
+            self.sale_filter_var.get()
+        ))
+        
+        # A refresh after an inventory change keeps the pages already loaded
+        shown = max(self.PICKER_PAGE, self.sale_shown) if keep_shown else self.PICKER_PAGE
+        self.sale_shown = min(shown, len(self.sale_matches))
+        self.fill_sale_rows()
+    
+    def load_sale_page(self):
+        """Show the next page of matching books in the New Sale list"""
+        self.sale_shown = min(self.sale_shown + self.PICKER_PAGE, len(self.sale_matches))
+        self.fill_sale_rows()
+    
+    def fill_sale_rows(self):
+        """Draw the shown matches on the row pool
+        
+        Rows are created only when the pool is too small and are never
+        destroyed; a row's text is reset only when it shows a different
+        book or its book has changed since it was drawn.
+        """
+        versions = self.store.book_versions
+        for i, book in enumerate(self.sale_matches[:self.sale_shown]):
+            if i == len(self.sale_row_pool):
+                self.sale_row_pool.append(self.make_sale_book_row(self.sale_books_frame, i))
+            row = self.sale_row_pool[i]
+            
+            drawn = (book['sku'], versions.get(book['sku']))
+            if row['drawn'] != drawn:
+                row['button'].configure(text=self.sale_book_text(book))
+                row['drawn'] = drawn
+            if not row['packed']:
+                row['frame'].pack(fill="x", pady=5)
+                row['packed'] = True
+        
+        # Only a tail of the pool is ever hidden, so re-packing keeps the order
+        for row in self.sale_row_pool[self.sale_shown:]:
+            if row['packed']:
+                row['frame'].pack_forget()
+                row['packed'] = False
+        
+        self.update_sale_status()
+    
+    def update_sale_status(self):
+        """Refresh the New Sale list's count and its "Load more" button"""
+        shown, total = self.sale_shown, len(self.sale_matches)
+        self.sale_status.configure(text=f"Showing {shown} of {total} books")
+        
+        remaining = min(self.PICKER_PAGE, total - shown)
+        if remaining > 0:
+            self.sale_more_button.configure(text=f"Load {remaining} more", state="normal")
+        else:
+            self.sale_more_button.configure(text="All loaded", state="disabled")
+    
+    def sale_book_text(self, book):
+        """Button text for a book in the New Sale list"""
+        return f"{book['title']}\nClass {book['category']} | SKU: {book['sku']}\nRs {book['price']:.2f}"
+    
+    def make_sale_book_row(self, parent, index):
+        """One reusable row of the New Sale list; it adds whichever book is in its slot"""
+        btn_frame = ctk.CTkFrame(parent)
+        
+        button = ctk.CTkButton(
+            btn_frame,
+            text="",
+            height=70,
+            anchor="w",
+            command=lambda n=index: self.add_to_cart(self.sale_matches[n])
+        )
+        button.pack(fill="x", padx=5)
+        return {'frame': btn_frame, 'button': button, 'drawn': None, 'packed': False}
+    
+    def patch_sale_books(self, event, skus, renamed):
+        """Apply an inventory change to the open New Sale screen"""
+        # The pooled rows are reused, so only rows whose book changed are redrawn
+        self.update_sale_books(keep_shown=True)
+        
+        # Redraw the quick keys only if one of the changed books is ranked
+        ranked = set(self.quick_keys.top(self.sale_filter_var.get(), limit=None))
+        if ranked & (set(skus) | set(renamed)):
+            self.update_quick_keys()
     
     def add_to_cart(self, book):
         """Add a book to the shopping cart"""
-        self.current_cart.append(book.copy())
-        self.update_cart_display()
+        self.add_cart_lines([book])
         messagebox.showinfo("Added", f"Added '{book['title']}' to cart!")
     
+    def bundle_label(self, code):
+        """Menu text for a booklist: name, class, size and set price"""
+        booklist = self.store.booklists[code]
+        books, missing, total = self.store.bundle(code)
+        return f"{booklist['name']} (Class {booklist['category']}) - {len(books)} books - Rs {total:.2f}"
+    
+    def add_bundle_to_cart(self, code):
+        """Add every book of a booklist to the cart in one step"""
+        bundle = self.store.bundle(code)
+        if bundle is None:
+            return
+        
+        books, missing, total = bundle
+        self.add_cart_lines(books)
+        
+        if missing:
+            messagebox.showwarning(
+                "Booklist",
+                f"Added {len(books)} book(s).\nNot in inventory: {', '.join(missing)}"
+            )
+    
+    def scan_sale_entry(self):
+        """Enter in the search box adds a scanned set code or exact SKU"""
+        code = self.sale_search_entry.get().strip()
+        
+        if code in self.store.booklists:
+            self.add_bundle_to_cart(code)
+        elif self.store.get_book(code) is not None:
+            self.add_cart_lines([self.store.get_book(code)])
+        else:
+            return
+        
+        # Ready for the next scan
+        self.sale_search_entry.delete(0, 'end')
+        self.update_sale_books()
+    
+    def add_cart_lines(self, books):
+        """Add one cart line per book, pricing each as it goes in"""
+        for book in books:
+            line = book.copy()
+            self.current_cart.append(line)
+            self.cart_pricer.add(line)
+        self.update_cart_display()
+        self.cart_autosave.snapshot(self.current_cart, self.sale_contract)
+    
+    def set_sale_contract(self, choice):
+        """Switch the sale between walk-in and a school's contract prices"""
+        self.sale_contract = None if choice == "Walk-in" else choice
+        self.cart_pricer = self.store.pricing.cart(self.sale_contract)
+        for line in self.current_cart:
+            self.cart_pricer.add(line)
+        self.update_cart_display()
+        self.cart_autosave.snapshot(self.current_cart, self.sale_contract)
+    
     def update_cart_display(self):
         """Update the cart display"""
         # Clear existing
@@ -930,13 +1950,17 @@ class BookShopSystem:
                 text_color="gray"
             ).pack(pady=20)
         else:
-            for i, book in enumerate(self.current_cart):
+            for i, (book, list_price, net, tax) in enumerate(self.cart_pricer.lines):
                 item_frame = ctk.CTkFrame(self.cart_frame)
                 item_frame.pack(fill="x", pady=5)
                 
+                price = f"Rs {net + tax:.2f}"
+                if net != list_price:
+                    price = f"Rs {list_price:.2f} → {price}"
+                
                 info = ctk.CTkLabel(
                     item_frame,
-                    text=f"{book['title']}\nClass {book['category']} | Rs {book['price']:.2f}",
+                    text=f"{book['title']}\nClass {book['category']} | {price}",
                     font=("Arial", 12),
                     anchor="w"
                 )
@@ -951,21 +1975,32 @@ class BookShopSystem:
                     command=lambda idx=i: self.remove_from_cart(idx)
                 ).pack(side="right", padx=5)
         
-        # Update total
-        total = sum(book['price'] for book in self.current_cart)
-        self.total_label.configure(text=f"Total: Rs {total:.2f}")
+        # Update total (kept up to date line by line by the pricer)
+        pricer = self.cart_pricer
+        breakdown = []
+        if pricer.discount:
+            breakdown.append(f"Subtotal: Rs {pricer.list_total:.2f}")
+            breakdown.append(f"Discount: -Rs {pricer.discount:.2f}")
+        if pricer.tax_total:
+            breakdown.append(f"Tax: Rs {pricer.tax_total:.2f}")
+        self.price_breakdown_label.configure(text="  |  ".join(breakdown))
+        self.total_label.configure(text=f"Total: Rs {pricer.total:.2f}")
     
     def remove_from_cart(self, index):
         """Remove an item from cart"""
         self.current_cart.pop(index)
+        self.cart_pricer.remove(index)
         self.update_cart_display()
+        self.cart_autosave.snapshot(self.current_cart, self.sale_contract)
     
     def clear_cart(self):
         """Clear all items from cart"""
         if self.current_cart:
             if messagebox.askyesno("Clear Cart", "Remove all items from cart?"):
                 self.current_cart = []
+                self.cart_pricer = self.store.pricing.cart(self.sale_contract)
                 self.update_cart_display()
+                self.cart_autosave.clear()
     
     def generate_invoice(self):
         """Generate invoice and save to Excel"""
@@ -974,95 +2009,29 @@ class BookShopSystem:
             return
         
         try:
-            # Calculate totals
-            total_amount = sum(book['price'] for book in self.current_cart)
-            total_books = len(self.current_cart)
-            
-            # Get current date/time
-            now = datetime.now()
-            date_str = now.strftime("%d-%m-%Y")
-            time_str = now.strftime("%I:%M %p")
-            
-            # Save to Excel
-            self.save_sale_to_excel(now, self.current_cart, total_amount)
+            # Save to Excel (priced by the same rules as the cart on screen)
+            invoice = self.store.checkout(self.current_cart, contract=self.sale_contract)
+            self.cart_autosave.clear()
             
             # Show invoice
-            self.show_invoice(self.current_cart, total_books, total_amount, date_str, time_str)
+            self.show_invoice(
+                invoice['items'],
+                invoice['total_books'],
+                invoice['total_amount'],
+                invoice['date'],
+                invoice['time'],
+                discount=invoice['discount'],
+                tax=invoice['tax']
+            )
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate invoice: {str(e)}")
     
     def save_sale_to_excel(self, timestamp, cart, total):
         """Save sale to daily Excel file"""
-        # Get date for filename
-        date_str = timestamp.strftime("%d-%m-%Y")
-        filename = f"Sales_Records/{date_str}.xlsx"
-        
-        # Prepare sale data
-        sale_data = {
-            'Date': timestamp.strftime("%d-%m-%Y"),
-            'Time': timestamp.strftime("%I:%M %p"),
-            'Book Title': [],
-            'Class/Category': [],
-            'SKU / Serial Number': [],
-            'Unit Price (Rs)': [],
-            'Total Bill (Rs)': []
-        }
-        
-        # Add each book
-        for i, book in enumerate(cart):
-            sale_data['Book Title'].append(book['title'])
-            sale_data['Class/Category'].append(f"Class {book['category']}")
-            sale_data['SKU / Serial Number'].append(book['sku'])
-            sale_data['Unit Price (Rs)'].append(f"Rs {book['price']:.2f}")
-            
-            # Only show total on first row
-            if i == 0:
-                sale_data['Total Bill (Rs)'].append(f"Rs {total:.2f}")
-            else:
-                sale_data['Total Bill (Rs)'].append('')
-        
-        # Check if file exists
-        if os.path.exists(filename):
-            # Append to existing file
-            existing_df = pd.read_excel(filename)
-            new_df = pd.DataFrame(sale_data)
-            
-            # Add separator row
-            separator = pd.DataFrame([['---'] * len(sale_data)])
-            separator.columns = existing_df.columns
-            
-            combined_df = pd.concat([existing_df, separator, new_df], ignore_index=True)
-            combined_df.to_excel(filename, index=False)
-        else:
-            # Create new file
-            df = pd.DataFrame(sale_data)
-            df.to_excel(filename, index=False)
-            
-            # Format the Excel file
-            wb = load_workbook(filename)
-            ws = wb.active
-            
-            # Header formatting
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_font = Font(color="FFFFFF", bold=True, size=12)
-            
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Column widths
-            ws.column_dimensions['A'].width = 15
-            ws.column_dimensions['B'].width = 12
-            ws.column_dimensions['C'].width = 35
-            ws.column_dimensions['D'].width = 18
-            ws.column_dimensions['E'].width = 22
-            ws.column_dimensions['F'].width = 18
-            
-            wb.save(filename)
+        self.store.save_sale_to_excel(timestamp, cart, total)
     
-    def show_invoice(self, cart, total_books, total_amount, date, time):
+    def show_invoice(self, cart, total_books, total_amount, date, time, discount=0, tax=0):
         """Display the invoice"""
         self.clear_screen()
         
@@ -1169,6 +2138,20 @@ class BookShopSystem:
             font=("Arial", 16, "bold")
         ).pack(pady=5)
         
+        if discount:
+            ctk.CTkLabel(
+                summary_frame,
+                text=f"Discount: -Rs {discount:.2f}",
+                font=("Arial", 14)
+            ).pack(pady=2)
+        
+        if tax:
+            ctk.CTkLabel(
+                summary_frame,
+                text=f"Tax: Rs {tax:.2f}",
+                font=("Arial", 14)
+            ).pack(pady=2)
+        
         ctk.CTkLabel(
             summary_frame,
             text=f"Total Amount: Rs {total_amount:.2f}",
@@ -1207,6 +2190,26 @@ class BookShopSystem:
             command=self.show_main_menu
         ).pack(side="right", padx=20)
         
+        ctk.CTkButton(
+            header,
+            text="🗂 Browse All Sales",
+            width=180,
+            height=40,
+            font=("Arial", 14),
+            command=self.show_sales_browser
+        ).pack(side="right", padx=10)
+        
+        self.check_button = ctk.CTkButton(
+            header,
+            text="🩺 Check Files",
+            width=150,
+            height=40,
+            font=("Arial", 14),
+            fg_color="#6c757d",
+            command=self.check_data_files
+        )
+        self.check_button.pack(side="right", padx=10)
+        
         # Get all sales files
         sales_files = []
         if os.path.exists('Sales_Records'):
@@ -1221,6 +2224,65 @@ class BookShopSystem:
             ).pack(expand=True)
             return
         
+        # Date range report
+        range_frame = ctk.CTkFrame(self.root)
+        range_frame.pack(fill="x", padx=50, pady=(20, 0))
+        
+        ctk.CTkLabel(
+            range_frame,
+            text="Date Range Report:",
+            font=("Arial", 16, "bold")
+        ).pack(side="left", padx=10, pady=10)
+        
+        today = datetime.now()
+        self.range_entries = {}
+        for label, key, value in [
+            ("From", "start", today.replace(day=1).strftime("%d-%m-%Y")),
+            ("To", "end", today.strftime("%d-%m-%Y"))
+        ]:
+            ctk.CTkLabel(range_frame, text=label, font=("Arial", 14)).pack(side="left", padx=5)
+            entry = ctk.CTkEntry(range_frame, width=120)
+            entry.insert(0, value)
+            entry.pack(side="left", padx=5)
+            self.range_entries[key] = entry
+        
+        ctk.CTkButton(
+            range_frame,
+            text="View Range",
+            width=120,
+            height=35,
+            command=self.show_range_report
+        ).pack(side="left", padx=10)
+        
+        ctk.CTkButton(
+            range_frame,
+            text="Heatmap",
+            width=120,
+            height=35,
+            fg_color="#6f42c1",
+            command=lambda: self.show_range_report(heatmap=True)
+        ).pack(side="left", padx=5)
+        
+        self.export_button = ctk.CTkButton(
+            range_frame,
+            text="Export Excel",
+            width=120,
+            height=35,
+            fg_color="#28a745",
+            command=self.export_range_excel
+        )
+        self.export_button.pack(side="left", padx=5)
+        
+        self.csv_button = ctk.CTkButton(
+            range_frame,
+            text="Export CSV",
+            width=120,
+            height=35,
+            fg_color="#17a2b8",
+            command=self.export_range_csv
+        )
+        self.csv_button.pack(side="left", padx=5)
+        
         # Reports list
         reports_frame = ctk.CTkFrame(self.root)
         reports_frame.pack(fill="both", expand=True, padx=50, pady=20)
@@ -1262,8 +2324,18 @@ class BookShopSystem:
                     height=35,
                     command=lambda f=filepath: self.view_sales_report(f)
                 ).pack(side="right", padx=10)
-            except:
-                pass
+            except Exception as e:
+                # Show damaged files instead of hiding them
+                btn_frame = ctk.CTkFrame(list_frame)
+                btn_frame.pack(fill="x", pady=5)
+                
+                ctk.CTkLabel(
+                    btn_frame,
+                    text=f"⚠ {filename.replace('.xlsx', '')} - could not be read ({str(e)})",
+                    font=("Arial", 14),
+                    text_color="#dc3545",
+                    anchor="w"
+                ).pack(side="left", fill="x", expand=True, padx=10)
     
     def view_sales_report(self, filepath):
         """View a specific sales report"""
@@ -1293,40 +2365,8 @@ class BookShopSystem:
             # Load data
             df = pd.read_excel(filepath)
             
-            # Display table
-            table_frame = ctk.CTkFrame(self.root)
-            table_frame.pack(fill="both", expand=True, padx=20, pady=10)
-            
-            # Create Treeview
-            columns = list(df.columns)
-            tree = ttk.Treeview(
-                table_frame,
-                columns=columns,
-                show='headings',
-                height=25
-            )
-            
-            # Headings
-            for col in columns:
-                tree.heading(col, text=col)
-                tree.column(col, width=150)
-            
-            # Data
-            for _, row in df.iterrows():
-                values = [str(val) for val in row]
-                tree.insert('', 'end', values=values)
-            
-            # Scrollbars
-            vsb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-            hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=tree.xview)
-            tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-            
-            tree.grid(row=0, column=0, sticky='nsew')
-            vsb.grid(row=0, column=1, sticky='ns')
-            hsb.grid(row=1, column=0, sticky='ew')
-            
-            table_frame.grid_rowconfigure(0, weight=1)
-            table_frame.grid_columnconfigure(0, weight=1)
+            rows = [[str(val) for val in row] for row in df.itertuples(index=False, name=None)]
+            self.build_report_table(list(df.columns), rows)
             
         except Exception as e:
             ctk.CTkLabel(
@@ -1335,6 +2375,527 @@ class BookShopSystem:
                 font=("Arial", 16)
             ).pack(expand=True)
     
+    def build_report_table(self, columns, rows):
+        """Display report rows in a sortable table"""
+        table_frame = ctk.CTkFrame(self.root)
+        table_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        # Create Treeview
+        tree = ttk.Treeview(
+            table_frame,
+            columns=columns,
+            show='headings',
+            height=25
+        )
+        
+        # Headings (click to sort)
+        for col in columns:
+            tree.heading(col, text=col, command=lambda c=col: self.sort_report_table(c))
+            tree.column(col, width=150)
+        
+        # Data (the row position is the item id)
+        for i, values in enumerate(rows):
+            tree.insert('', 'end', iid=str(i), values=values)
+        
+        # Sort orders are computed once per column and reused
+        self.report_tree = tree
+        self.report_columns = columns
+        self.report_row_ids = [str(i) for i in range(len(rows))]
+        self.report_sorter = ColumnSorter({
+            col: (lambda iid, c=c: sort_key(rows[int(iid)][c]))
+            for c, col in enumerate(columns)
+        })
+        self.report_sort = None
+        
+        # Scrollbars
+        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=tree.xview)
+        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        hsb.grid(row=1, column=0, sticky='ew')
+        
+        table_frame.grid_rowconfigure(0, weight=1)
+        table_frame.grid_columnconfigure(0, weight=1)
+    
+    def sort_report_table(self, column):
+        """Sort the open sales report by a column (click again to reverse)"""
+        if self.report_sort and self.report_sort[0] == column:
+            self.report_sort = (column, not self.report_sort[1])
+        else:
+            self.report_sort = (column, False)
+        
+        column, descending = self.report_sort
+        order = self.report_sorter.sort(
+            self.report_row_ids, column, self.report_row_ids, descending=descending
+        )
+        self.report_tree.set_children('', *order)
+        
+        for col in self.report_columns:
+            label = col
+            if col == column:
+                label += " ▼" if descending else " ▲"
+            self.report_tree.heading(col, text=label)
+    
+    def get_range_files(self):
+        """Validate the From/To entries; returns (start, end, paths) or None"""
+        try:
+            start = datetime.strptime(self.range_entries['start'].get().strip(), "%d-%m-%Y").date()
+            end = datetime.strptime(self.range_entries['end'].get().strip(), "%d-%m-%Y").date()
+        except ValueError:
+            messagebox.showerror("Error", "Please enter dates as DD-MM-YYYY.")
+            return None
+        
+        if start > end:
+            messagebox.showerror("Error", "'From' date must be before 'To' date.")
+            return None
+        
+        paths = sales_files_in_range(self.store.sales_dir, start, end)
+        if not paths:
+            messagebox.showinfo("No Sales", "No sales records found in that date range.")
+            return None
+        
+        return start, end, paths
+    
+    def run_in_background(self, work, on_done):
+        """Run work() on a thread, then call on_done(result, error) on the UI thread"""
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                results.put((work(), None))
+            except Exception as e:
+                results.put((None, e))
+        
+        def poll():
+            try:
+                result, error = results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, poll)
+                return
+            on_done(result, error)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(100, poll)
+    
+    def export_range_excel(self):
+        """Export every sale line in the date range to one formatted Excel file"""
+        selection = self.get_range_files()
+        if selection is None:
+            return
+        start, end, paths = selection
+        
+        output = filedialog.asksaveasfilename(
+            title="Export Sales",
+            defaultextension=".xlsx",
+            initialfile=f"Sales {start.strftime('%d-%m-%Y')} to {end.strftime('%d-%m-%Y')}.xlsx",
+            filetypes=[("Excel files", "*.xlsx")]
+        )
+        if not output:
+            return
+        
+        self.export_button.configure(state="disabled", text="Exporting...")
+        
+        def done(count, error):
+            if self.export_button.winfo_exists():
+                self.export_button.configure(state="normal", text="Export Excel")
+            if error is not None:
+                messagebox.showerror("Error", f"Export failed: {str(error)}")
+            else:
+                messagebox.showinfo("Export Complete", f"Exported {count} sale line(s) to:\n{output}")
+        
+        self.run_in_background(lambda: export_sales_excel(paths, output), done)
+    
+    def check_data_files(self):
+        """Scan books.json and every sales file for damage in the background"""
+        checker = IntegrityChecker(self.store.inventory_file, self.store.sales_dir, self.store.app_dir)
+        self.check_button.configure(state="disabled", text="Checking...")
+        
+        def done(report, error):
+            if self.check_button.winfo_exists():
+                self.check_button.configure(state="normal", text="🩺 Check Files")
+            if error is not None:
+                messagebox.showerror("Error", f"Check failed: {str(error)}")
+                return
+            
+            problems = [f"{name}: could not be read ({message})" for name, message in report['unreadable']]
+            problems += [f"{name}: {problem}" for name, problem in report['malformed']]
+            summary = f"Checked {report['files']} file(s), {report['lines']} sale line(s)."
+            if report['orphans']:
+                summary += f"\n{len(report['orphans'])} sold SKU(s) are no longer in the inventory."
+            
+            if not problems:
+                messagebox.showinfo("Check Complete", f"{summary}\n\nNo damaged files found.")
+                return
+            
+            shown = "\n".join(problems[:15])
+            if len(problems) > 15:
+                shown += f"\n... and {len(problems) - 15} more (run 'python bookshop_cli.py check')"
+            messagebox.showwarning("Problems Found", f"{summary}\n\n{len(problems)} problem(s):\n{shown}")
+        
+        self.run_in_background(checker.scan, done)
+    
+    def export_range_csv(self):
+        """Stream every sale line in the date range into a flat CSV for accounting"""
+        selection = self.get_range_files()
+        if selection is None:
+            return
+        start, end, paths = selection
+        
+        output = filedialog.asksaveasfilename(
+            title="Export Sales CSV",
+            defaultextension=".csv",
+            initialfile=f"Sales {start.strftime('%d-%m-%Y')} to {end.strftime('%d-%m-%Y')}.csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not output:
+            return
+        
+        self.csv_button.configure(state="disabled", text="Exporting...")
+        
+        def done(count, error):
+            if self.csv_button.winfo_exists():
+                self.csv_button.configure(state="normal", text="Export CSV")
+            if error is not None:
+                messagebox.showerror("Error", f"Export failed: {str(error)}")
+            else:
+                messagebox.showinfo("Export Complete", f"Exported {count} sale line(s) to:\n{output}")
+        
+        self.run_in_background(lambda: export_sales_csv(paths, output), done)
+    
+    def show_range_report(self, heatmap=False):
+        """Load every daily file in a date range (in parallel) and show it"""
+        selection = self.get_range_files()
+        if selection is None:
+            return
+        start, end, paths = selection
+        
+        self.clear_screen()
+        
+        # The loaded lines are shown as a table or as a weekday x hour heatmap
+        self.range_view = self.show_range_heatmap if heatmap else self.show_range_lines
+        title = "Sales Heatmap" if heatmap else "Sales Report"
+        
+        # Header
+        header = ctk.CTkFrame(self.root, height=70)
+        header.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            header,
+            text=f"📊 {title}: {start.strftime('%d-%m-%Y')} to {end.strftime('%d-%m-%Y')}",
+            font=("Arial", 22, "bold")
+        ).pack(side="left", padx=20)
+        
+        ctk.CTkButton(
+            header,
+            text="← Back",
+            width=120,
+            height=40,
+            font=("Arial", 14),
+            command=self.show_sales_reports
+        ).pack(side="right", padx=20)
+        
+        # Progress
+        self.range_status_label = ctk.CTkLabel(
+            self.root,
+            text=f"Loading {len(paths)} day(s)...",
+            font=("Arial", 16)
+        )
+        self.range_status_label.pack(pady=10)
+        
+        self.range_progress = ctk.CTkProgressBar(self.root, width=500)
+        self.range_progress.set(0)
+        self.range_progress.pack(pady=10)
+        
+        # Parse files on worker processes; the UI polls for progress
+        self.range_queue = queue.Queue()
+        threading.Thread(
+            target=self.load_range_worker,
+            args=(paths, self.range_queue),
+            daemon=True
+        ).start()
+        self.root.after(100, self.poll_range_report)
+    
+    def load_range_worker(self, paths, results):
+        """Background thread: load a date range and post progress to the UI"""
+        try:
+            lines, errors = load_sales_range(
+                paths,
+                progress=lambda done, total: results.put(('progress', done, total))
+            )
+            results.put(('done', lines, errors))
+        except Exception as e:
+            results.put(('failed', str(e), None))
+    
+    def poll_range_report(self):
+        """Apply progress messages from the range loader"""
+        # The user may have left the screen while loading
+        if not self.range_progress.winfo_exists():
+            return
+        
+        while True:
+            try:
+                kind, first, second = self.range_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'progress':
+                self.range_progress.set(first / second)
+                self.range_status_label.configure(text=f"Loaded {first} of {second} day(s)...")
+            elif kind == 'failed':
+                self.range_status_label.configure(text=f"Error loading report: {first}")
+                return
+            else:
+                self.range_view(first, second)
+                return
+        
+        self.root.after(100, self.poll_range_report)
+    
+    def show_range_lines(self, lines, errors):
+        """Display the merged sale lines of a date range"""
+        self.range_progress.pack_forget()
+        
+        revenue = lines['Unit Price (Rs)'].sum()
+        sales = len(lines[['Date', 'Sale']].drop_duplicates())
+        summary = f"{sales} sale(s)  |  {len(lines)} book(s)  |  Total: Rs {revenue:.2f}"
+        if errors:
+            summary += f"  |  {len(errors)} file(s) could not be read"
+        self.range_status_label.configure(text=summary)
+        
+        rows = [
+            [
+                date.strftime("%d-%m-%Y") if not pd.isna(date) else '',
+                time_str,
+                str(sale),
+                title,
+                f"Class {category}",
+                sku,
+                f"Rs {price:.2f}"
+            ]
+            for date, time_str, sale, title, category, sku, price in lines[
+                ['Date', 'Time', 'Sale', 'Book Title', 'Class', 'SKU', 'Unit Price (Rs)']
+            ].itertuples(index=False, name=None)
+        ]
+        columns = ['Date', 'Time', 'Sale #', 'Book Title', 'Class/Category', 'SKU / Serial Number', 'Unit Price (Rs)']
+        self.build_report_table(columns, rows)
+    
+    def show_range_heatmap(self, lines, errors):
+        """Display sales of a date range binned by weekday and hour"""
+        self.range_progress.pack_forget()
+        
+        summary = f"{len(lines)} book(s) sold"
+        if errors:
+            summary += f"  |  {len(errors)} file(s) could not be read"
+        self.range_status_label.configure(text=summary)
+        
+        self.heatmap_lines = lines
+        
+        # Measure and class selectors
+        controls = ctk.CTkFrame(self.root)
+        controls.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkLabel(controls, text="Show:", font=("Arial", 14)).pack(side="left", padx=10, pady=10)
+        self.heatmap_measure = ctk.CTkSegmentedButton(
+            controls,
+            values=["Books", "Revenue", "Sales"],
+            command=lambda _: self.draw_heatmap()
+        )
+        self.heatmap_measure.set("Books")
+        self.heatmap_measure.pack(side="left", padx=5)
+        
+        ctk.CTkLabel(controls, text="Class:", font=("Arial", 14)).pack(side="left", padx=(30, 5))
+        self.heatmap_class = ctk.CTkOptionMenu(
+            controls,
+            values=["All"] + CATEGORIES,
+            command=lambda _: self.draw_heatmap()
+        )
+        self.heatmap_class.pack(side="left", padx=5)
+        
+        self.heatmap_frame = ctk.CTkScrollableFrame(self.root, orientation="horizontal")
+        self.heatmap_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        self.draw_heatmap()
+    
+    def draw_heatmap(self):
+        """Draw the heatmap grid for the selected measure and class"""
+        for widget in self.heatmap_frame.winfo_children():
+            widget.destroy()
+        
+        measure = self.heatmap_measure.get().lower()
+        category = self.heatmap_class.get()
+        if category == "All":
+            grid = sales_heatmap(self.heatmap_lines, measure)
+        else:
+            grids = sales_heatmap(self.heatmap_lines, measure, by_class=True)
+            grid = grids.get(category, sales_heatmap(self.heatmap_lines.iloc[:0], measure))
+        
+        # Only show the hours the shop actually traded in
+        busy = grid.columns[grid.sum(axis=0).to_numpy() > 0]
+        if len(busy):
+            grid = grid.loc[:, busy.min():busy.max()]
+        
+        def cell_text(value):
+            if measure == 'revenue':
+                return f"{value:,.0f}"
+            return str(int(value))
+        
+        def cell_color(value, peak):
+            # Blend from pale blue to the app's dark blue
+            share = value / peak if peak else 0
+            low, high = (235, 242, 250), (31, 83, 141)
+            rgb = [round(l + (h - l) * share) for l, h in zip(low, high)]
+            return "#{:02x}{:02x}{:02x}".format(*rgb), ("white" if share > 0.5 else "black")
+        
+        peak = grid.to_numpy().max() if grid.size else 0
+        
+        def label(row, column, text, bold=False, color=None, text_color=None, width=56):
+            ctk.CTkLabel(
+                self.heatmap_frame,
+                text=text,
+                width=width,
+                height=32,
+                font=("Arial", 12, "bold" if bold else "normal"),
+                fg_color=color or "transparent",
+                text_color=text_color,
+                corner_radius=4
+            ).grid(row=row, column=column, padx=1, pady=1)
+        
+        # Hour headings, then one row per weekday, then hourly totals
+        label(0, 0, "", width=60)
+        for c, hour in enumerate(grid.columns, 1):
+            label(0, c, f"{hour:02d}:00", bold=True)
+        label(0, len(grid.columns) + 1, "Total", bold=True, width=80)
+        
+        for r, day in enumerate(WEEKDAYS, 1):
+            label(r, 0, day, bold=True, width=60)
+            for c, value in enumerate(grid.loc[day], 1):
+                color, text_color = cell_color(value, peak)
+                label(r, c, cell_text(value), color=color, text_color=text_color)
+            label(r, len(grid.columns) + 1, cell_text(grid.loc[day].sum()), bold=True, width=80)
+        
+        totals_row = len(WEEKDAYS) + 1
+        label(totals_row, 0, "Total", bold=True, width=60)
+        for c, value in enumerate(grid.sum(axis=0), 1):
+            label(totals_row, c, cell_text(value), bold=True)
+        label(totals_row, len(grid.columns) + 1, cell_text(grid.to_numpy().sum()), bold=True, width=80)
+    
+    def show_sales_browser(self):
+        """Page through every sale line ever recorded, straight off the binary records"""
+        self.clear_screen()
+        
+        # Header
+        header = ctk.CTkFrame(self.root, height=70)
+        header.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            header,
+            text="🗂 All Sales",
+            font=("Arial", 24, "bold")
+        ).pack(side="left", padx=20)
+        
+        ctk.CTkButton(
+            header,
+            text="← Back",
+            width=120,
+            height=40,
+            font=("Arial", 14),
+            command=self.show_sales_reports
+        ).pack(side="right", padx=20)
+        
+        # Paging controls
+        controls = ctk.CTkFrame(self.root)
+        controls.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkButton(
+            controls,
+            text="◀ Previous",
+            width=120,
+            command=lambda: self.show_browser_page(self.browser_start - self.BROWSER_PAGE)
+        ).pack(side="left", padx=10, pady=10)
+        
+        ctk.CTkButton(
+            controls,
+            text="Next ▶",
+            width=120,
+            command=lambda: self.show_browser_page(self.browser_start + self.BROWSER_PAGE)
+        ).pack(side="left", padx=5)
+        
+        ctk.CTkLabel(controls, text="Go to row:", font=("Arial", 14)).pack(side="left", padx=(30, 5))
+        self.browser_row_entry = ctk.CTkEntry(controls, width=120)
+        self.browser_row_entry.pack(side="left", padx=5)
+        self.browser_row_entry.bind('<Return>', lambda e: self.goto_browser_row())
+        
+        ctk.CTkButton(
+            controls,
+            text="Go",
+            width=60,
+            command=self.goto_browser_row
+        ).pack(side="left", padx=5)
+        
+        self.browser_label = ctk.CTkLabel(controls, text="", font=("Arial", 14))
+        self.browser_label.pack(side="right", padx=20)
+        
+        # Table
+        table_frame = ctk.CTkFrame(self.root)
+        table_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        columns = ('Row', 'Date', 'Time', 'Sale #', 'Book Title', 'Class', 'SKU', 'Price (Rs)')
+        self.browser_tree = ttk.Treeview(table_frame, columns=columns, show='headings', height=25)
+        for col, width in zip(columns, (80, 100, 90, 80, 300, 80, 150, 100)):
+            self.browser_tree.heading(col, text=col)
+            self.browser_tree.column(col, width=width)
+        
+        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.browser_tree.yview)
+        self.browser_tree.configure(yscrollcommand=vsb.set)
+        self.browser_tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+        
+        self.show_browser_page(0)
+    
+    def show_browser_page(self, start):
+        """Show one page of the binary sales records"""
+        records = self.store.sales_records
+        total = len(records)
+        last_page = (total - 1) // self.BROWSER_PAGE * self.BROWSER_PAGE if total else 0
+        start = max(0, min(start, last_page))
+        self.browser_start = start
+        
+        self.browser_tree.delete(*self.browser_tree.get_children())
+        for offset, line in enumerate(records.page(start, self.BROWSER_PAGE)):
+            self.browser_tree.insert('', 'end', values=(
+                start + offset + 1,
+                line['timestamp'].strftime("%d-%m-%Y"),
+                line['timestamp'].strftime("%I:%M %p"),
+                line['sale'],
+                line['title'],
+                line['category'],
+                line['sku'],
+                f"{line['price']:.2f}"
+            ))
+        
+        end = min(start + self.BROWSER_PAGE, total)
+        status = "" if self.store.records_ready.is_set() else "  (older sales still loading)"
+        self.browser_label.configure(text=f"Rows {start + 1 if total else 0}–{end} of {total:,}{status}")
+    
+    def goto_browser_row(self):
+        """Jump to the page holding a row number (1 = first sale line)"""
+        try:
+            row = int(self.browser_row_entry.get().strip().replace(',', ''))
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a row number.")
+            return
+        
+        row = max(row - 1, 0)
+        self.show_browser_page(row - row % self.BROWSER_PAGE)
+        
+        # Highlight the requested row
+        children = self.browser_tree.get_children()
+        index = row - self.browser_start
+        if 0 <= index < len(children):
+            self.browser_tree.selection_set(children[index])
+            self.browser_tree.see(children[index])
+    
     # ============ CHANGE PASSWORD ============
     
     def show_change_password(self):
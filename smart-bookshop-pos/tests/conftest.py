@@ -0,0 +1,43 @@
+"""
+Shared fixtures for the headless (non-GUI) tests
+Run from smart-bookshop-pos with:  python -m pytest tests
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookshop_store import BookShopStore
+
+BOOKS = [
+    {'title': 'Mathematics Class 10', 'sku': 'MATH-10-001', 'category': '10', 'price': 450.0},
+    {'title': 'Physics Class 10', 'sku': 'PHYS-10-001', 'category': '10', 'price': 380.0},
+    {'title': 'Chemistry Class 9', 'sku': 'CHEM-9-001', 'category': '9', 'price': 300.0},
+    {'title': 'English Class 9', 'sku': 'ENG-9-001', 'category': '9', 'price': 250.0}
+]
+
+
+def write_shop(folder, books=BOOKS):
+    """Create a shop folder with an inventory and return its path"""
+    os.makedirs(os.path.join(folder, 'Inventory'), exist_ok=True)
+    with open(os.path.join(folder, 'Inventory', 'books.json'), 'w') as f:
+        json.dump(books, f)
+    return str(folder)
+
+
+@pytest.fixture
+def shop_dir(tmp_path):
+    """A shop folder with the sample inventory"""
+    return write_shop(tmp_path / 'shop')
+
+
+@pytest.fixture
+def store(shop_dir):
+    """A BookShopStore loaded from shop_dir"""
+    store = BookShopStore(shop_dir)
+    store.load_inventory()
+    return store
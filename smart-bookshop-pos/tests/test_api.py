@@ -0,0 +1,209 @@
+"""Tests for the tablet service (bookshop_api.py)"""
+
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from bookshop_api import BookShopAPI, load_api_settings
+
+
+def request(api, raw):
+    """Send one raw HTTP request and return (status, JSON body)"""
+    with socket.create_connection(('127.0.0.1', api.port), timeout=5) as sock:
+        sock.sendall(raw)
+        data = b''
+        while chunk := sock.recv(65536):
+            data += chunk
+    head, _, body = data.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def call(api, method, path, body=None):
+    """Make one JSON request and return (status, JSON body)"""
+    data = b'' if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode('utf-8'))
+    head = f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+    return request(api, head.encode('latin-1') + data)
+
+
+@pytest.fixture
+def running(store):
+    """Start an API on a free port; stop it afterwards"""
+    started = []
+
+    def start(**options):
+        api = BookShopAPI(store, port=0, **options)
+        api.start_in_thread()
+        started.append(api)
+        return api
+
+    yield start
+    for api in started:
+        api.stop()
+
+
+def test_start_reports_busy_port(store, running):
+    api = running()
+    busy = BookShopAPI(store, port=api.port)
+    with pytest.raises(OSError):
+        busy.start_in_thread(timeout=5)
+
+
+def test_bad_content_length_is_rejected(running):
+    api = running()
+    status, payload = request(
+        api, b"GET /books HTTP/1.1\r\nContent-Length: ten\r\nConnection: close\r\n\r\n")
+    assert status == 400
+    assert 'Content-Length' in payload['error']
+
+
+def test_token_is_required_when_set(running):
+    api = running(token='secret')
+    status, _ = request(api, b"GET /books HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert status == 401
+
+    status, payload = request(
+        api, b"GET /books HTTP/1.1\r\nAuthorization: Bearer secret\r\nConnection: close\r\n\r\n")
+    assert status == 200
+    assert payload['count'] == 4
+
+
+def test_network_host_needs_token(store):
+    with pytest.raises(ValueError):
+        BookShopAPI(store, host='0.0.0.0')
+
+
+def test_settings_default_to_this_pc(store):
+    settings = load_api_settings(store.app_dir)
+    assert settings['host'] == '127.0.0.1'
+    assert settings['token'] is None
+
+
+def test_settings_generate_token_for_lan(store):
+    path = f"{store.app_dir}/api_settings.json"
+    with open(path, 'w') as f:
+        json.dump({'allow_lan': True}, f)
+
+    settings = load_api_settings(store.app_dir)
+    assert settings['host'] == '0.0.0.0'
+    assert settings['token']
+    # The generated token is kept for the tablets to use
+    assert load_api_settings(store.app_dir)['token'] == settings['token']
+
+
+def test_search_and_lookup(running):
+    api = running()
+    status, payload = call(api, 'GET', '/books?q=physics&category=10')
+    assert status == 200
+    assert [book['sku'] for book in payload['books']] == ['PHYS-10-001']
+
+    status, payload = call(api, 'GET', '/books?category=9&limit=1')
+    assert (status, payload['count'], len(payload['books'])) == (200, 2, 1)
+
+    status, payload = call(api, 'GET', '/books/ENG-9-001')
+    assert (status, payload['price']) == (200, 250.0)
+    assert call(api, 'GET', '/books/NOPE')[0] == 404
+
+
+@pytest.mark.parametrize('limit', ['-1', '100000', 'ten'])
+def test_search_limit_is_checked(running, limit):
+    assert call(running(), 'GET', f'/books?limit={limit}')[0] == 400
+
+
+def test_cart_lines_and_booklist(store, running):
+    store.save_booklist('SET-10', 'Class 10 set', '10', ['MATH-10-001', 'PHYS-10-001', 'GONE-1'])
+    api = running()
+
+    status, booklists = call(api, 'GET', '/booklists')
+    assert status == 200
+    assert booklists['booklists'][0]['total_amount'] == 830.0
+    assert booklists['booklists'][0]['missing'] == ['GONE-1']
+
+    status, cart = call(api, 'POST', '/carts', {})
+    assert status == 201
+    cart_id = cart['cart_id']
+
+    status, cart = call(api, 'POST', f'/carts/{cart_id}/items', {'sku': 'ENG-9-001', 'qty': 2})
+    assert (status, cart['total_books'], cart['subtotal']) == (200, 2, 500.0)
+
+    status, cart = call(api, 'POST', f'/carts/{cart_id}/booklist', {'code': 'SET-10'})
+    assert (status, cart['total_books'], cart['missing']) == (200, 4, ['GONE-1'])
+
+    status, cart = call(api, 'DELETE', f'/carts/{cart_id}/items/0')
+    assert [item['sku'] for item in cart['items']] == ['ENG-9-001', 'MATH-10-001', 'PHYS-10-001']
+    assert call(api, 'DELETE', f'/carts/{cart_id}/items/9')[0] == 404
+
+    assert call(api, 'GET', f'/carts/{cart_id}')[1]['total_amount'] == 1080.0
+    assert call(api, 'DELETE', f'/carts/{cart_id}')[0] == 200
+    assert call(api, 'GET', f'/carts/{cart_id}')[0] == 404
+
+
+@pytest.mark.parametrize('body', [
+    b'[]', b'"ENG-9-001"', b'{"sku": ', {'sku': 'ENG-9-001', 'qty': 0},
+    {'sku': 'ENG-9-001', 'qty': 1000}, {'sku': 'ENG-9-001', 'qty': 1.5}, {'sku': 'ENG-9-001', 'qty': True}
+])
+def test_bad_item_requests_are_rejected(running, body):
+    api = running()
+    cart_id = call(api, 'POST', '/carts', {})[1]['cart_id']
+    status, payload = call(api, 'POST', f'/carts/{cart_id}/items', body)
+    assert status == 400, payload
+    assert call(api, 'GET', f'/carts/{cart_id}')[1]['items'] == []
+
+
+def test_oversized_body_is_rejected(running):
+    api = running()
+    status, payload = call(api, 'POST', '/carts', b'{"x": "' + b'a' * 70000 + b'"}')
+    assert status == 400
+    assert 'body' in payload['error']
+
+
+def test_checkout_writes_the_sale(store, running):
+    api = running()
+    cart_id = call(api, 'POST', '/carts', {})[1]['cart_id']
+    call(api, 'POST', f'/carts/{cart_id}/items', {'sku': 'MATH-10-001'})
+    call(api, 'POST', f'/carts/{cart_id}/items', {'sku': 'CHEM-9-001'})
+
+    status, invoice = call(api, 'POST', f'/carts/{cart_id}/checkout')
+    assert status == 200
+    assert (invoice['total_books'], invoice['total_amount']) == (2, 750.0)
+
+    day = invoice['date']
+    assert os.path.exists(os.path.join(store.sales_dir, f'{day}.xlsx'))
+    assert [line['sku'] for line in store.sales_records.page(0, 10)] == ['MATH-10-001', 'CHEM-9-001']
+    assert store.sales_records.page(0, 1)[0]['invoice'] == invoice['invoice_no']
+
+    # The cart is gone, so the same sale cannot be committed twice
+    assert call(api, 'POST', f'/carts/{cart_id}/checkout')[0] == 404
+    assert call(api, 'POST', '/carts/x/checkout')[0] == 404
+
+
+def test_searches_run_safely_during_edits(store, running):
+    api = running()
+    errors = []
+    done = threading.Event()
+
+    def edit():
+        try:
+            for i in range(300):
+                store.put_book({'title': f'Atlas {i}', 'sku': f'ATL-{i}', 'category': '10', 'price': 100.0})
+                store.update_book(f'ATL-{i}', f'Atlas {i} (2nd)', f'ATL-{i}', '9', 110.0)
+                store.remove_book(f'ATL-{i}')
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    editor = threading.Thread(target=edit)
+    editor.start()
+    while not done.is_set():
+        for category in ('All', '9', '10'):
+            status, payload = call(api, 'GET', f'/books?q=atlas&category={category}')
+            assert status == 200, payload
+            for book in payload['books']:
+                assert book['sku'].startswith('ATL-') and book['title'].startswith('Atlas')
+        assert api.store.search_books('', '10')
+    editor.join()
+    assert not errors
+    assert len(store.books) == 4
@@ -0,0 +1,27 @@
+"""Tests for the cart autosave (bookshop_autosave.py)"""
+
+from bookshop_autosave import CartAutosave, resolve_items
+
+
+def test_restored_cart_uses_current_inventory(store):
+    autosave = CartAutosave(store.app_dir)
+    try:
+        cart = [store.get_book(sku).copy() for sku in ('MATH-10-001', 'MATH-10-001', 'CHEM-9-001', 'ENG-9-001')]
+        autosave.snapshot(cart)
+    finally:
+        autosave.close()
+
+    # While the shop was closed one book was deleted and one repriced
+    store.delete_book('CHEM-9-001')
+    store.update_book('ENG-9-001', 'English Class 9', 'ENG-9-001', '9', 275.0)
+
+    saved = CartAutosave(store.app_dir)
+    try:
+        books, missing, repriced = resolve_items(saved.load()['items'], store.get_book)
+    finally:
+        saved.close()
+
+    assert [b['sku'] for b in books] == ['MATH-10-001', 'MATH-10-001', 'ENG-9-001']
+    assert books[-1]['price'] == 275.0
+    assert missing == ['Chemistry Class 9']
+    assert repriced == ['English Class 9']
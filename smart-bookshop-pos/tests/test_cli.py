@@ -0,0 +1,44 @@
+"""Tests for the command-line batch tools (bookshop_cli.py)"""
+
+import json
+import os
+from datetime import datetime
+
+from bookshop_cli import main
+from bookshop_store import BookShopStore
+
+
+def test_compact_keeps_other_temp_files(store):
+    store.checkout([store.get_book('MATH-10-001').copy()], datetime(2026, 3, 2, 10, 0))
+    records = store.sales_records
+
+    leftover = records.path + '.tmp'
+    in_progress = os.path.join(store.app_dir, 'cart_autosave.json.tmp')
+    for path in (leftover, in_progress):
+        with open(path, 'w') as f:
+            f.write('partial')
+
+    assert main(['--data-dir', store.base_dir, 'compact']) == 0
+    assert not os.path.exists(leftover)
+    assert os.path.exists(in_progress)
+
+
+def test_inventory_import_journals_every_row(store, tmp_path):
+    before = store.journal.seq
+    rows = [
+        {'title': 'Biology Class 10', 'sku': 'BIO-10-001', 'category': '10', 'price': 320},
+        {'title': 'Mathematics Class 10', 'sku': 'MATH-10-001', 'category': '10', 'price': 470},
+        {'title': 'No Price', 'sku': 'BAD-1', 'category': '10'}
+    ]
+    source = str(tmp_path / 'new_books.json')
+    with open(source, 'w') as f:
+        json.dump(rows, f)
+
+    assert main(['--data-dir', store.base_dir, 'inventory', 'import', source]) == 1
+
+    reloaded = BookShopStore(store.base_dir)
+    reloaded.load_inventory()
+    assert reloaded.get_book('MATH-10-001')['price'] == 470.0
+    ops = [op for op, _ in reloaded.journal.read_from(0)][-2:]
+    assert [(op['seq'], op['sku']) for op in ops] == [(before + 1, 'BIO-10-001'), (before + 2, 'MATH-10-001')]
+    assert reloaded.journal.seq == before + 2
@@ -0,0 +1,27 @@
+"""Tests for the data file checks (bookshop_integrity.py)"""
+
+from openpyxl import Workbook
+
+from bookshop_integrity import scan_sales_file
+from bookshop_store import SALES_COLUMNS
+
+
+def write_sales(path, rows):
+    wb = Workbook()
+    wb.active.append(SALES_COLUMNS)
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+
+
+def test_blank_dates_on_later_sale_lines_are_not_errors(tmp_path):
+    path = str(tmp_path / '02-03-2026.xlsx')
+    write_sales(path, [
+        ['02-03-2026', '10:00 AM', 'Mathematics Class 10', 'Class 10', 'MATH-10-001', 'Rs 450.00', 'Rs 700.00'],
+        [None, None, 'English Class 9', 'Class 9', 'ENG-9-001', 'Rs 250.00', ''],
+        ['03-03-2026', '11:00 AM', 'Physics Class 10', 'Class 10', 'PHYS-10-001', 'Rs 380.00', 'Rs 380.00']
+    ])
+
+    result = scan_sales_file(path)
+    assert result['lines'] == 3
+    assert result['problems'] == ["row 4: date '03-03-2026' does not match the file name"]
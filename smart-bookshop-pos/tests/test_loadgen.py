@@ -0,0 +1,65 @@
+"""Tests for the load generator (bookshop_loadgen.py)"""
+
+import json
+import os
+import time
+
+from bookshop_loadgen import LoadRunner, main, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [10, 20, 30, 40, 50]
+    assert percentile(values, 50) == 30
+    assert percentile(values, 95) == 50
+    assert percentile(values, 20) == 10
+    assert percentile(values, 21) == 20
+    assert percentile([], 50) == 0.0
+
+
+def snapshot(folder):
+    """Every file under a folder with its size"""
+    return {
+        os.path.join(root, name): os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(folder) for name in names
+    }
+
+
+def test_data_folder_is_not_modified(shop_dir, capsys):
+    before = snapshot(shop_dir)
+    main(['--data-dir', shop_dir, 'synthetic', '--rate', '50', '--duration', '0.1', '--seed', '1'])
+    assert snapshot(shop_dir) == before
+    assert 'checkout' in capsys.readouterr().out
+
+
+def test_latency_counts_from_the_scheduled_time(store):
+    runner = LoadRunner(store)
+    checkout = store.checkout
+
+    def slow_checkout(*args):
+        time.sleep(0.2)
+        return checkout(*args)
+
+    store.checkout = slow_checkout
+    item = {'sku': 'MATH-10-001'}
+    runner.run([(0.0, [item]), (0.01, [item])])
+
+    # The second sale was due while the first was still checking out,
+    # so the wait counts against it as well as its own checkout
+    first, second = runner.timings['sale']
+    assert first >= 0.2
+    assert second >= 0.2 + 0.2 - 0.01
+    assert runner.timings['lookup'][1] >= 0.2 - 0.01
+
+
+def test_sales_are_priced_like_the_till(shop_dir, store):
+    with open(store.pricing_file, 'w') as f:
+        json.dump([{'type': 'contract', 'name': 'Green Hills', 'percent': 20, 'prices': {'MATH-10-001': 400}}], f)
+    store.load_pricing()
+
+    invoices = []
+    checkout = store.checkout
+    store.checkout = lambda *args: invoices.append(checkout(*args))
+    LoadRunner(store, 'Green Hills').run_sale([{'sku': 'MATH-10-001'}, {'sku': 'PHYS-10-001'}])
+
+    assert [line['price'] for line in invoices[0]['items']] == [400.0, 304.0]
+    assert invoices[0]['total_amount'] == 704.0
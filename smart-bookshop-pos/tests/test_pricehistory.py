@@ -0,0 +1,72 @@
+"""Tests for the list price history (bookshop_pricehistory.py)"""
+
+import math
+from datetime import datetime
+
+from bookshop_pricehistory import PriceHistory
+from bookshop_sync import BranchSync
+
+JAN, FEB, MAR = datetime(2026, 1, 1), datetime(2026, 2, 1), datetime(2026, 3, 1)
+
+
+def test_price_at_uses_change_in_force(tmp_path):
+    history = PriceHistory(str(tmp_path / 'history.jsonl'))
+    history.record('MATH', 400, JAN)
+    history.record('MATH', 450, MAR)
+
+    assert history.price_at('MATH', datetime(2025, 12, 31)) is None
+    assert history.price_at('MATH', FEB) == 400
+    assert history.price_at('MATH', MAR) == 450
+
+
+def test_unchanged_price_is_not_logged(tmp_path):
+    history = PriceHistory(str(tmp_path / 'history.jsonl'))
+    assert history.record('MATH', 400, JAN)
+    assert not history.record('MATH', 400, FEB)
+    assert len(history.timeline('MATH')) == 1
+
+
+def test_rename_keeps_old_sku_history(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    history = PriceHistory(path)
+    history.record('MATH-OLD', 400, JAN)
+    history.rename('MATH-OLD', 'MATH-NEW', FEB)
+    history.record('MATH-NEW', 450, MAR)
+
+    for reopened in (history, PriceHistory(path)):
+        assert reopened.price_at('MATH-OLD', FEB) == 400
+        assert reopened.price_at('MATH-NEW', FEB) == 400
+        assert reopened.price_at('MATH-NEW', MAR) == 450
+
+    prices = history.prices_at(['MATH-OLD', 'MATH-NEW', 'OTHER'], [FEB, MAR, FEB])
+    assert prices[:2].tolist() == [400, 450]
+    assert math.isnan(prices[2])
+
+
+def test_torn_line_is_skipped(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    history = PriceHistory(str(path))
+    history.record('MATH', 400, JAN)
+    with open(path, 'a') as f:
+        f.write('{"sku": "MA')
+    assert PriceHistory(str(path)).price_at('MATH', FEB) == 400
+
+
+def test_synced_price_change_takes_effect_at_its_time(store):
+    book = dict(store.get_book('MATH-10-001'), price=999.0)
+    BranchSync(store).apply({
+        'type': 'book_upsert', 'node': 'peer', 'seq': 1,
+        'ts': FEB.isoformat(), 'sku': book['sku'], 'book': book
+    })
+    assert (FEB, 999.0) in store.price_history.timeline('MATH-10-001')
+
+
+def test_synced_rename_keeps_history(store):
+    store.price_history.record('PHYS-10-001', 380.0, JAN)
+    book = dict(store.get_book('PHYS-10-001'), sku='PHYS-10-002')
+    BranchSync(store).apply({
+        'type': 'book_update', 'node': 'peer', 'seq': 1, 'ts': FEB.isoformat(),
+        'old_sku': 'PHYS-10-001', 'sku': 'PHYS-10-002', 'book': book
+    })
+    assert store.price_history.price_at('PHYS-10-001', FEB) == 380.0
+    assert store.price_history.price_at('PHYS-10-002', FEB) == 380.0
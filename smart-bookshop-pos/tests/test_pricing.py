@@ -0,0 +1,122 @@
+"""Tests for the pricing rules (bookshop_pricing.py)"""
+
+import json
+from decimal import Decimal
+
+from bookshop_pricing import PricingEngine
+
+MATH = {'title': 'Mathematics', 'sku': 'MATH', 'category': '10', 'price': 450.0}
+PHYS = {'title': 'Physics', 'sku': 'PHYS', 'category': '10', 'price': 380.0}
+ENG = {'title': 'English', 'sku': 'ENG', 'category': '9', 'price': 250.0}
+
+
+def test_no_rules_is_list_price():
+    lines, summary = PricingEngine().price_cart([MATH, ENG])
+    assert summary['total'] == Decimal('700.00')
+    assert [line['price'] for line in lines] == [450.0, 250.0]
+
+
+def test_class_discount_and_tax():
+    engine = PricingEngine([
+        {'type': 'class_discount', 'category': '10', 'percent': 10},
+        {'type': 'tax', 'category': 'All', 'percent': 5}
+    ])
+    _, summary = engine.price_cart([MATH, ENG])
+    # 405 + 20.25 tax, 250 + 12.50 tax
+    assert summary['total'] == Decimal('687.75')
+    assert summary['discount'] == Decimal('45.00')
+
+
+def test_contract_price_overrides_class_discount():
+    engine = PricingEngine([
+        {'type': 'class_discount', 'category': '10', 'percent': 10},
+        {'type': 'contract', 'name': 'Green Hills', 'percent': 20, 'prices': {'MATH': 400}}
+    ])
+    lines, _ = engine.price_cart([MATH, PHYS], 'Green Hills')
+    assert [line['price'] for line in lines] == [400.0, 304.0]
+
+
+def test_set_offer_lines_add_up_to_total():
+    engine = PricingEngine([{'type': 'set_offer', 'name': 'Set', 'percent': 7, 'skus': ['MATH', 'PHYS']}])
+    lines, summary = engine.price_cart([MATH, PHYS, MATH])
+    assert summary['total'] == Decimal('1221.90')   # 830 - 58.10 + 450
+    assert sum(Decimal(str(line['price'])) for line in lines) == summary['total']
+
+
+def test_incremental_cart_matches_full_pricing():
+    engine = PricingEngine([{'type': 'set_offer', 'name': 'Set', 'percent': 7, 'skus': ['MATH', 'PHYS']}])
+    cart = engine.cart()
+    for book in (MATH, PHYS, ENG, PHYS):
+        cart.add(book)
+    cart.remove(1)
+    assert cart.total == engine.price_cart([MATH, ENG, PHYS])[1]['total']
+
+
+def test_free_set_does_not_divide_by_zero():
+    engine = PricingEngine([{'type': 'set_offer', 'name': 'Set', 'percent': 10, 'skus': ['MATH', 'PHYS']}])
+    # The complete set is made of free copies, so it has nothing to take a discount off
+    cart = [dict(MATH, price=0), dict(PHYS, price=0), MATH]
+    lines, _ = engine.price_cart(cart)
+    assert [line['price'] for line in lines] == [0.0, 0.0, 450.0]
+
+
+def test_set_is_priced_from_its_own_copies():
+    engine = PricingEngine([{'type': 'set_offer', 'name': 'Set', 'percent': 10, 'skus': ['MATH', 'PHYS']}])
+    # The set is the first MATH and PHYS; the dearer MATH added last is not in it
+    cart = [MATH, PHYS, dict(MATH, price=500)]
+    lines, summary = engine.price_cart(cart)
+    assert summary['total'] == Decimal('1247.00')   # 830 - 83 + 500
+    assert [line['price'] for line in lines][2] == 500.0
+
+    # Removing the first MATH moves the dearer copy into the set, as finalize() sees it
+    priced = engine.cart()
+    for book in cart:
+        priced.add(book)
+    priced.remove(0)
+    assert priced.total == engine.price_cart([PHYS, dict(MATH, price=500)])[1]['total'] == Decimal('792.00')
+    assert sum(Decimal(str(line['price'])) for line in priced.finalize()[0]) == priced.total
+
+
+def test_percent_outside_0_to_100_is_rejected():
+    engine = PricingEngine([
+        {'type': 'class_discount', 'category': '10', 'percent': 120},
+        {'type': 'tax', 'percent': -5},
+        {'type': 'contract', 'name': 'Green Hills', 'percent': 101},
+        {'type': 'set_offer', 'name': 'Set', 'percent': 100, 'skus': ['MATH', 'PHYS']}
+    ])
+    assert len(engine.errors) == 3
+    assert all('between 0 and 100' in error for error in engine.errors)
+    assert engine.class_discount == {} and engine.class_tax == {} and engine.contracts == {}
+    assert engine.price_cart([MATH, PHYS])[1]['total'] == Decimal('0.00')
+
+
+def test_bad_rules_are_skipped_with_a_message():
+    engine = PricingEngine([
+        {'type': 'class_discount', 'category': '10', 'percent': 10},
+        {'type': 'discount_everything', 'percent': 50},
+        {'type': 'tax', 'percent': 'lots'},
+        {'type': 'contract', 'percent': 5},
+        {'type': 'set_offer', 'name': 'A', 'percent': 5, 'skus': ['MATH']},
+        {'type': 'set_offer', 'name': 'B', 'percent': 5, 'skus': ['PHYS', 'MATH']},
+        'not a rule'
+    ])
+    assert len(engine.errors) == 5
+    assert engine.class_discount == {'10': Decimal('0.1')}
+    # The rejected offer did not claim PHYS
+    assert engine.offers_by_sku == {'MATH': 0}
+
+
+def test_unreadable_rules_file(tmp_path):
+    path = tmp_path / 'pricing_rules.json'
+    path.write_text('{"type": ')
+    engine = PricingEngine.load(str(path))
+    assert engine.errors and engine.rules == []
+
+
+def test_store_starts_with_bad_rule(shop_dir):
+    from bookshop_store import BookShopStore
+
+    with open(f"{shop_dir}/Inventory/pricing_rules.json", 'w') as f:
+        json.dump([{'type': 'typo'}], f)
+    store = BookShopStore(shop_dir)
+    assert store.pricing.errors
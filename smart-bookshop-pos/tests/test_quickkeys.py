@@ -0,0 +1,54 @@
+"""Tests for the best-seller quick keys (bookshop_quickkeys.py)"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from bookshop_quickkeys import QuickKeys
+
+
+def test_recent_sales_outrank_older_ones(tmp_path):
+    keys = QuickKeys(str(tmp_path))
+    start = keys.landmark
+    keys.add(start, '10', 'MATH-10-001', copies=3)
+    keys.add(start + timedelta(days=60), '10', 'PHYS-10-001', copies=1)
+    keys.add(start + timedelta(days=60), '9', 'ENG-9-001', copies=2)
+
+    # Three copies two half lives ago are worth 0.75 of one copy today
+    assert keys.top('10') == ['PHYS-10-001', 'MATH-10-001']
+    assert keys.top() == ['ENG-9-001', 'PHYS-10-001', 'MATH-10-001']
+    assert keys.decayed_count('10', 'MATH-10-001', now=start + timedelta(days=60)) == pytest.approx(0.75)
+
+
+def test_weakest_book_is_evicted_and_counts_survive_a_restart(tmp_path):
+    keys = QuickKeys(str(tmp_path))
+    keys.CAPACITY = 2
+    now = keys.landmark
+    keys.add(now, '10', 'MATH-10-001', copies=5)
+    keys.add(now, '10', 'PHYS-10-001', copies=1)
+    keys.add(now, '10', 'BIO-10-001', copies=2)
+    assert keys.top('10') == ['MATH-10-001', 'BIO-10-001']
+
+    keys.save()
+    reloaded = QuickKeys(str(tmp_path))
+    assert not reloaded.is_new
+    assert reloaded.top('10') == ['MATH-10-001', 'BIO-10-001']
+
+
+def test_rebuild_matches_counting_each_checkout(store):
+    day = datetime(2026, 3, 2, 10, 0)
+    for offset, skus in ((0, ['MATH-10-001', 'PHYS-10-001']), (10, ['PHYS-10-001']), (40, ['ENG-9-001', 'MATH-10-001'])):
+        store.checkout([store.get_book(sku).copy() for sku in skus], day + timedelta(days=offset))
+
+    counted = QuickKeys(store.app_dir)
+    counted.landmark = day
+    for line in store.sales_records.page(0, len(store.sales_records)):
+        counted.add(line['timestamp'], line['category'], line['sku'])
+
+    rebuilt = QuickKeys(store.app_dir)
+    rebuilt.rebuild(store.sales_records)
+    assert rebuilt.top() == counted.top() == ['MATH-10-001', 'ENG-9-001', 'PHYS-10-001']
+
+    latest = day + timedelta(days=40)
+    for category, sku in (('10', 'MATH-10-001'), ('10', 'PHYS-10-001'), ('9', 'ENG-9-001')):
+        assert rebuilt.decayed_count(category, sku, latest) == pytest.approx(counted.decayed_count(category, sku, latest))
@@ -0,0 +1,156 @@
+"""Tests for the memory-mapped sales records (bookshop_records.py)"""
+
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import bookshop_records
+from bookshop_records import HEADER_SIZE, MAGIC_V1, RECORD_DTYPE_V1, SalesRecordFile
+from bookshop_store import BookShopStore
+
+MATH = {'title': 'Mathematics Class 10', 'sku': 'MATH-10-001', 'category': '10', 'price': 450.0}
+ENG = {'title': 'English Class 9', 'sku': 'ENG-9-001', 'category': '9', 'price': 250.5}
+
+
+def test_append_and_reopen(tmp_path):
+    records = SalesRecordFile(str(tmp_path))
+    records.append_sale(datetime(2026, 3, 2, 10, 0), [MATH, ENG])
+    records.append_sale(datetime(2026, 3, 2, 11, 0), [ENG])
+
+    reopened = SalesRecordFile(str(tmp_path))
+    assert len(reopened) == 3
+    assert reopened.next_sale == 3
+    assert reopened.row(reopened.records[1]) == {
+        'timestamp': datetime(2026, 3, 2, 10, 0), 'sale': 1, 'invoice': None, 'title': ENG['title'],
+        'sku': ENG['sku'], 'category': '9', 'price': 250.5
+    }
+    assert reopened.revenue_by_category() == {'10': 450.0, '9': 501.0}
+
+
+def test_torn_record_is_dropped(tmp_path):
+    records = SalesRecordFile(str(tmp_path))
+    records.append_sale(datetime(2026, 3, 2, 10, 0), [MATH])
+    with open(records.path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    assert len(SalesRecordFile(str(tmp_path))) == 1
+
+
+def test_rebuild_swaps_file_under_open_view(store):
+    store.checkout([store.get_book('MATH-10-001').copy()], datetime(2026, 3, 2, 10, 0))
+    records = store.sales_records
+    held = records.records           # e.g. a sales index still using the old rows
+    old_inode = os.stat(records.path).st_ino
+    generation = records.generation
+
+    assert records.rebuild_from_excel(store.sales_dir) == 1
+    assert os.stat(records.path).st_ino != old_inode
+    assert records.generation == generation + 1
+    assert held['price'].tolist() == [45000]   # Old mapping still readable
+    assert records.page(0, 1)[0]['sku'] == 'MATH-10-001'
+    assert not os.path.exists(records.path + '.tmp')
+
+
+def test_compact_sorts_by_time_and_drops_unused_strings(tmp_path):
+    records = SalesRecordFile(str(tmp_path))
+    records.append_sale(datetime(2026, 3, 2, 12, 0), [ENG])
+    records.append_sale(datetime(2026, 3, 1, 9, 0), [MATH])
+    records.strings.intern('unused')
+
+    assert records.compact() == 2
+    assert [row['sku'] for row in records.page(0, 2)] == ['MATH-10-001', 'ENG-9-001']
+    assert 'unused' not in SalesRecordFile(str(tmp_path)).strings.ids
+
+
+def test_version_1_file_is_upgraded(store):
+    invoice = store.checkout([store.get_book('MATH-10-001').copy()], datetime(2026, 3, 2, 10, 0))['invoice_no']
+    records = store.sales_records
+    row = records.records[0]
+    strings = records.strings
+
+    # Write the same sale in the old layout, plus one the journal does not know
+    old = np.zeros(2, dtype=RECORD_DTYPE_V1)
+    for name in RECORD_DTYPE_V1.names:
+        old[name][0] = row[name]
+    old[1] = (np.datetime64('2025-01-01T09:00:00'), 10000, 2, row['title'], row['sku'], row['category'])
+    with open(records.path, 'wb') as f:
+        f.write(MAGIC_V1.ljust(HEADER_SIZE, b'\x00') + old.tobytes())
+    strings_path = strings.path
+
+    upgraded = SalesRecordFile(store.app_dir)
+    assert upgraded.strings.path == strings_path
+    assert [line['invoice'] for line in upgraded.page(0, 2)] == [invoice, None]
+    assert upgraded.page(0, 1)[0]['price'] == 450.0
+
+
+def test_crash_between_compact_swaps_is_finished_on_open(tmp_path, monkeypatch):
+    records = SalesRecordFile(str(tmp_path))
+    records.strings.intern('unused')        # Shifts every string id on compact
+    records.append_sale(datetime(2026, 3, 2, 12, 0), [ENG])
+    records.append_sale(datetime(2026, 3, 1, 9, 0), [MATH])
+
+    real_replace = bookshop_records.replace_file
+    swaps = []
+
+    def crash_after_first(source, target):
+        if swaps:
+            raise KeyboardInterrupt   # The power goes out
+        swaps.append(target)
+        real_replace(source, target)
+
+    monkeypatch.setattr(bookshop_records, 'replace_file', crash_after_first)
+    with pytest.raises(KeyboardInterrupt):
+        records.compact()
+    monkeypatch.setattr(bookshop_records, 'replace_file', real_replace)
+    assert os.path.exists(records.compact_marker)
+
+    reopened = SalesRecordFile(str(tmp_path))
+    assert [(row['sku'], row['title']) for row in reopened.page(0, 2)] == [
+        (MATH['sku'], MATH['title']), (ENG['sku'], ENG['title'])]
+    assert not os.path.exists(records.compact_marker)
+
+
+def test_crash_before_compact_marker_keeps_old_files(tmp_path):
+    records = SalesRecordFile(str(tmp_path))
+    records.append_sale(datetime(2026, 3, 2, 12, 0), [ENG])
+    for path in (records.path, records.strings_path):
+        with open(path + '.tmp', 'w') as f:
+            f.write('half written')
+
+    assert [row['sku'] for row in SalesRecordFile(str(tmp_path)).page(0, 1)] == [ENG['sku']]
+
+
+def test_first_build_runs_in_background_while_selling(store, monkeypatch):
+    first = store.checkout([store.get_book('MATH-10-001').copy()], datetime(2026, 3, 2, 10, 0))['invoice_no']
+    store.checkout([store.get_book('ENG-9-001').copy()], datetime(2026, 3, 3, 10, 0))
+    for name in ('sales.rec', 'sales.str'):
+        os.remove(os.path.join(store.app_dir, name))
+
+    # Hold the build in the middle of reading the Excel files
+    reading = threading.Event()
+    release = threading.Event()
+    encode = SalesRecordFile._encode_file
+
+    def slow_encode(self, day, path):
+        reading.set()
+        assert release.wait(10)
+        return encode(self, day, path)
+
+    monkeypatch.setattr(SalesRecordFile, '_encode_file', slow_encode)
+    reopened = BookShopStore(store.base_dir)
+    reopened.load_inventory()
+    records = reopened.sales_records
+    assert reading.wait(10)
+    assert not reopened.records_ready.is_set()
+
+    # A checkout goes through without waiting for the build
+    third = reopened.checkout([reopened.get_book('PHYS-10-001').copy()], datetime(2026, 3, 3, 12, 0))['invoice_no']
+    release.set()
+    assert reopened.records_ready.wait(10)
+
+    lines = records.page(0, 10)
+    assert [line['sku'] for line in lines] == ['MATH-10-001', 'ENG-9-001', 'PHYS-10-001']
+    assert [lines[0]['invoice'], lines[2]['invoice']] == [first, third]
+    assert not records.needs_build
@@ -0,0 +1,38 @@
+"""Tests for the sales history index (bookshop_salesindex.py)"""
+
+from datetime import datetime
+
+
+def sell(store, when, *skus):
+    """Check out one copy of each SKU; returns the invoice id"""
+    return store.checkout([store.get_book(sku).copy() for sku in skus], when)['invoice_no']
+
+
+def test_postings_carry_invoice_ids(store):
+    first = sell(store, datetime(2026, 3, 2, 10, 0), 'MATH-10-001', 'MATH-10-001', 'ENG-9-001')
+    index = store.sales_index     # Built from the records so far
+    second = sell(store, datetime(2026, 3, 3, 11, 0), 'MATH-10-001')   # Indexed incrementally
+
+    postings = index.postings('MATH-10-001')
+    assert [(p['invoice'], p['qty'], p['amount']) for p in postings] == [(first, 2, 900.0), (second, 1, 450.0)]
+    assert [p['invoice'] for p in index.postings('ENG-9-001')] == [first]
+
+
+def test_find_and_sell_through(store):
+    sell(store, datetime(2026, 3, 2, 10, 0), 'PHYS-10-001', 'MATH-10-001')
+    sell(store, datetime(2026, 3, 2, 12, 0), 'PHYS-10-001')
+    sell(store, datetime(2026, 3, 4, 9, 0), 'PHYS-10-001')
+
+    index = store.sales_index
+    assert index.find('physics 10') == ['PHYS-10-001']
+    assert index.find('class') == ['MATH-10-001', 'PHYS-10-001']
+
+    summary = index.sell_through('PHYS-10-001', start=datetime(2026, 3, 2), end=datetime(2026, 3, 3))
+    assert (summary['copies'], summary['sales'], summary['revenue']) == (2, 2, 760.0)
+    assert summary['days'] == [(datetime(2026, 3, 2).date(), 2, 760.0)]
+
+
+def test_rebuild_recovers_invoice_ids_from_journal(store):
+    invoice = sell(store, datetime(2026, 3, 2, 10, 0), 'ENG-9-001')
+    store.sales_records.rebuild_from_excel(store.sales_dir)
+    assert [p['invoice'] for p in store.sales_index.postings('ENG-9-001')] == [invoice]
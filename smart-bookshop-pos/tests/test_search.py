@@ -0,0 +1,64 @@
+"""Tests for the search index and table helpers (bookshop_search.py)"""
+
+import random
+
+from bookshop_search import reorder_rows, unmoved_rows
+
+
+class FakeTree:
+    """The parts of ttk.Treeview used to reorder rows, counting the calls"""
+
+    def __init__(self, children):
+        self.children = list(children)
+        self.created = set(children)
+        self.calls = 0
+
+    def detach(self, *items):
+        self.calls += 1
+        for item in items:
+            self.children.remove(item)
+
+    def exists(self, item):
+        return item in self.created
+
+    def move(self, item, parent, index):
+        self.calls += 1
+        if item in self.children:
+            self.children.remove(item)
+        self.children.insert(index, item)
+
+
+    def insert(self, item, index):
+        self.created.add(item)
+        self.move(item, '', index)
+
+
+def reorder(tree, old, new):
+    reorder_rows(tree, old, new, tree.insert)
+
+
+def test_unmoved_rows_keep_the_longest_ordered_run():
+    assert unmoved_rows(list('XAB'), list('ABX')) == {'A', 'B'}
+    assert unmoved_rows(list('ABCDE'), list('BDZAE')) == {'B', 'D', 'E'}
+    assert unmoved_rows([], list('AB')) == set()
+
+
+def test_reordering_reaches_the_new_order():
+    generator = random.Random(7)
+    for _ in range(500):
+        old = []
+        tree = FakeTree(old)
+        for _ in range(4):
+            new = generator.sample(range(30), generator.randint(0, 30))
+            if generator.random() < 0.5:
+                new.sort()
+            reorder(tree, old, new)
+            assert tree.children == new
+            old = new
+
+
+def test_narrowing_a_search_touches_only_rows_that_leave():
+    old = list(range(1000))
+    tree = FakeTree(old)
+    reorder(tree, old, [row for row in old if row % 7])
+    assert tree.calls == 1
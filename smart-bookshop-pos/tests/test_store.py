@@ -0,0 +1,69 @@
+"""Tests for the shared inventory and sales store (bookshop_store.py)"""
+
+import json
+
+from bookshop_store import Book, BookShopStore
+from conftest import BOOKS, write_shop
+
+
+def test_bad_rows_are_skipped_and_kept(tmp_path):
+    rows = BOOKS[:2] + [
+        {'title': 'No Price', 'sku': 'BAD-1', 'category': '10'},
+        {'title': 'Priced in text', 'sku': 'OK-1', 'category': '9', 'price': 'Rs 1,500'},
+        {'title': 'Free', 'sku': 'BAD-2', 'category': '9', 'price': 'free'},
+        'not a book'
+    ]
+    store = BookShopStore(write_shop(tmp_path / 'shop', rows))
+    store.load_inventory()
+
+    assert [book['sku'] for book in store.books] == ['MATH-10-001', 'PHYS-10-001', 'OK-1']
+    assert all(isinstance(book, Book) for book in store.books)
+    assert store.get_book('OK-1')['price'] == 1500.0
+    assert [position for position, _, _ in store.invalid_books] == [3, 5, 6]
+
+    # Saving never drops the rows that could not be loaded
+    store.save_inventory()
+    with open(store.inventory_file) as f:
+        saved = json.load(f)
+    assert {'title': 'No Price', 'sku': 'BAD-1', 'category': '10'} in saved
+    assert 'not a book' in saved
+    assert len(saved) == len(rows)
+
+
+def test_edited_book_keeps_its_place_in_its_class(store):
+    store.add_book({'title': 'Biology Class 10', 'sku': 'BIO-10-001', 'category': '10', 'price': 320.0})
+    store.update_book('PHYS-10-001', 'Physics Class 10 (New)', 'PHYS-10-002', '10', 380.0)
+    store.put_book({'title': 'Mathematics Class 10', 'sku': 'MATH-10-001', 'category': '10', 'price': 470.0})
+
+    in_order = [book['sku'] for book in store.books if book['category'] == '10']
+    assert list(store.class_buckets['10']) == in_order == ['MATH-10-001', 'PHYS-10-002', 'BIO-10-001']
+    assert [book['sku'] for book in store.search_books(category='10')] == in_order
+    assert store.get_book('PHYS-10-001') is None
+    assert store.search_books('physics new')[0]['sku'] == 'PHYS-10-002'
+
+    # Moving to another class removes it from the old bucket
+    store.update_book('BIO-10-001', 'Biology Class 9', 'BIO-10-001', '9', 320.0)
+    assert list(store.class_buckets['10']) == ['MATH-10-001', 'PHYS-10-002']
+    assert 'BIO-10-001' in store.class_buckets['9']
+
+
+def test_new_journal_is_seeded_in_one_write(tmp_path):
+    books = [{'title': f'Book {i}', 'sku': f'SKU-{i}', 'category': '10', 'price': 100.0} for i in range(2000)]
+    store = BookShopStore(write_shop(tmp_path / 'shop', books))
+    store.load_inventory()
+
+    ops = [op for op, _ in store.journal.read_from(0)]
+    assert [op['seq'] for op in ops] == list(range(1, 2001))
+    assert [op['sku'] for op in ops] == [book['sku'] for book in books]
+    with open(store.journal.node_file) as f:
+        assert json.load(f)['seq'] == 2000
+
+
+def test_book_versions_change_only_for_edited_books(store):
+    before = dict(store.book_versions)
+    store.update_book('ENG-9-001', 'English Class 9', 'ENG-9-002', '9', 260.0)
+    after = store.book_versions
+
+    assert 'ENG-9-001' not in after and after['ENG-9-002'] > max(before.values())
+    assert {sku: after[sku] for sku in before if sku != 'ENG-9-001'} == \
+        {sku: version for sku, version in before.items() if sku != 'ENG-9-001'}
@@ -0,0 +1,152 @@
+"""Tests for the operation journal and branch sync (bookshop_store.py, bookshop_sync.py)"""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from bookshop_reports import SalesDashboard
+from bookshop_store import BookShopStore, OpJournal
+from bookshop_sync import BranchSync
+from conftest import write_shop
+
+
+def test_seq_recovered_from_journal(tmp_path):
+    journal = OpJournal(str(tmp_path))
+    journal.record('note')
+    journal.record('note')
+
+    # Simulate a crash after the journal write but before node.json was saved
+    with open(journal.node_file, 'w') as f:
+        json.dump({'node_id': journal.node_id, 'seq': 1}, f)
+
+    reopened = OpJournal(str(tmp_path))
+    assert reopened.record('note')['id'] == f"{journal.node_id}-3"
+
+
+def test_node_file_written_atomically(tmp_path):
+    journal = OpJournal(str(tmp_path))
+    journal.record('note')
+    assert not os.path.exists(journal.node_file + '.tmp')
+    with open(journal.node_file) as f:
+        assert json.load(f)['seq'] == 1
+
+
+def test_torn_tail_is_dropped_before_append(tmp_path):
+    journal = OpJournal(str(tmp_path))
+    journal.record('note')
+    with open(journal.journal_file, 'a') as f:
+        f.write('{"id": "torn')
+
+    journal.record('note')
+    ops = [op for op, _ in journal.read_from(0)]
+    assert [op['seq'] for op in ops] == [1, 2]
+
+
+def test_last_writer_wins_both_ways(tmp_path):
+    a = BookShopStore(write_shop(tmp_path / 'a'))
+    a.load_inventory()
+    b = BookShopStore(write_shop(tmp_path / 'b'))
+    b.load_inventory()
+
+    a.update_book('MATH-10-001', 'Mathematics Class 10', 'MATH-10-001', '10', 500.0)
+    b.update_book('MATH-10-001', 'Mathematics Class 10', 'MATH-10-001', '10', 520.0)   # later
+    BranchSync(a).sync_with(b.base_dir)
+
+    assert a.get_book('MATH-10-001')['price'] == 520.0
+    reloaded = BookShopStore(b.base_dir)
+    reloaded.load_inventory()
+    assert reloaded.get_book('MATH-10-001')['price'] == 520.0
+
+
+def test_remote_sale_reaches_listeners(tmp_path):
+    a = BookShopStore(write_shop(tmp_path / 'a'))
+    a.load_inventory()
+    b = BookShopStore(write_shop(tmp_path / 'b'))
+    b.load_inventory()
+
+    invoice = b.checkout([b.get_book('PHYS-10-001').copy()], datetime(2026, 3, 2, 10, 30))
+    heard = []
+    a.sale_listeners.append(lambda timestamp, cart, total, invoice_no: heard.append(invoice_no))
+
+    result = BranchSync(a).sync_with(b.base_dir)
+    assert result['received']['sales'] == 1
+    assert heard == [invoice['invoice_no']]
+
+    # Already seen: not applied twice
+    assert BranchSync(a).sync_with(b.base_dir)['received']['sales'] == 0
+
+
+def test_refuses_folder_that_is_not_a_shop(store, tmp_path):
+    folder = tmp_path / 'documents'
+    folder.mkdir()
+    with pytest.raises(ValueError):
+        BranchSync(store).sync_with(str(folder))
+    assert os.listdir(folder) == []
+
+
+def test_dashboard_ignores_synced_sale_from_earlier_day():
+    dashboard = SalesDashboard()
+    dashboard.record_sale(datetime.now(), [{'category': '10'}], 100.0)
+    dashboard.record_sale(datetime(2020, 1, 1), [{'category': '9'}], 50.0)
+    assert dashboard.snapshot()['revenue'] == 100.0
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_peer_folder_is_not_opened_as_a_store(tmp_path):
+    a = BookShopStore(write_shop(tmp_path / 'a'))
+    a.load_inventory()
+    b = BookShopStore(write_shop(tmp_path / 'b'))
+    b.load_inventory()
+    b.checkout([b.get_book('PHYS-10-001').copy()], datetime(2026, 3, 2, 10, 30))
+
+    # A hand-edited row the peer has not normalised yet, and a bad one
+    with open(b.inventory_file) as f:
+        rows = json.load(f)
+    rows[2]['price'] = '300'
+    rows.append({'title': 'Broken'})
+    with open(b.inventory_file, 'w') as f:
+        json.dump(rows, f)
+    before = {name: read_file(os.path.join(b.app_dir, name)) for name in ('node.json', 'journal.jsonl')}
+    history_before = read_file(b.price_history.path)
+
+    a.update_book('MATH-10-001', 'Mathematics Class 10', 'MATH-10-001', '10', 500.0)
+    sent = BranchSync(a).sync_with(b.base_dir)['sent']
+
+    # node.json untouched; the journal only gained the ops that were sent
+    assert read_file(b.journal.node_file) == before['node.json']
+    journal = read_file(b.journal.journal_file)
+    assert journal.startswith(before['journal.jsonl'])
+    assert journal[len(before['journal.jsonl']):].count(b'\n') == sent['inventory'] + sent['sales']
+    # Only the sent price change was added to the price history
+    assert read_file(b.price_history.path).startswith(history_before)
+
+    # Only the changed book's row was rewritten
+    with open(b.inventory_file) as f:
+        after = json.load(f)
+    assert after[0]['price'] == 500.0
+    assert after[1:] == rows[1:]
+
+
+def test_sent_sale_reaches_peer_records(tmp_path):
+    a = BookShopStore(write_shop(tmp_path / 'a'))
+    a.load_inventory()
+    b = BookShopStore(write_shop(tmp_path / 'b'))
+    b.load_inventory()
+    assert len(b.sales_records) == 0
+
+    invoice = a.checkout([a.get_book('ENG-9-001').copy()], datetime(2026, 3, 2, 10, 30))
+    assert BranchSync(a).sync_with(b.base_dir)['sent']['sales'] == 1
+
+    # The peer's binary records are rebuilt from its Excel files when next opened
+    reopened = BookShopStore(b.base_dir)
+    reopened.load_inventory()
+    records = reopened.sales_records
+    reopened.records_ready.wait(10)
+    assert len(records) == 1
+    assert records.strings[int(records.records['invoice'][0])] == invoice['invoice_no']